@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Load test for leave_server.py
+
+Opens many keep-alive connections and sends requests as fast as the
+server answers them for a fixed time, then reports requests per second
+and latency percentiles. With --spawn it starts a server on temporary
+data first, so nothing real is touched.
+
+    python3 bench_leave_server.py --spawn --connections 50 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from leave_storage import JsonStorage
+from leave_tracker import LeaveTracker
+
+
+def request(method, path, body=None):
+    payload = json.dumps(body).encode() if body is not None else b''
+    return (f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n").encode() + payload
+
+
+async def read_response(reader):
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode().partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(host, port, deadline, write_ratio, year, rng, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    reads = [request('GET', '/balance'), request('GET', f'/leave?year={year}')]
+    try:
+        while time.perf_counter() < deadline:
+            if rng.random() < write_ratio:
+                day = date(year, 9, 1) + timedelta(days=rng.randrange(365))
+                message = request('POST', '/leave', {'date': day.isoformat(), 'hours': 1.0})
+            else:
+                message = rng.choice(reads)
+
+            start = time.perf_counter()
+            writer.write(message)
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, connections, duration, write_ratio, year, seed):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(client(host, port, deadline, write_ratio, year, random.Random(seed + i),
+                                  latencies, errors)
+                           for i in range(connections)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def spawn_server(tmp_dir, port, year):
+    """Start leave_server.py on temporary data with some history"""
+    storage = JsonStorage(Path(tmp_dir) / '.leave_tracker_config.json', Path(tmp_dir) / '.leave_tracker_data.json')
+    storage.save_config({'years': {str(year): {'hours_per_period': 7.0, 'hours_per_day': 7.5,
+                                               'carryover_hours': 0}}})
+    LeaveTracker(storage=storage).add_many(
+        [((date(year, 9, 1) + timedelta(days=i % 365)).isoformat(),) for i in range(1000)])
+
+    process = subprocess.Popen([sys.executable, str(Path(__file__).with_name('leave_server.py')),
+                                '--port', str(port)],
+                               env={'HOME': tmp_dir, 'PATH': ''}, stdout=subprocess.PIPE)
+    process.stdout.readline()  # "Serving leave tracker on ..."
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the leave tracker HTTP server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--connections', type=int, default=50, help='Concurrent connections (default: 50)')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to run (default: 10)')
+    parser.add_argument('--write-ratio', type=float, default=0.0,
+                        help='Fraction of requests that add leave (default: 0)')
+    parser.add_argument('--year', type=int, default=date.today().year - (date.today().month < 9),
+                        help='Leave year to query and write to (default: the current one)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--spawn', action='store_true',
+                        help='Start a server on temporary data instead of using a running one')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        process = spawn_server(tmp_dir, args.port, args.year) if args.spawn else None
+        try:
+            latencies, errors, elapsed = asyncio.run(run_load(
+                args.host, args.port, args.connections, args.duration, args.write_ratio, args.year, args.seed))
+        finally:
+            if process:
+                process.terminate()
+                process.wait()
+
+    latencies.sort()
+    print(f"{len(latencies)} requests in {elapsed:.1f}s over {args.connections} connections")
+    print(f"{len(latencies) / elapsed:,.0f} requests/s, {len(errors)} errors")
+    if latencies:
+        print("latency ms: " + "  ".join(f"p{p * 100:g} {percentile(latencies, p) * 1000:.2f}"
+                                         for p in (0.5, 0.9, 0.99)) +
+              f"  max {latencies[-1] * 1000:.2f}")
+
+
+if __name__ == '__main__':
+    main()
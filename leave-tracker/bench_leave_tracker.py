@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Benchmarks for adding leave entries in bulk
+
+Times add_many against the JSON files and SQLite at each size, and
+add_leave called once per entry for comparison. Results can be written
+as JSON to compare runs.
+"""
+import argparse
+import json
+import platform
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from leave_storage import JsonStorage, SqliteStorage
+from leave_tracker import LeaveTracker
+
+
+DEFAULT_SIZES = [10_000, 100_000]
+# add_leave rewrites the whole file per call, so it is timed on a sample
+# and scaled up rather than run at full size
+SINGLE_ADD_SAMPLE = 500
+FIRST_YEAR = 2000
+
+
+def make_config(years):
+    return {'years': {str(year): {'hours_per_period': 7.0, 'hours_per_day': 7.5, 'carryover_hours': 0}
+                      for year in range(FIRST_YEAR, FIRST_YEAR + years)}}
+
+
+def make_rows(count, seed=0):
+    """(date, hours, description) rows spread over about 200 days a year"""
+    rng = random.Random(seed)
+    start = date(FIRST_YEAR, 9, 1)
+    years = count // 200 + 1
+    rows = [((start + timedelta(days=rng.randrange(years * 365))).isoformat(),
+             rng.choice([3.75, 7.5]), f"Leave {i}") for i in range(count)]
+    return rows, years + 1
+
+
+def make_tracker(kind, tmp_dir, years):
+    tmp_dir = Path(tmp_dir)
+    if kind == 'sqlite':
+        storage = SqliteStorage(tmp_dir / 'leave.db')
+    else:
+        storage = JsonStorage(tmp_dir / 'config.json', tmp_dir / 'data.json')
+    storage.save_config(make_config(years))
+    return LeaveTracker(storage=storage)
+
+
+def bench_add_many(kind, rows, years):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tracker = make_tracker(kind, tmp_dir, years)
+        start = time.perf_counter()
+        tracker.add_many(rows)
+        return time.perf_counter() - start
+
+
+def bench_add_leave(kind, rows, years):
+    """Time add_leave on a sample and scale to the full row count"""
+    sample = rows[:SINGLE_ADD_SAMPLE]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tracker = make_tracker(kind, tmp_dir, years)
+        # Preload the rest so each call sees a file of the full size
+        tracker.add_many(rows[len(sample):])
+        start = time.perf_counter()
+        for row in sample:
+            tracker.add_leave(*row)
+        return (time.perf_counter() - start) * len(rows) / len(sample)
+
+
+BENCHMARKS = {
+    'add_many[json]': (bench_add_many, 'json'),
+    'add_many[sqlite]': (bench_add_many, 'sqlite'),
+    'add_leave[json]': (bench_add_leave, 'json'),
+    'add_leave[sqlite]': (bench_add_leave, 'sqlite'),
+}
+
+
+def run_benchmarks(sizes, seed=0, names=None):
+    results = []
+    for count in sizes:
+        rows, years = make_rows(count, seed)
+        for name in names or BENCHMARKS:
+            function, kind = BENCHMARKS[name]
+            seconds = function(kind, rows, years)
+            result = {'name': name, 'rows': count, 'seconds': seconds,
+                      'rows_per_sec': count / seconds if seconds else None,
+                      'estimated': function is bench_add_leave}
+            results.append(result)
+            print(format_result(result))
+    return results
+
+
+def format_result(result):
+    estimate = "  (estimated from a sample)" if result['estimated'] else ""
+    return (f"{result['name']:<20} {result['rows']:>9} rows  {result['seconds']:>9.2f} s  "
+            f"{result['rows_per_sec']:>12,.0f} rows/s{estimate}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk leave entry.')
+    parser.add_argument('--sizes', type=lambda s: [int(n) for n in s.split(',')], default=DEFAULT_SIZES,
+                        help='Comma-separated entry counts (default: 10000,100000)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic entries')
+    parser.add_argument('--only', action='append', choices=BENCHMARKS,
+                        help='Run just this benchmark (can be repeated)')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.seed, args.only)
+
+    if args.output:
+        report = {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Compact archives of closed leave years
+
+A leave year that has ended never changes, yet while it sits in the JSON
+data file every load parses it again. Archiving moves each closed year
+into its own file: the dates as day ordinals and the hours as doubles,
+packed in arrays, with the descriptions after them. An archive is read
+only when its year is asked for, so the data file, and everything done
+with the current year, stays the same size however much history there
+is. Archives are never rewritten.
+"""
+import bisect
+import json
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from contextlib import nullcontext
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional
+
+MAGIC = b'LVA1'
+HEADER = struct.Struct('<4sIId')  # magic, leave year, entry count, total hours
+SUFFIX = '.lva'
+
+
+def _little_endian(values: array) -> array:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+class YearArchive:
+    """The entries of one closed leave year, in date order"""
+
+    def __init__(self, year: int, ordinals: array, hours: array, descriptions: bytes):
+        self.year = year
+        self.ordinals = ordinals
+        self.hours = hours
+        self._descriptions = descriptions
+        self.total_hours = sum(hours)
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    @classmethod
+    def read(cls, path) -> 'YearArchive':
+        """Load an archive file"""
+        raw = Path(path).read_bytes()
+        magic, year, count, _ = HEADER.unpack_from(raw)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a leave archive.")
+
+        offset = HEADER.size
+        ordinals = array('i')
+        ordinals.frombytes(raw[offset:offset + 4 * count])
+        offset += 4 * count
+        hours = array('d')
+        hours.frombytes(raw[offset:offset + 8 * count])
+        offset += 8 * count
+        return cls(year, _little_endian(ordinals), _little_endian(hours), raw[offset:])
+
+    @staticmethod
+    def write(path, year: int, entries: List[Dict]) -> None:
+        """Write entries to a new archive file; an existing archive is never replaced"""
+        path = Path(path)
+        entries = sorted(entries, key=lambda entry: entry['date'])
+        ordinals = array('i', (date.fromisoformat(entry['date']).toordinal() for entry in entries))
+        hours = array('d', (entry['hours'] for entry in entries))
+        descriptions = json.dumps([entry['description'] for entry in entries], separators=(',', ':'))
+
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, year, len(entries), sum(hours)))
+                f.write(_little_endian(ordinals).tobytes())
+                f.write(_little_endian(hours).tobytes())
+                f.write(descriptions.encode())
+                f.flush()
+                os.fsync(f.fileno())
+            # A hard link fails if the archive exists, where a rename would replace it
+            os.link(tmp_name, path)
+        finally:
+            os.unlink(tmp_name)
+
+    def _entries(self, lo: int, hi: int) -> List[Dict]:
+        descriptions = json.loads(self._descriptions)
+        return [{'date': date.fromordinal(self.ordinals[i]).isoformat(),
+                 'hours': self.hours[i],
+                 'description': descriptions[i]}
+                for i in range(lo, hi)]
+
+    def entries(self) -> List[Dict]:
+        """Every entry, as the dicts the tracker uses"""
+        return self._entries(0, len(self))
+
+    def between(self, start: str, end: str) -> List[Dict]:
+        """Entries from start to end inclusive (YYYY-MM-DD)"""
+        lo = bisect.bisect_left(self.ordinals, date.fromisoformat(start).toordinal())
+        hi = bisect.bisect_right(self.ordinals, date.fromisoformat(end).toordinal())
+        return self._entries(lo, hi)
+
+
+class ArchivedStorage:
+    """Another backend with its closed years moved into archive files
+
+    The inner backend holds the open years only. Archived years are
+    listed from the archive directory and each is loaded the first time
+    it is asked for. Writes to an archived year are refused. Anything
+    else goes straight to the inner backend.
+    """
+
+    def __init__(self, inner, archive_dir):
+        self.inner = inner
+        self.archive_dir = Path(archive_dir)
+        self._years = frozenset()
+        self._listed = None
+        self._archives = {}
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def _path(self, year: int) -> Path:
+        return self.archive_dir / f"{year}{SUFFIX}"
+
+    def archived_years(self) -> List[int]:
+        """Leave years with an archive, listed again only when the directory changes"""
+        try:
+            listed = os.stat(self.archive_dir).st_mtime_ns
+        except FileNotFoundError:
+            listed = None
+        if listed != self._listed:
+            self._years = frozenset(int(path.stem) for path in self.archive_dir.glob(f"*{SUFFIX}")
+                                    if path.stem.isdigit()) if listed else frozenset()
+            self._listed = listed
+        return sorted(self._years)
+
+    def archived(self, year: int) -> Optional[YearArchive]:
+        """The archive for a leave year, or None if the year is still open"""
+        year = int(year)
+        if year not in self.archived_years():
+            return None
+        if year not in self._archives:
+            self._archives[year] = YearArchive.read(self._path(year))
+        return self._archives[year]
+
+    def _check_open(self, years) -> None:
+        closed = sorted(set(map(int, years)) & set(self.archived_years()))
+        if closed:
+            year = closed[0]
+            raise ValueError(f"The {year}-{year+1} leave year is archived and can no longer be changed.")
+
+    def save_data(self, data: Dict) -> None:
+        self._check_open(data)
+        self.inner.save_data(data)
+
+    def add_entry(self, year: int, entry: Dict) -> None:
+        self._check_open([year])
+        self.inner.add_entry(year, entry)
+
+    def add_entries(self, entries_by_year: Dict[int, List[Dict]]) -> None:
+        self._check_open(entries_by_year)
+        self.inner.add_entries(entries_by_year)
+
+    def remove_entry(self, year: int, leave_date: str) -> Optional[Dict]:
+        self._check_open([year])
+        return self.inner.remove_entry(year, leave_date)
+
+    def apply_changes(self, changes: List, data: Optional[Dict] = None) -> None:
+        self._check_open(year for _, year, _ in changes)
+        self.inner.apply_changes(changes, data)
+
+    def used_hours(self, year: int) -> float:
+        archive = self.archived(year)
+        return archive.total_hours if archive is not None else self.inner.used_hours(year)
+
+    def archive(self, before_year: int) -> Dict[int, int]:
+        """Move every open year before `before_year` into an archive
+
+        Returns the number of entries archived for each year. Each archive
+        is written before its year is removed from the inner backend, so
+        an interruption leaves the entries in both places, never neither;
+        archiving again then finishes the job.
+        """
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        locked = getattr(self.inner, 'locked', None)
+        with locked() if locked else nullcontext():
+            data = self.inner.load_data()
+            closed = sorted(int(year) for year in data if int(year) < before_year)
+            counts = {}
+            for year in closed:
+                if not self._path(year).exists():
+                    YearArchive.write(self._path(year), year, data[str(year)])
+                counts[year] = len(data.pop(str(year)))
+            if closed:
+                self.inner.save_data(data)
+        return counts
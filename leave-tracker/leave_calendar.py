@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Working days for the leave tracker
+
+A WorkingCalendar knows which weekdays are the weekend and which dates are
+bank holidays. For each leave year it builds a bitmap with one byte per
+day, so expanding a date range to working days is an index per day rather
+than a date calculation and a holiday search.
+"""
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Iterable, List
+
+from leave_projection import year_start
+
+DEFAULT_WEEKEND = (5, 6)  # Saturday and Sunday, as date.weekday() numbers
+DAY_NAMES = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+
+def parse_weekend(text: str) -> List[int]:
+    """Weekday numbers from names like 'sat,sun' ('' for no weekend)"""
+    days = []
+    for name in filter(None, (part.strip().lower()[:3] for part in text.split(','))):
+        if name not in DAY_NAMES:
+            raise ValueError(f"Unknown day: {name}. Use mon, tue, wed, thu, fri, sat or sun.")
+        days.append(DAY_NAMES.index(name))
+    return sorted(set(days))
+
+
+def leave_year_of(day: date) -> int:
+    return day.year if day.month >= 9 else day.year - 1
+
+
+class WorkingCalendar:
+    """Weekend days and bank holidays, with a working-day bitmap per leave year"""
+
+    def __init__(self, weekend: Iterable[int] = DEFAULT_WEEKEND, bank_holidays: Iterable[str] = ()):
+        self.weekend = frozenset(weekend)
+        self.bank_holidays = frozenset(bank_holidays)
+        self._bitmaps = {}
+
+    def _bitmap(self, year: int) -> bytearray:
+        """1 for each working day of a leave year, 0 for weekends and holidays"""
+        if year not in self._bitmaps:
+            start = year_start(year)
+            days = (year_start(year + 1) - start).days
+            bitmap = bytearray(days)
+            for offset in range(days):
+                bitmap[offset] = (start + timedelta(days=offset)).weekday() not in self.weekend
+            for holiday in self.bank_holidays:
+                offset = (date.fromisoformat(holiday) - start).days
+                if 0 <= offset < days:
+                    bitmap[offset] = 0
+            self._bitmaps[year] = bitmap
+        return self._bitmaps[year]
+
+    def is_working_day(self, day) -> bool:
+        """Whether a date (or YYYY-MM-DD string) is a working day"""
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        year = leave_year_of(day)
+        return bool(self._bitmap(year)[(day - year_start(year)).days])
+
+    def working_days(self, start: date, end: date) -> List[date]:
+        """Working days from start to end inclusive"""
+        days = []
+        while start <= end:
+            # One leave year's bitmap at a time
+            year = leave_year_of(start)
+            first = year_start(year)
+            year_end = min(end, year_start(year + 1) - timedelta(days=1))
+            bitmap = self._bitmap(year)
+            for offset in range((start - first).days, (year_end - first).days + 1):
+                if bitmap[offset]:
+                    days.append(first + timedelta(days=offset))
+            start = year_end + timedelta(days=1)
+        return days
+
+
+@lru_cache(maxsize=32)
+def working_calendar(weekend: tuple, bank_holidays: tuple) -> WorkingCalendar:
+    """A shared calendar for these settings, so bitmaps are built once"""
+    return WorkingCalendar(weekend, bank_holidays)
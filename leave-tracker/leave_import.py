@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Read leave entries from CSV and iCalendar files
+
+Both readers yield (date, hours, description) rows for
+LeaveTracker.add_many, which does the validation. Hours and description
+are None when the file does not give them, so the usual defaults apply.
+"""
+import csv
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+Row = Tuple[str, Optional[Union[float, str]], Optional[str]]
+
+
+def read_csv(lines) -> Iterator[Row]:
+    """Rows from CSV with date, hours and description columns
+
+    A header row is optional. With one, columns are matched by name and
+    may be in any order; without one they are taken as date, hours,
+    description.
+    """
+    reader = csv.reader(lines)
+    columns = {'date': 0, 'hours': 1, 'description': 2}
+
+    first = True
+
+    for record in reader:
+        if not record or not any(cell.strip() for cell in record):
+            continue
+
+        # Only the first non-blank record can be the header
+        is_header = first and 'date' in (cell.strip().lower() for cell in record)
+        first = False
+        if is_header:
+            columns = {cell.strip().lower(): i for i, cell in enumerate(record)}
+            continue
+
+        def cell(name):
+            i = columns.get(name)
+            if i is None or i >= len(record) or not record[i].strip():
+                return None
+            return record[i].strip()
+
+        yield cell('date'), cell('hours'), cell('description')
+
+
+def _unfold(lines) -> Iterator[str]:
+    """Join iCalendar continuation lines (those starting with a space or tab)"""
+    current = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _unescape(text: str) -> str:
+    return (text.replace('\\n', ' ').replace('\\N', ' ')
+            .replace('\\,', ',').replace('\\;', ';').replace('\\\\', '\\'))
+
+
+def _parse_ical_time(value: str) -> datetime:
+    if 'T' in value:
+        return datetime.strptime(value.rstrip('Z'), '%Y%m%dT%H%M%S')
+    return datetime.strptime(value, '%Y%m%d')
+
+
+def read_ical(lines, is_working_day=None) -> Iterator[Row]:
+    """Rows from the VEVENTs in an iCalendar file
+
+    All-day events give one row per day, with DTEND exclusive as in the
+    spec; if `is_working_day` is given, days it rejects are skipped.
+    Timed events give one row with the event's length in hours.
+    """
+    event = None
+    for line in _unfold(lines):
+        if line == 'BEGIN:VEVENT':
+            event = {}
+            continue
+        if line == 'END:VEVENT':
+            if event and 'DTSTART' in event:
+                yield from _event_rows(event, is_working_day)
+            event = None
+            continue
+        if event is None or ':' not in line:
+            continue
+
+        name_and_params, value = line.split(':', 1)
+        event[name_and_params.split(';', 1)[0].upper()] = value
+
+
+def _event_rows(event, is_working_day=None) -> Iterator[Row]:
+    start = _parse_ical_time(event['DTSTART'])
+    summary = _unescape(event['SUMMARY']) if 'SUMMARY' in event else None
+
+    if 'T' in event['DTSTART']:
+        end = _parse_ical_time(event['DTEND']) if 'DTEND' in event else None
+        hours = (end - start).total_seconds() / 3600 if end else None
+        yield start.strftime('%Y-%m-%d'), hours, summary
+        return
+
+    end = _parse_ical_time(event['DTEND']) if 'DTEND' in event else start + timedelta(days=1)
+    day = start
+    while day < end:
+        if is_working_day is None or is_working_day(day.date()):
+            yield day.strftime('%Y-%m-%d'), None, summary
+        day += timedelta(days=1)
+
+
+def read_leave_file(path, is_working_day=None) -> Iterator[Row]:
+    """Rows from a .csv or .ics file, chosen by extension
+
+    `is_working_day` filters the days of multi-day iCal events.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix not in ('.csv', '.ics', '.ical'):
+        raise ValueError(f"Unsupported file type {suffix or path.name}: use .csv or .ics")
+
+    with open(path, newline='') as f:
+        if suffix == '.csv':
+            yield from read_csv(f)
+        else:
+            yield from read_ical(f, is_working_day)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Accrual and balance projection over a leave year
+
+Leave accrues in 24 periods a year, credited on the 15th and the last day
+of each month from September to August. Carryover is available from
+September 1st. Balances for every day of a year are worked out together
+as running sums over per-day lists, so a curve for a whole team is a few
+linear passes per person rather than a sum per person per day.
+"""
+import calendar
+from functools import lru_cache
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Dict, Iterable, List, Tuple
+
+PERIODS_PER_YEAR = 24
+
+
+def year_start(year: int) -> date:
+    """First day of a leave year (September 1st)"""
+    return date(year, 9, 1)
+
+
+def year_days(year: int) -> List[date]:
+    """Every day of a leave year, September 1st to August 31st"""
+    start = year_start(year)
+    count = (year_start(year + 1) - start).days
+    return [start + timedelta(days=offset) for offset in range(count)]
+
+
+def accrual_dates(year: int) -> List[date]:
+    """The days leave is credited: the 15th and month end, Sept to Aug"""
+    dates = []
+    for offset in range(12):
+        month = (8 + offset) % 12 + 1
+        calendar_year = year if month >= 9 else year + 1
+        last_day = calendar.monthrange(calendar_year, month)[1]
+        dates.append(date(calendar_year, month, 15))
+        dates.append(date(calendar_year, month, last_day))
+    return dates
+
+
+def accrued_hours(year: int, year_config: Dict, on: date) -> float:
+    """Hours accrued from the start of the leave year up to and including a day"""
+    periods = sum(1 for credited in accrual_dates(year) if credited <= on)
+    return year_config['carryover_hours'] + periods * year_config['hours_per_period']
+
+
+@lru_cache(maxsize=8)
+def _day_index(year: int) -> Tuple[Tuple[str, ...], Dict[str, int]]:
+    """YYYY-MM-DD labels for each day of a leave year, and label -> position"""
+    labels = tuple(day.isoformat() for day in year_days(year))
+    return labels, {label: i for i, label in enumerate(labels)}
+
+
+def balance_curve(year: int, year_config: Dict, entries: Iterable[Tuple[str, float]]) -> Dict[str, List]:
+    """Accrued, used and balance hours for every day of a leave year
+
+    `entries` are (date, hours) pairs, past and future; any outside the
+    year are ignored. Returns columns of equal length: 'dates'
+    (YYYY-MM-DD), 'accrued', 'used' and 'balance'. The balance on a day
+    counts all leave taken up to and including it.
+    """
+    labels, positions = _day_index(year)
+    start = year_start(year)
+
+    credits = [0.0] * len(labels)
+    credits[0] = year_config['carryover_hours']
+    for credited in accrual_dates(year):
+        credits[(credited - start).days] += year_config['hours_per_period']
+
+    taken = [0.0] * len(labels)
+    for leave_date, hours in entries:
+        i = positions.get(leave_date)
+        if i is not None:
+            taken[i] += hours
+
+    accrued = list(accumulate(credits))
+    used = list(accumulate(taken))
+    return {
+        'dates': list(labels),
+        'accrued': accrued,
+        'used': used,
+        'balance': [a - u for a, u in zip(accrued, used)],
+    }
+
+
+def project(year: int, year_config: Dict, entries: Iterable[Tuple[str, float]], on: date) -> Dict:
+    """Balance on a day, and the balance at year end with all booked leave"""
+    first, last = year_start(year).isoformat(), (year_start(year + 1) - timedelta(days=1)).isoformat()
+    entries = [(leave_date, hours) for leave_date, hours in entries if first <= leave_date <= last]
+    on_str = on.isoformat()
+    used = sum(hours for leave_date, hours in entries if leave_date <= on_str)
+    booked = sum(hours for leave_date, hours in entries if leave_date > on_str)
+    accrued = accrued_hours(year, year_config, on)
+    allowance = year_config['carryover_hours'] + PERIODS_PER_YEAR * year_config['hours_per_period']
+
+    return {
+        'year': year,
+        'date': on_str,
+        'accrued_hours': accrued,
+        'used_hours': used,
+        'balance': accrued - used,
+        'booked_hours': booked,
+        'year_end_balance': allowance - used - booked,
+    }
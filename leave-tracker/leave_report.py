@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Pivot reports of leave hours by month, year, person and team
+
+Entries flow through a chain of generators as (person, date, hours)
+records: read from the storage, limited to a date range, labelled with
+the report's row and column, and summed into a pivot. Only the pivot's
+cells are kept, so a report over many years of a whole team's leave
+needs memory for its rows and columns, not for the entries.
+"""
+import csv
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from leave_projection import year_start
+
+DIMENSIONS = ('person', 'team', 'month', 'year')
+
+Record = Tuple[str, str, float]  # person ('' for a single user), date, hours
+
+
+def records(tracker, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[Record]:
+    """Leave from start to end inclusive (YYYY-MM-DD, either may be None)
+
+    From a shared database this is everyone's leave, streamed from one
+    query. Otherwise it is the tracker's own, a leave year at a time,
+    with archived years read only if they are in range.
+    """
+    team_rows = getattr(tracker.storage, 'team_rows', None)
+    if team_rows:
+        yield from team_rows(start, end)
+        return
+
+    years = set(map(int, tracker.load_data())) | set(getattr(tracker.storage, 'archived_years', list)())
+    for year in sorted(years):
+        if (start and year_start(year + 1).isoformat() <= start) or (end and year_start(year).isoformat() > end):
+            continue
+        for entry in tracker.list_leave(year):
+            if (not start or entry['date'] >= start) and (not end or entry['date'] <= end):
+                yield '', entry['date'], entry['hours']
+
+
+def teams(tracker) -> Dict[str, str]:
+    """Each person's team from their config; people without one are left out"""
+    configs = getattr(tracker.storage, 'configs', None)
+    if configs:
+        found = configs()
+    else:
+        try:
+            found = {'': tracker.load_config()}
+        except FileNotFoundError:
+            found = {}
+    return {person: config['team'] for person, config in found.items() if config.get('team')}
+
+
+def _labeller(dimension: str, team_of: Dict[str, str]):
+    """Function from a record to its label along a dimension"""
+    if dimension == 'person':
+        return lambda record: record[0] or '-'
+    if dimension == 'team':
+        return lambda record: team_of.get(record[0], '-')
+    if dimension == 'month':
+        return lambda record: record[1][:7]
+    if dimension == 'year':
+        return lambda record: _leave_year_label(record[1])
+    raise ValueError(f"Unknown report dimension: {dimension}. Use {', '.join(DIMENSIONS)}.")
+
+
+def _leave_year_label(date_str: str) -> str:
+    """'2024-2025' for a YYYY-MM-DD string, without parsing it into a date"""
+    year = int(date_str[:4]) - (date_str[5:7] < '09')
+    return f"{year}-{year + 1}"
+
+
+class Pivot:
+    """Hours summed by one dimension down the side and optionally one across"""
+
+    def __init__(self, rows: str, columns: Optional[str] = None, team_of: Optional[Dict[str, str]] = None):
+        if rows == columns:
+            raise ValueError("Report rows and columns must be different.")
+        self.rows = rows
+        self.columns = columns
+        self._row_label = _labeller(rows, team_of or {})
+        self._column_label = _labeller(columns, team_of or {}) if columns else (lambda record: 'Total')
+        self.cells: Dict[str, Dict[str, float]] = {}
+
+    def add(self, records: Iterable[Record]) -> 'Pivot':
+        """Sum records into the cells, consuming them one at a time"""
+        row_label, column_label, cells = self._row_label, self._column_label, self.cells
+        for record in records:
+            row = cells.setdefault(row_label(record), {})
+            column = column_label(record)
+            row[column] = row.get(column, 0.0) + record[2]
+        return self
+
+    def column_labels(self) -> List[str]:
+        return sorted({column for row in self.cells.values() for column in row})
+
+    def header(self) -> List[str]:
+        return [self.rows.title()] + (self.column_labels() + ['Total'] if self.columns else ['Hours'])
+
+    def lines(self) -> Iterator[List]:
+        """The header, a row per label with its total, then a totals row"""
+        columns = self.column_labels()
+        yield self.header()
+        totals = dict.fromkeys(columns, 0.0)
+        for label in sorted(self.cells):
+            row = self.cells[label]
+            values = [row.get(column, 0.0) for column in columns]
+            for column, hours in zip(columns, values):
+                totals[column] += hours
+            yield [label] + (values + [sum(values)] if self.columns else values)
+        values = [totals[column] for column in columns]
+        yield ['Total'] + (values + [sum(values)] if self.columns else values)
+
+    def as_dicts(self) -> Iterator[Dict]:
+        """Each line after the header as a dict keyed by the header"""
+        lines = self.lines()
+        header = next(lines)
+        for line in lines:
+            yield dict(zip(header, line))
+
+
+def build_report(tracker, rows: str = 'person', columns: Optional[str] = 'month',
+                 start: Optional[str] = None, end: Optional[str] = None) -> Pivot:
+    """Pivot of leave hours from start to end inclusive"""
+    for value in (start, end):
+        if value:
+            datetime.strptime(value, '%Y-%m-%d')
+    team_of = teams(tracker) if 'team' in (rows, columns) else {}
+    return Pivot(rows, columns, team_of).add(records(tracker, start, end))
+
+
+def write_csv(pivot: Pivot, out) -> None:
+    """Write the pivot as CSV, with hours to two decimal places"""
+    writer = csv.writer(out)
+    lines = pivot.lines()
+    writer.writerow(next(lines))
+    writer.writerows([line[0]] + [f"{hours:.2f}" for hours in line[1:]] for line in lines)
+
+
+def write_json(pivot: Pivot, out) -> None:
+    """Write the pivot as a JSON list of rows, the totals row last"""
+    json.dump(list(pivot.as_dicts()), out, indent=2)
+    out.write('\n')
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Local HTTP API for the leave tracker
+
+Serves balances and leave lists as JSON from data kept in memory, so a
+chat bot or intranet page does not start a new interpreter and load the
+files for every question. Reads are answered straight from memory.
+Writes go through one writer task, which applies everything queued and
+then saves once, so concurrent writers never interleave and a burst of
+writes shares one save.
+
+    python3 leave_server.py --port 8765
+    curl localhost:8765/balance
+    curl -X POST localhost:8765/leave -d '{"date": "2024-12-25"}'
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+from datetime import date
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from leave_storage import ConflictError, JournalStorage, SessionStorage, SqliteStorage
+from leave_tracker import LeaveTracker
+
+MAX_BODY = 1_000_000
+MAX_CACHED = 256  # distinct GET targets kept encoded
+
+log = logging.getLogger(__name__)
+
+
+class HttpError(Exception):
+    """An error response with a status code"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class LeaveServer:
+    """HTTP front end for one LeaveTracker with its data resident in memory
+
+    Routes:
+        GET    /health
+        GET    /balance?year=2024
+        GET    /leave?year=2024
+        POST   /leave          {"date": ..., "hours": ..., "description": ...}
+        DELETE /leave?date=2024-12-25
+    """
+
+    def __init__(self, tracker: LeaveTracker):
+        self.tracker = tracker
+        # A long-lived session: loaded once, picks up outside changes while
+        # idle, and saved by the writer after each batch
+        tracker.storage = SessionStorage(tracker.storage)
+        self.writes = asyncio.Queue()
+        self._writer = None
+        # Encoded GET responses, reused until a write, an outside change to
+        # the storage or a new day: a leave list is costly to encode
+        self._responses = {}
+        self._generation = 0
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765) -> asyncio.AbstractServer:
+        """Start the writer task and listen for connections"""
+        self._writer = asyncio.create_task(self._write_loop())
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def stop(self) -> None:
+        """Stop the writer task"""
+        if self._writer:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+
+    async def write(self, method: str, *args):
+        """Queue a tracker call for the writer task and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        await self.writes.put((method, args, future))
+        return await future
+
+    async def _write_loop(self) -> None:
+        """Apply queued writes in order, saving once per batch"""
+        while True:
+            batch = [await self.writes.get()]
+            while not self.writes.empty():
+                batch.append(self.writes.get_nowait())
+
+            results = []
+            for method, args, _ in batch:
+                try:
+                    results.append((True, getattr(self.tracker, method)(*args)))
+                except Exception as e:
+                    # Fails this call only; the writer carries on with the rest
+                    results.append((False, e))
+
+            try:
+                self.tracker.storage.flush()
+            except Exception as e:
+                # Nothing in the batch was saved: start again from what is on
+                # disk and fail every write in it
+                self.tracker.storage = SessionStorage(self.tracker.storage.inner)
+                results = [(False, e)] * len(batch)
+            self._generation += 1
+
+            for (_, _, future), (ok, value) in zip(batch, results):
+                if future.cancelled():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    async def handle(self, method: str, target: str, body: bytes):
+        """Answer one request, returning the JSON-ready result"""
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        year = int(query['year']) if query.get('year', '').isdigit() else None
+
+        if url.path == '/health' and method == 'GET':
+            return {'status': 'ok'}
+        if url.path == '/balance' and method == 'GET':
+            return self.tracker.calculate_balance(year)
+        if url.path == '/leave' and method == 'GET':
+            return self.tracker.list_leave(year)
+        if url.path == '/leave' and method == 'POST':
+            try:
+                fields = json.loads(body or b'{}')
+                args = (fields['date'], fields.get('hours'), fields.get('description'))
+            except (ValueError, KeyError, TypeError):
+                raise HttpError(HTTPStatus.BAD_REQUEST, 'Send a JSON object with at least "date".')
+            date_text, hours, description = args
+            if (not isinstance(date_text, str)
+                    or not (hours is None or isinstance(hours, (int, float)) and not isinstance(hours, bool))
+                    or not (description is None or isinstance(description, str))):
+                raise HttpError(HTTPStatus.BAD_REQUEST,
+                                '"date" must be a string, "hours" a number and "description" a string.')
+            return await self.write('add_leave', *args)
+        if url.path == '/leave' and method == 'DELETE':
+            if 'date' not in query:
+                raise HttpError(HTTPStatus.BAD_REQUEST, 'Give the date to remove, e.g. ?date=2024-12-25')
+            removed = await self.write('remove_leave', query['date'])
+            if removed is None:
+                raise HttpError(HTTPStatus.NOT_FOUND, 'No leave entry found for that date.')
+            return removed
+        if url.path in ('/health', '/balance', '/leave'):
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not supported on {url.path}")
+        raise HttpError(HTTPStatus.NOT_FOUND, f"No such endpoint: {url.path}")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve requests on one connection, keeping it open between them"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY:
+                    status = HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+                    payload = json.dumps({'error': 'Request body too large.'}).encode()
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = await self._respond(method, target, body)
+
+                keep_alive = (headers.get('connection', '').lower() != 'close' and
+                              not version.strip().endswith('1.0') and status != HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method: str, target: str, body: bytes):
+        """Status and encoded JSON body for one request"""
+        if method == 'GET':
+            stamp = (self._generation, self.tracker.storage.inner.version(), date.today())
+            cached = self._responses.get(target)
+            if cached and cached[0] == stamp:
+                return HTTPStatus.OK, cached[1]
+
+        try:
+            payload = json.dumps(await self.handle(method, target, body)).encode()
+        except HttpError as e:
+            return e.status, json.dumps({'error': str(e)}).encode()
+        except FileNotFoundError as e:
+            # The tracker has not been set up yet
+            return HTTPStatus.SERVICE_UNAVAILABLE, json.dumps({'error': str(e)}).encode()
+        except ConflictError as e:
+            return HTTPStatus.CONFLICT, json.dumps({'error': str(e)}).encode()
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, json.dumps({'error': str(e)}).encode()
+        except Exception:
+            # For example a failed save on a full or read-only disk
+            log.exception("Error handling %s %s", method, target)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, json.dumps({'error': 'Internal server error.'}).encode()
+
+        if method == 'GET':
+            if len(self._responses) >= MAX_CACHED and target not in self._responses:
+                self._responses.clear()
+            self._responses[target] = (stamp, payload)
+        return HTTPStatus.OK, payload
+
+
+async def serve(tracker: LeaveTracker, host: str, port: int) -> None:
+    server = LeaveServer(tracker)
+    listener = await server.start(host, port)
+    print(f"Serving leave tracker on http://{host}:{port}", flush=True)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the leave tracker over HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+    parser.add_argument('--db', default=os.environ.get('LEAVE_TRACKER_DB'),
+                        help='SQLite database to use instead of the JSON files (default: $LEAVE_TRACKER_DB)')
+    parser.add_argument('--journal', default=os.environ.get('LEAVE_TRACKER_JOURNAL'),
+                        help='Journal directory to use instead of the JSON data file (default: $LEAVE_TRACKER_JOURNAL)')
+    parser.add_argument('--person', default=os.environ.get('LEAVE_TRACKER_PERSON'),
+                        help='Whose leave to serve from a shared --db (default: $LEAVE_TRACKER_PERSON)')
+    args = parser.parse_args()
+
+    tracker = LeaveTracker()
+    if args.db:
+        tracker = LeaveTracker(storage=SqliteStorage(args.db, args.person or ''))
+    elif args.journal:
+        tracker = LeaveTracker(storage=JournalStorage(tracker.config_path, args.journal))
+
+    try:
+        asyncio.run(serve(tracker, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,820 @@
+#!/usr/bin/env python3
+"""Storage backends for the leave tracker
+
+A backend loads and saves the config and the leave data, and can add or
+remove a single entry. LeaveTracker only talks to this interface, so the
+original JSON files and SQLite are interchangeable.
+"""
+import bisect
+import copy
+import json
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; writes are still atomic
+    fcntl = None
+
+
+class ConflictError(ValueError):
+    """The data file changed on disk since it was loaded"""
+
+
+_NOT_LOADED = object()
+
+
+def entry_date(entry: Dict) -> str:
+    """Sort key for leave entries"""
+    return entry['date']
+
+
+def merge_entries(data: Dict, entries_by_year: Dict[int, List[Dict]]) -> None:
+    """Merge new entries into loaded data, keeping each year in date order
+
+    One sort per year touched; Timsort merges the two sorted runs in
+    linear time, where inserting one at a time would be quadratic.
+    """
+    for year, entries in entries_by_year.items():
+        year_entries = data.setdefault(str(year), [])
+        year_entries.extend(entries)
+        year_entries.sort(key=entry_date)
+
+
+def pop_entry(entries: List[Dict], leave_date: str) -> Optional[Dict]:
+    """Remove and return the first entry on a date from a sorted list, or None"""
+    i = bisect.bisect_left(entries, leave_date, key=entry_date)
+    if i < len(entries) and entries[i]['date'] == leave_date:
+        return entries.pop(i)
+    return None
+
+
+def apply_changes(data: Dict, changes: List[Tuple]) -> None:
+    """Replay ('add', year, entries) and ('remove', year, date) changes on loaded data"""
+    for kind, year, value in changes:
+        if kind == 'add':
+            merge_entries(data, {year: value})
+        else:
+            pop_entry(data.get(str(year), []), value)
+
+
+def write_json_atomic(path: Path, value) -> None:
+    """Write JSON so readers see the old file or the new one, never a partial one
+
+    The JSON goes to a temporary file in the same directory, is flushed to
+    disk, then renamed over the target.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(value, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+    # Make the rename itself durable
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def year_totals(data: Dict) -> Dict[str, float]:
+    """Hours used in each leave year of loaded data"""
+    return {year: sum(entry['hours'] for entry in entries) for year, entries in data.items()}
+
+
+class JsonStorage:
+    """Config and leave data in two JSON files (the original format)
+
+    Files are replaced atomically, and changes are made under an advisory
+    lock on a `.lock` file next to the data, so processes running at once
+    take turns instead of overwriting each other. save_data also checks
+    the file has not changed since this instance loaded it.
+    """
+
+    def __init__(self, config_path, data_path):
+        self.config_path = Path(config_path)
+        self.data_path = Path(data_path)
+        self.lock_path = self.data_path.with_name(self.data_path.name + '.lock')
+        self._lock_file = None
+        self._lock_depth = 0
+        # Version of the data file when last loaded or saved; the check is
+        # skipped until this instance has seen the file
+        self._loaded_version = _NOT_LOADED
+
+    @staticmethod
+    def _file_version(path: Path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        # The inode changes with every atomic replace, even within one mtime tick
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def version(self):
+        """Changes whenever either file is written"""
+        return (self._file_version(self.config_path), self._file_version(self.data_path))
+
+    @contextmanager
+    def locked(self):
+        """Hold the exclusive lock; re-entrant within this instance"""
+        if fcntl is None or self._lock_depth:
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+            return
+
+        self._lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._lock_depth = 1
+            yield
+        finally:
+            self._lock_depth = 0
+            self._lock_file.close()
+            self._lock_file = None
+
+    def load_config(self) -> Dict:
+        """Load configuration from file"""
+        if not self.config_path.exists():
+            raise FileNotFoundError("No configuration found. Run 'setup' command first.")
+
+        try:
+            with open(self.config_path) as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            # If the file is empty or invalid JSON, raise FileNotFoundError
+            raise FileNotFoundError("Invalid configuration file. Run 'setup' command first.")
+
+    def save_config(self, config: Dict) -> None:
+        """Save configuration to file"""
+        with self.locked():
+            write_json_atomic(self.config_path, config)
+
+    def load_data(self) -> Dict:
+        """Load leave data from file, with each year's entries in date order"""
+        self._loaded_version = self._file_version(self.data_path)
+        if self._loaded_version is None:
+            return {}
+
+        try:
+            with open(self.data_path) as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            # If the file is empty or invalid JSON, return empty dict
+            return {}
+
+        # Files written by older versions may be unsorted; this is a single
+        # linear pass when they are already in order
+        for entries in data.values():
+            entries.sort(key=entry_date)
+        return data
+
+    def _unchanged(self) -> bool:
+        return (self._loaded_version is _NOT_LOADED or
+                self._file_version(self.data_path) == self._loaded_version)
+
+    def save_data(self, data: Dict) -> None:
+        """Save leave data to file
+
+        Raises ConflictError if another process wrote the file after this
+        instance last loaded or saved it.
+        """
+        with self.locked():
+            if not self._unchanged():
+                raise ConflictError("Leave data was changed by another process. Try again.")
+            write_json_atomic(self.data_path, data)
+            self._loaded_version = self._file_version(self.data_path)
+
+    def add_entry(self, year: int, entry: Dict) -> None:
+        """Add one entry to a leave year"""
+        self.apply_changes([('add', year, [entry])])
+
+    def add_entries(self, entries_by_year: Dict[int, List[Dict]]) -> None:
+        """Add many entries, grouped by leave year, in one write"""
+        self.apply_changes([('add', year, entries) for year, entries in entries_by_year.items()])
+
+    def remove_entry(self, year: int, leave_date: str) -> Optional[Dict]:
+        """Remove the first entry on a date, returning it or None"""
+        with self.locked():
+            data = self.load_data()
+            removed = pop_entry(data.get(str(year), []), leave_date)
+            if removed is not None:
+                self.save_data(data)
+            return removed
+
+    def apply_changes(self, changes: List[Tuple], data: Optional[Dict] = None) -> None:
+        """Apply a batch of changes in one locked write
+
+        `data` is the caller's copy of the loaded data with the changes
+        already made. It is saved as it is if the file has not changed
+        since it was loaded; otherwise the file is read again and the
+        changes replayed on top, so nobody else's writes are lost.
+        """
+        with self.locked():
+            if data is None or self._loaded_version is _NOT_LOADED or not self._unchanged():
+                data = self.load_data()
+                apply_changes(data, changes)
+            self.save_data(data)
+
+    def used_hours(self, year: int) -> float:
+        """Hours used in a leave year
+
+        The file has no stored totals, so this sums the year; use a
+        session to keep a running total instead.
+        """
+        return sum(entry['hours'] for entry in self.load_data().get(str(year), []))
+
+
+class SqliteStorage:
+    """Config and leave data in a SQLite database
+
+    Each add or remove is a single-row write in its own transaction, so
+    the cost does not grow with the size of the history. WAL mode lets
+    readers carry on while another process writes.
+
+    One database can hold a whole team. Config and entries are
+    partitioned by person, and an instance reads and writes the
+    partition for its `person` ('' for a single user). Team queries such
+    as who_is_off and coverage look across everyone using the date index.
+    """
+
+    # The original single-user schema; MIGRATIONS bring it up to date
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS config (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS entries (
+            id INTEGER PRIMARY KEY,
+            year INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            hours REAL NOT NULL,
+            description TEXT
+        );
+        CREATE INDEX IF NOT EXISTS entries_year_date ON entries (year, date);
+        CREATE INDEX IF NOT EXISTS entries_date ON entries (date);
+    """
+
+    # Statements to reach each schema version, tracked in PRAGMA user_version
+    MIGRATIONS = [
+        # 1: partition config and entries by person
+        [
+            "CREATE TABLE config_by_person (person TEXT PRIMARY KEY, value TEXT NOT NULL)",
+            "INSERT INTO config_by_person (person, value) SELECT '', value FROM config",
+            "DROP TABLE config",
+            "ALTER TABLE config_by_person RENAME TO config",
+            "ALTER TABLE entries ADD COLUMN person TEXT NOT NULL DEFAULT ''",
+            "DROP INDEX entries_year_date",
+            "DROP INDEX entries_date",
+            "CREATE INDEX entries_person_year_date ON entries (person, year, date)",
+            "CREATE INDEX entries_date_person ON entries (date, person)",
+        ],
+        # 2: running used-hours totals, kept up to date by triggers so every
+        # write path updates them in the same transaction
+        [
+            "CREATE TABLE totals (person TEXT NOT NULL, year INTEGER NOT NULL, "
+            "hours REAL NOT NULL, PRIMARY KEY (person, year))",
+            "INSERT INTO totals (person, year, hours) "
+            "SELECT person, year, SUM(hours) FROM entries GROUP BY person, year",
+            "CREATE TRIGGER entries_insert_total AFTER INSERT ON entries BEGIN "
+            "INSERT INTO totals (person, year, hours) VALUES (NEW.person, NEW.year, NEW.hours) "
+            "ON CONFLICT (person, year) DO UPDATE SET hours = hours + NEW.hours; END",
+            "CREATE TRIGGER entries_delete_total AFTER DELETE ON entries BEGIN "
+            "UPDATE totals SET hours = hours - OLD.hours "
+            "WHERE person = OLD.person AND year = OLD.year; END",
+        ],
+        # 3: drop the original indexes, which older versions re-created on
+        # every connect after migration 1 had dropped them
+        [
+            "DROP INDEX IF EXISTS entries_year_date",
+            "DROP INDEX IF EXISTS entries_date",
+        ],
+    ]
+
+    def __init__(self, db_path, person: str = '', connection=None):
+        self.db_path = Path(db_path)
+        self.person = person
+        if connection is not None:
+            self.connection = connection
+            return
+
+        # Autocommit mode; writes use explicit transactions
+        self.connection = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """Apply any schema migrations this database has not had yet"""
+        target = len(self.MIGRATIONS)
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] == target:
+            return
+
+        with self.transaction() as db:
+            # Checked again under the write lock in case another process
+            # migrated in the meantime
+            current = db.execute("PRAGMA user_version").fetchone()[0]
+            if current == 0:
+                # New or original single-user databases start from the
+                # original schema; it is never run again once migrated
+                for statement in filter(str.strip, self.SCHEMA.split(';')):
+                    db.execute(statement)
+            for statements in self.MIGRATIONS[current:]:
+                for statement in statements:
+                    db.execute(statement)
+            db.execute(f"PRAGMA user_version = {target}")
+
+    def for_person(self, person: str) -> 'SqliteStorage':
+        """The same database, scoped to another person's partition"""
+        return SqliteStorage(self.db_path, person, connection=self.connection)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def version(self):
+        """Changes whenever this or another connection commits"""
+        return (self.connection.execute("PRAGMA data_version").fetchone()[0],
+                self.connection.total_changes)
+
+    @contextmanager
+    def transaction(self):
+        """Run statements in one write transaction, rolled back on error"""
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.connection
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+    def load_config(self) -> Dict:
+        """Load configuration"""
+        row = self.connection.execute(
+            "SELECT value FROM config WHERE person = ?", (self.person,)).fetchone()
+        if row is None:
+            raise FileNotFoundError("No configuration found. Run 'setup' command first.")
+        return json.loads(row[0])
+
+    def save_config(self, config: Dict) -> None:
+        """Save configuration"""
+        with self.transaction() as db:
+            db.execute("INSERT OR REPLACE INTO config (person, value) VALUES (?, ?)",
+                       (self.person, json.dumps(config)))
+
+    def load_data(self) -> Dict:
+        """Load all leave data, with each year's entries in date order"""
+        data = {}
+        rows = self.connection.execute(
+            "SELECT year, date, hours, description FROM entries WHERE person = ? "
+            "ORDER BY year, date, id", (self.person,))
+        for year, leave_date, hours, description in rows:
+            data.setdefault(str(year), []).append(
+                {'date': leave_date, 'hours': hours, 'description': description})
+        return data
+
+    def save_data(self, data: Dict) -> None:
+        """Replace all leave data"""
+        with self.transaction() as db:
+            db.execute("DELETE FROM entries WHERE person = ?", (self.person,))
+            self._insert(db, data)
+
+    def _insert(self, db, entries_by_year) -> None:
+        db.executemany(
+            "INSERT INTO entries (person, year, date, hours, description) VALUES (?, ?, ?, ?, ?)",
+            ((self.person, int(year), e['date'], e['hours'], e['description'])
+             for year, entries in entries_by_year.items() for e in entries))
+
+    def add_entry(self, year: int, entry: Dict) -> None:
+        """Add one entry to a leave year"""
+        with self.transaction() as db:
+            self._insert(db, {year: [entry]})
+
+    def add_entries(self, entries_by_year: Dict[int, List[Dict]]) -> None:
+        """Add many entries, grouped by leave year, in one transaction"""
+        with self.transaction() as db:
+            self._insert(db, entries_by_year)
+
+    def _delete(self, db, year: int, leave_date: str) -> Optional[Dict]:
+        row = db.execute(
+            "SELECT id, hours, description FROM entries "
+            "WHERE person = ? AND year = ? AND date = ? ORDER BY id LIMIT 1",
+            (self.person, year, leave_date)).fetchone()
+        if row is None:
+            return None
+        db.execute("DELETE FROM entries WHERE id = ?", (row[0],))
+        return {'date': leave_date, 'hours': row[1], 'description': row[2]}
+
+    def remove_entry(self, year: int, leave_date: str) -> Optional[Dict]:
+        """Remove the first entry on a date, returning it or None"""
+        with self.transaction() as db:
+            return self._delete(db, year, leave_date)
+
+    def apply_changes(self, changes: List[Tuple], data: Optional[Dict] = None) -> None:
+        """Apply a batch of adds and removes in one transaction
+
+        Changes are applied row by row, so `data` is not needed and
+        concurrent writers never overwrite each other.
+        """
+        with self.transaction() as db:
+            for kind, year, value in changes:
+                if kind == 'add':
+                    self._insert(db, {year: value})
+                else:
+                    self._delete(db, year, value)
+
+    @property
+    def location(self) -> str:
+        return f"{self.db_path} for {self.person}" if self.person else str(self.db_path)
+
+    def is_empty(self) -> bool:
+        """Whether this person has no config and no leave data yet"""
+        return (self.connection.execute(
+                    "SELECT 1 FROM config WHERE person = ?", (self.person,)).fetchone() is None and
+                self.connection.execute(
+                    "SELECT 1 FROM entries WHERE person = ? LIMIT 1", (self.person,)).fetchone() is None)
+
+    def used_hours(self, year: int) -> float:
+        """Hours used in a leave year, from the running totals"""
+        row = self.connection.execute(
+            "SELECT hours FROM totals WHERE person = ? AND year = ?", (self.person, year)).fetchone()
+        return row[0] if row else 0
+
+    def team_used_hours(self, year: int) -> Dict[str, float]:
+        """Hours used in a leave year by everyone, from the running totals"""
+        rows = self.connection.execute("SELECT person, hours FROM totals WHERE year = ?", (year,))
+        return dict(rows.fetchall())
+
+    def team_entries(self, year: int) -> Dict[str, List[Tuple[str, float]]]:
+        """(date, hours) for everyone's entries in a leave year, keyed by person"""
+        entries = {}
+        rows = self.connection.execute(
+            "SELECT person, date, hours FROM entries WHERE year = ? ORDER BY person, date", (year,))
+        for person, leave_date, hours in rows:
+            entries.setdefault(person, []).append((leave_date, hours))
+        return entries
+
+    def configs(self) -> Dict[str, Dict]:
+        """Everyone's config, keyed by person"""
+        rows = self.connection.execute("SELECT person, value FROM config ORDER BY person")
+        return {person: json.loads(value) for person, value in rows}
+
+    def people(self) -> List[str]:
+        """Everyone with a config, in name order"""
+        return [row[0] for row in self.connection.execute("SELECT person FROM config ORDER BY person")]
+
+    def who_is_off(self, leave_date: str) -> List[Dict]:
+        """Every entry on a date, across the team, ordered by person"""
+        rows = self.connection.execute(
+            "SELECT person, hours, description FROM entries WHERE date = ? ORDER BY person, id",
+            (leave_date,))
+        return [{'person': person, 'date': leave_date, 'hours': hours, 'description': description}
+                for person, hours, description in rows]
+
+    def coverage(self, start: str, end: str) -> Dict[str, List[str]]:
+        """People off on each date from start to end inclusive
+
+        Only dates with someone off are included. The query is a range
+        scan of the (date, person) index and never reads the entries.
+        """
+        off = {}
+        rows = self.connection.execute(
+            "SELECT DISTINCT date, person FROM entries WHERE date BETWEEN ? AND ? "
+            "ORDER BY date, person", (start, end))
+        for leave_date, person in rows:
+            off.setdefault(leave_date, []).append(person)
+        return off
+
+    def team_rows(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[Tuple[str, str, float]]:
+        """(person, date, hours) for everyone's entries from start to end inclusive
+
+        Rows come in date order straight from the cursor, so a report over
+        years of a whole team's leave never holds it all in memory.
+        """
+        yield from self.connection.execute(
+            "SELECT person, date, hours FROM entries WHERE date BETWEEN ? AND ? ORDER BY date, person",
+            (start or '0000-00-00', end or '9999-99-99'))
+
+
+class JournalStorage:
+    """Leave data as an append-only journal of JSON Lines events
+
+    Each add or remove appends one line, so a change costs the same however
+    long the history is. Loading replays the events on top of the latest
+    snapshot. Once the current segment grows past `compact_bytes`, the
+    state is snapshotted and later events go to a new segment. Old
+    segments are kept, so history() has every change ever made.
+
+    The config stays in its JSON file.
+    """
+
+    SNAPSHOT = 'snapshot.json'
+
+    def __init__(self, config_path, journal_dir, compact_bytes: int = 1_000_000):
+        self.config_storage = JsonStorage(config_path, Path(journal_dir) / self.SNAPSHOT)
+        self.config_path = self.config_storage.config_path
+        self.journal_dir = Path(journal_dir)
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self.compact_bytes = compact_bytes
+        self.location = str(self.journal_dir)
+
+    def _segment_path(self, number: int) -> Path:
+        return self.journal_dir / f"segment-{number:06d}.jsonl"
+
+    def _segments(self) -> List[int]:
+        """Numbers of the segment files on disk, oldest first"""
+        return sorted(int(path.stem.split('-')[1]) for path in self.journal_dir.glob('segment-*.jsonl'))
+
+    def _load_snapshot(self) -> Dict:
+        path = self.journal_dir / self.SNAPSHOT
+        if not path.exists():
+            return {'next_segment': 1, 'data': {}}
+        with open(path) as f:
+            return json.load(f)
+
+    def _current_segment(self, snapshot: Dict) -> int:
+        segments = self._segments()
+        return max([snapshot['next_segment']] + segments[-1:])
+
+    def version(self):
+        """Changes whenever the config, snapshot or current segment is written"""
+        segments = self._segments()
+        current = self._segment_path(segments[-1]) if segments else None
+        return (self.config_storage.version(),
+                JsonStorage._file_version(current) if current else None)
+
+    def locked(self):
+        return self.config_storage.locked()
+
+    def load_config(self) -> Dict:
+        return self.config_storage.load_config()
+
+    def save_config(self, config: Dict) -> None:
+        self.config_storage.save_config(config)
+
+    def load_data(self) -> Dict:
+        """Rebuild the leave data from the snapshot and later events"""
+        snapshot = self._load_snapshot()
+        data = snapshot['data']
+        changes = []
+        for number in self._segments():
+            if number >= snapshot['next_segment']:
+                changes.extend((event['op'], event['year'], event['value'])
+                               for event in self._read_segment(number))
+        apply_changes(data, changes)
+        return data
+
+    def _read_segment(self, number: int):
+        with open(self._segment_path(number)) as f:
+            for line in f:
+                # A crash mid-append can leave a partial last line
+                if line.endswith('\n'):
+                    yield json.loads(line)
+
+    def history(self):
+        """Every event ever recorded, oldest first"""
+        for number in self._segments():
+            yield from self._read_segment(number)
+
+    def apply_changes(self, changes: List[Tuple], data: Optional[Dict] = None) -> None:
+        """Append a batch of changes as events, with one write and one fsync"""
+        at = datetime.now().isoformat(timespec='seconds')
+        lines = ''.join(json.dumps({'at': at, 'op': kind, 'year': year, 'value': value}) + '\n'
+                        for kind, year, value in changes)
+        with self.locked():
+            path = self._segment_path(self._current_segment(self._load_snapshot()))
+            self._drop_partial_line(path)
+            with open(path, 'a') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+            if size >= self.compact_bytes:
+                self.compact()
+
+    @staticmethod
+    def _drop_partial_line(path: Path, block: int = 4096) -> None:
+        """Cut a partial last line left by a crash, so the next event starts on a line of its own"""
+        try:
+            f = open(path, 'r+b')
+        except FileNotFoundError:
+            return
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b'\n':
+                return
+            # Search back a block at a time for the last complete line
+            keep = 0
+            position = end
+            while position > 0:
+                start = max(position - block, 0)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b'\n')
+                if newline >= 0:
+                    keep = start + newline + 1
+                    break
+                position = start
+            f.truncate(keep)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def add_entry(self, year: int, entry: Dict) -> None:
+        """Add one entry to a leave year"""
+        self.apply_changes([('add', year, [entry])])
+
+    def add_entries(self, entries_by_year: Dict[int, List[Dict]]) -> None:
+        """Add many entries, grouped by leave year"""
+        self.apply_changes([('add', year, entries) for year, entries in entries_by_year.items()])
+
+    def remove_entry(self, year: int, leave_date: str) -> Optional[Dict]:
+        """Remove the first entry on a date, returning it or None
+
+        This replays the journal to find the entry; in a session the
+        loaded state is used instead.
+        """
+        with self.locked():
+            removed = pop_entry(self.load_data().get(str(year), []), leave_date)
+            if removed is not None:
+                self.apply_changes([('remove', year, leave_date)])
+            return removed
+
+    def save_data(self, data: Dict) -> None:
+        """Replace all leave data with a new snapshot"""
+        with self.locked():
+            self._write_snapshot(data)
+
+    def _write_snapshot(self, data: Dict) -> None:
+        next_segment = self._current_segment(self._load_snapshot()) + 1
+        write_json_atomic(self.journal_dir / self.SNAPSHOT, {'next_segment': next_segment, 'data': data})
+
+    def compact(self) -> None:
+        """Snapshot the current state so loading skips the events so far"""
+        with self.locked():
+            self._write_snapshot(self.load_data())
+
+    def used_hours(self, year: int) -> float:
+        """Hours used in a leave year"""
+        return sum(entry['hours'] for entry in self.load_data().get(str(year), []))
+
+    def is_empty(self) -> bool:
+        """Whether nothing has been recorded in the journal yet
+
+        The config file is not checked, as it is shared with the JSON files.
+        """
+        return not self._segments() and not (self.journal_dir / self.SNAPSHOT).exists()
+
+
+class SessionStorage:
+    """Unit of work over another backend
+
+    Config and data are loaded once and kept in memory. Changes stay in
+    memory until flush(), which writes each dirty part once. While nothing
+    is pending, a change in the underlying storage (for example another
+    process saving the file) is picked up on the next read. Adds and
+    removes are also recorded, so if someone else writes before the
+    flush, the backend replays them on top instead of overwriting.
+
+    The loaded data is shared with callers, so change it through
+    add_entry, remove_entry or save_data rather than in place. Anything
+    else, such as team queries, goes straight to the underlying backend.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+        self._config = None
+        self._data = None
+        self._totals = None
+        self._config_dirty = False
+        self._data_dirty = False
+        # Adds and removes since loading; None once the data is replaced
+        self._changes = []
+        self._version = None
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    @property
+    def dirty(self) -> bool:
+        return self._config_dirty or self._data_dirty
+
+    def _check_version(self) -> None:
+        """Drop the cache if the underlying storage changed since it was read"""
+        version = self.inner.version()
+        if version != self._version and not self.dirty:
+            self._config = None
+            self._data = None
+            self._totals = None
+        self._version = version
+
+    def load_config(self) -> Dict:
+        """Load configuration, reading the backend at most once"""
+        self._check_version()
+        if self._config is None:
+            self._config = self.inner.load_config()
+        return copy.deepcopy(self._config)
+
+    def save_config(self, config: Dict) -> None:
+        """Replace the configuration until the next flush"""
+        self._config = copy.deepcopy(config)
+        self._config_dirty = True
+
+    def load_data(self) -> Dict:
+        """Load leave data, reading the backend at most once"""
+        self._check_version()
+        if self._data is None:
+            self._data = self.inner.load_data()
+        return self._data
+
+    def save_data(self, data: Dict) -> None:
+        """Replace all leave data until the next flush"""
+        self._data = data
+        self._totals = None
+        self._changes = None
+        self._data_dirty = True
+
+    def _record(self, change: Tuple) -> None:
+        if self._changes is not None:
+            self._changes.append(change)
+        self._data_dirty = True
+
+    def _add_to_total(self, year, hours: float) -> None:
+        if self._totals is not None:
+            self._totals[str(year)] = self._totals.get(str(year), 0) + hours
+
+    def add_entry(self, year: int, entry: Dict) -> None:
+        """Add one entry to a leave year"""
+        data = self.load_data()
+        bisect.insort(data.setdefault(str(year), []), entry, key=entry_date)
+        self._add_to_total(year, entry['hours'])
+        self._record(('add', year, [entry]))
+
+    def add_entries(self, entries_by_year: Dict[int, List[Dict]]) -> None:
+        """Add many entries, grouped by leave year"""
+        merge_entries(self.load_data(), entries_by_year)
+        for year, entries in entries_by_year.items():
+            self._add_to_total(year, sum(entry['hours'] for entry in entries))
+            self._record(('add', year, entries))
+
+    def remove_entry(self, year: int, leave_date: str) -> Optional[Dict]:
+        """Remove the first entry on a date, returning it or None"""
+        removed = pop_entry(self.load_data().get(str(year), []), leave_date)
+        if removed is not None:
+            self._add_to_total(year, -removed['hours'])
+            self._record(('remove', year, leave_date))
+        return removed
+
+    def used_hours(self, year: int) -> float:
+        """Hours used in a leave year, from totals worked out once per load"""
+        data = self.load_data()
+        if self._totals is None:
+            self._totals = year_totals(data)
+        return self._totals.get(str(year), 0)
+
+    def flush(self) -> None:
+        """Write pending changes to the underlying storage"""
+        if self._config_dirty:
+            self.inner.save_config(self._config)
+            self._config_dirty = False
+        if self._data_dirty:
+            if self._changes is None:
+                self.inner.save_data(self._data)
+            else:
+                self.inner.apply_changes(self._changes, self._data)
+            self._data_dirty = False
+            self._changes = []
+        self._version = self.inner.version()
+
+
+def migrate_json(source, target) -> int:
+    """Copy config and leave data from JSON files into SQLite or a journal
+
+    `source` is a JsonStorage, or a LeaveTracker using one so legacy config
+    is converted and archived years are included. Returns the number of entries copied. The JSON
+    files are left as they are, so they still work as a backup.
+    """
+    if not target.is_empty():
+        raise ValueError(f"{target.location} already has leave data.")
+
+    try:
+        target.save_config(source.load_config())
+    except FileNotFoundError:
+        pass
+
+    data = source.load_all_data() if hasattr(source, 'load_all_data') else source.load_data()
+    target.save_data(data)
+    return sum(len(entries) for entries in data.values())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Box tables for the leave tracker CLI
+
+Rows are turned into strings once, and the box is produced as lines
+from a generator and written in chunks, so a long listing costs one
+write per chunk rather than one print per line. Column widths come
+from every row when the rows are a list. For a stream of rows they come
+from the first `sample` rows, or from fixed `widths`, and the rest are
+rendered as they arrive, with wider cells cut to fit.
+"""
+from itertools import chain, islice, zip_longest
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+SAMPLE_ROWS = 200  # rows used to size the columns of a stream
+CHUNK_LINES = 500  # lines joined into each write
+
+
+def _cells(row) -> List[str]:
+    return list(map(str, row))
+
+
+def _fit(cell: str, width: int) -> str:
+    return cell if len(cell) <= width else cell[:max(width - 1, 0)] + '…'
+
+
+def _line(cells: List[str], widths: Sequence[int]) -> str:
+    return "║   " + "   ".join(cell.ljust(width) for cell, width in zip(cells, widths)) + "   ║"
+
+
+def _widths(widths: List[int], rows: List[List[str]]) -> List[int]:
+    """Widen `widths` to fit each of the rows, a column at a time"""
+    for i, column in enumerate(zip_longest(*rows, fillvalue='')):
+        width = max(map(len, column))
+        if i >= len(widths):
+            widths.append(width)
+        elif width > widths[i]:
+            widths[i] = width
+    return widths
+
+
+def box_lines(title: str, headers=None, rows: Optional[Iterable] = None, footer_rows=None,
+              widths: Optional[Sequence[int]] = None, sample: Optional[int] = None,
+              page_size: int = 0) -> Iterator[str]:
+    """Lines of a box with a title, optional headers, rows and footer rows
+
+    A list of rows is sized exactly unless `widths` or `sample` is given;
+    any other iterable is read lazily, sized from its first `sample`
+    rows (SAMPLE_ROWS by default). With `page_size`, the headers are
+    repeated every that many rows.
+    """
+    headers = _cells(headers) if headers else None
+    footer_rows = [_cells(row) for row in footer_rows] if footer_rows else []
+    rows = iter(()) if rows is None else rows
+    exact = widths is None and sample is None and isinstance(rows, (list, tuple))
+
+    if exact:
+        first = [_cells(row) for row in rows]
+        rest = iter(())
+    else:
+        rows = iter(rows)
+        first = [_cells(row) for row in islice(rows, 0 if widths is not None else sample or SAMPLE_ROWS)]
+        rest = map(_cells, rows)
+
+    if widths is None:
+        widths = _widths(_widths(list(map(len, headers or [])), first), footer_rows)
+    else:
+        widths = list(widths)
+    # Widen the last column if the title would not fit between the borders
+    widths = widths or [0]
+    short = len(title) - (sum(widths) + 3 * (len(widths) - 1))
+    if short > 0:
+        widths[-1] += short
+    # One format string for full rows; short rows end after their last cell
+    full_row = ("║   " + "   ".join(f"{{:<{width}}}" for width in widths) + "   ║").format
+
+    def line(cells: List[str]) -> str:
+        if not exact:
+            cells = [_fit(cell, width) for cell, width in zip(cells, widths)]
+        return full_row(*cells) if len(cells) == len(widths) else _line(cells, widths)
+
+    # Width of the box: columns, 3 spaces between them, 3 spaces padding on each side
+    total_width = sum(widths) + (3 * (len(widths) - 1)) + 6
+    rule = f"╠{'═' * total_width}╣"
+
+    yield f"\n╔{'═' * total_width}╗"
+    yield f"║{title.center(total_width)}║"
+    if headers:
+        yield rule
+        yield _line(headers, widths)
+
+    for count, row in enumerate(chain(first, rest)):
+        if count == 0:
+            yield rule
+        elif page_size and headers and count % page_size == 0:
+            yield rule
+            yield _line(headers, widths)
+            yield rule
+        yield line(row)
+
+    if footer_rows:
+        yield rule
+        for row in footer_rows:
+            yield line(row)
+    yield f"╚{'═' * total_width}╝"
+
+
+def write_chunks(lines: Iterable[str], write, chunk_lines: int = CHUNK_LINES) -> None:
+    """Pass lines to `write` joined into chunks of up to `chunk_lines`"""
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, chunk_lines))
+        if not chunk:
+            return
+        write('\n'.join(chunk))
@@ -1,20 +1,58 @@
 #!/usr/bin/env python3
 import argparse
-import json
+import bisect
 import os
-from datetime import datetime, date
+import sys
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+from itertools import chain
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, Iterable, List, Optional, Tuple, Any, Union
+
+from leave_archive import ArchivedStorage
+from leave_calendar import DAY_NAMES, DEFAULT_WEEKEND, WorkingCalendar, parse_weekend, working_calendar
+from leave_import import read_leave_file
+from leave_projection import PERIODS_PER_YEAR, balance_curve, project
+from leave_report import DIMENSIONS, build_report, write_csv, write_json
+from leave_table import box_lines, write_chunks
+from leave_storage import (JournalStorage, JsonStorage, SessionStorage, SqliteStorage, entry_date,
+                           migrate_json)
 
 
 class LeaveTracker:
     """Core class for leave tracking functionality"""
     
-    def __init__(self, config_path=None, data_path=None):
-        """Initialize with optional custom paths for testing"""
+    def __init__(self, config_path=None, data_path=None, storage=None):
+        """Initialize with optional custom paths or storage backend
+
+        Without a storage backend, config and data live in JSON files, and
+        archived years in a directory next to the data file.
+        """
         self.config_path = config_path or Path.home() / '.leave_tracker_config.json'
-        self.data_path = data_path or Path.home() / '.leave_tracker_data.json'
+        self.data_path = Path(data_path or Path.home() / '.leave_tracker_data.json')
+        self.storage = storage or ArchivedStorage(JsonStorage(self.config_path, self.data_path),
+                                                  self.data_path.with_suffix('.archive'))
     
+    @contextmanager
+    def session(self):
+        """Load once and save once for a batch of calls
+
+        Inside the block every method works on in-memory state, and the
+        changes are written together when it ends. If the block raises,
+        nothing is written.
+        """
+        if isinstance(self.storage, SessionStorage):
+            yield self
+            return
+
+        outer = self.storage
+        self.storage = SessionStorage(outer)
+        try:
+            yield self
+            self.storage.flush()
+        finally:
+            self.storage = outer
+
     @staticmethod
     def get_leave_year(target_date: date) -> int:
         """Get leave year (Sept 1 - Aug 31) for a given date"""
@@ -32,53 +70,35 @@ class LeaveTracker:
         return f"{day}{suffix} {month} {year}"
     
     def load_config(self) -> Dict:
-        """Load configuration from file"""
-        if not self.config_path.exists():
-            raise FileNotFoundError("No configuration found. Run 'setup' command first.")
-        
-        try:
-            with open(self.config_path) as f:
-                config = json.load(f)
-            
-            # Handle legacy config format
-            if 'years' not in config:
-                config = {
-                    'years': {
-                        str(self.get_leave_year(date.today())): {
-                            'hours_per_period': config['hours_per_period'],
-                            'hours_per_day': config['hours_per_day'],
-                            'carryover_hours': config['carryover_hours']
-                        }
+        """Load configuration from storage"""
+        config = self.storage.load_config()
+
+        # Handle legacy config format
+        if 'years' not in config:
+            config = {
+                'years': {
+                    str(self.get_leave_year(date.today())): {
+                        'hours_per_period': config['hours_per_period'],
+                        'hours_per_day': config['hours_per_day'],
+                        'carryover_hours': config['carryover_hours']
                     }
                 }
-                self.save_config(config)
-            
-            return config
-        except json.JSONDecodeError:
-            # If the file is empty or invalid JSON, raise FileNotFoundError
-            raise FileNotFoundError("Invalid configuration file. Run 'setup' command first.")
+            }
+            self.save_config(config)
+
+        return config
     
     def save_config(self, config: Dict) -> None:
-        """Save configuration to file"""
-        with open(self.config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+        """Save configuration to storage"""
+        self.storage.save_config(config)
     
     def load_data(self) -> Dict:
-        """Load leave data from file"""
-        if not self.data_path.exists():
-            return {}
-        
-        try:
-            with open(self.data_path) as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            # If the file is empty or invalid JSON, return empty dict
-            return {}
+        """Load leave data from storage, with each year's entries in date order"""
+        return self.storage.load_data()
     
     def save_data(self, data: Dict) -> None:
-        """Save leave data to file"""
-        with open(self.data_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        """Save leave data to storage"""
+        self.storage.save_data(data)
     
     def setup(self, hours_per_period: float, hours_per_day: float, carryover_hours: float) -> Dict:
         """Set up configuration for current leave year"""
@@ -98,23 +118,20 @@ class LeaveTracker:
         self.save_config(config)
         return config
     
-    def add_leave(self, leave_date_str: str, hours: Optional[float] = None, 
-                  description: Optional[str] = None) -> Dict:
-        """Add a leave entry"""
-        config = self.load_config()
-        data = self.load_data()
-        
+    def _make_entry(self, config: Dict, leave_date_str: str, hours: Optional[float] = None,
+                    description: Optional[str] = None) -> Tuple[int, Dict]:
+        """Validate a leave entry against the config, returning (leave year, entry)"""
         leave_date = datetime.strptime(leave_date_str, '%Y-%m-%d').date()
         year = self.get_leave_year(leave_date)
         
         if str(year) not in config['years']:
             raise ValueError(f"No configuration found for {year}-{year+1}. Run 'setup' command first.")
-        
-        if str(year) not in data:
-            data[str(year)] = []
+        self._check_open(year)
         
         if hours is None:
             hours = config['years'][str(year)]['hours_per_day']
+        else:
+            hours = float(hours)
             
         if description is None:
             description = self.format_date_natural(leave_date)
@@ -124,60 +141,193 @@ class LeaveTracker:
             'hours': hours,
             'description': description
         }
-        
-        data[str(year)].append(entry)
-        self.save_data(data)
+        return year, entry
+
+    def add_leave(self, leave_date_str: str, hours: Optional[float] = None,
+                  description: Optional[str] = None) -> Dict:
+        """Add a leave entry"""
+        config = self.load_config()
+        year, entry = self._make_entry(config, leave_date_str, hours, description)
+        self.storage.add_entry(year, entry)
         return entry
     
+    def add_many(self, rows: Iterable[Tuple]) -> List[Dict]:
+        """Add many leave entries in one write
+
+        Each row is (date, hours, description) like the arguments to
+        add_leave, with hours and description optional. Every row is
+        checked before anything is saved; if any fail, a ValueError lists
+        them and nothing is written.
+        """
+        config = self.load_config()
+        by_year = {}
+        added = []
+        errors = []
+
+        for number, row in enumerate(rows, 1):
+            try:
+                year, entry = self._make_entry(config, *row)
+            except (TypeError, ValueError) as e:
+                errors.append(f"Row {number}: {e}")
+                continue
+            by_year.setdefault(year, []).append(entry)
+            added.append(entry)
+
+        if errors:
+            more = f"\n...and {len(errors) - 10} more" if len(errors) > 10 else ""
+            raise ValueError("\n".join(errors[:10]) + more)
+
+        if added:
+            self.storage.add_entries(by_year)
+        return added
+
+    def working_calendar(self, config: Optional[Dict] = None) -> WorkingCalendar:
+        """Weekend and bank holidays from the config"""
+        config = config or self.load_config()
+        return working_calendar(tuple(config.get('weekend', DEFAULT_WEEKEND)),
+                                tuple(config.get('bank_holidays', [])))
+
+    def add_leave_range(self, start_str: str, end_str: str, hours: Optional[float] = None,
+                        description: Optional[str] = None) -> List[Dict]:
+        """Add an entry for every working day from start to end inclusive, in one write"""
+        start = datetime.strptime(start_str, '%Y-%m-%d').date()
+        end = datetime.strptime(end_str, '%Y-%m-%d').date()
+        if end < start:
+            raise ValueError(f"{end_str} is before {start_str}.")
+
+        days = self.working_calendar().working_days(start, end)
+        if not days:
+            raise ValueError(f"No working days from {start_str} to {end_str}.")
+
+        return self.add_many((day.isoformat(), hours, description) for day in days)
+
+    def add_bank_holiday(self, date_str: str) -> None:
+        """Add a bank holiday, which range bookings skip"""
+        datetime.strptime(date_str, '%Y-%m-%d')
+        config = self.load_config()
+        config['bank_holidays'] = sorted(set(config.get('bank_holidays', [])) | {date_str})
+        self.save_config(config)
+
+    def remove_bank_holiday(self, date_str: str) -> bool:
+        """Remove a bank holiday, returning whether it was there"""
+        config = self.load_config()
+        holidays = config.get('bank_holidays', [])
+        if date_str not in holidays:
+            return False
+        holidays.remove(date_str)
+        self.save_config(config)
+        return True
+
+    def set_weekend(self, days: List[int]) -> None:
+        """Set the weekend as weekday numbers (Monday is 0)"""
+        config = self.load_config()
+        config['weekend'] = sorted(set(days))
+        self.save_config(config)
+
+    def set_team(self, team: Optional[str]) -> None:
+        """Set the team reports group this person under (None or '' to clear)"""
+        config = self.load_config()
+        if team:
+            config['team'] = team
+        else:
+            config.pop('team', None)
+        self.save_config(config)
+
     def remove_leave(self, leave_date_str: str) -> Optional[Dict]:
         """Remove a leave entry by date"""
-        data = self.load_data()
         target_date = datetime.strptime(leave_date_str, '%Y-%m-%d').date()
         year = self.get_leave_year(target_date)
-        
-        if str(year) not in data:
-            return None
-        
-        entries = data[str(year)]
-        for i, entry in enumerate(entries):
-            if entry['date'] == leave_date_str:
-                removed = entries.pop(i)
-                self.save_data(data)
-                return removed
-        
-        return None
+        self._check_open(year)
+        return self.storage.remove_entry(year, leave_date_str)
     
+    def _archived(self, year: int):
+        """The archive holding a closed leave year, or None"""
+        archived = getattr(self.storage, 'archived', None)
+        return archived(year) if archived else None
+
+    def _check_open(self, year: int) -> None:
+        archived_years = getattr(self.storage, 'archived_years', None)
+        if archived_years and year in archived_years():
+            raise ValueError(f"The {year}-{year+1} leave year is archived and can no longer be changed.")
+
+    def archive_years(self, before: Optional[int] = None) -> Dict[int, int]:
+        """Archive every leave year before `before` (default: the current one)
+
+        Returns the number of entries archived for each year.
+        """
+        if not hasattr(self.storage, 'archive'):
+            raise ValueError("Archiving works with the JSON files; SQLite and the journal keep history already.")
+        before = before if before is not None else self.get_leave_year(date.today())
+        if before > self.get_leave_year(date.today()):
+            raise ValueError("Only leave years that have ended can be archived.")
+        return self.storage.archive(before)
+
+    def load_all_data(self) -> Dict:
+        """Leave data for every year, archived ones included"""
+        data = dict(self.load_data())
+        for year in getattr(self.storage, 'archived_years', list)():
+            data.setdefault(str(year), self._archived(year).entries())
+        return data
+
     def list_leave(self, year: Optional[int] = None) -> List[Dict]:
         """List leave entries for a specific year"""
         data = self.load_data()
         target_year = year if year is not None else self.get_leave_year(date.today())
         
         if str(target_year) not in data:
-            return []
+            archive = self._archived(target_year)
+            return archive.entries() if archive is not None else []
         
-        entries = sorted(data[str(target_year)], key=lambda x: x['date'])
-        return entries
+        return list(data[str(target_year)])
     
-    def calculate_balance(self, year: Optional[int] = None) -> Dict:
-        """Calculate leave balance for a specific year"""
-        config = self.load_config()
+    def list_leave_between(self, start_str: str, end_str: str) -> List[Dict]:
+        """List leave entries from start to end date inclusive"""
         data = self.load_data()
-        
-        target_year = year if year is not None else self.get_leave_year(date.today())
-        
-        if str(target_year) not in config['years']:
-            raise ValueError(f"No configuration found for {target_year}-{target_year+1}. Run 'setup' command first.")
-        
-        year_config = config['years'][str(target_year)]
-        
+        start = datetime.strptime(start_str, '%Y-%m-%d').date()
+        end = datetime.strptime(end_str, '%Y-%m-%d').date()
+
+        entries = []
+        for year in range(self.get_leave_year(start), self.get_leave_year(end) + 1):
+            archive = self._archived(year) if str(year) not in data else None
+            if archive is not None:
+                entries.extend(archive.between(start_str, end_str))
+                continue
+            year_entries = data.get(str(year), [])
+            lo = bisect.bisect_left(year_entries, start_str, key=entry_date)
+            hi = bisect.bisect_right(year_entries, end_str, key=entry_date)
+            entries.extend(year_entries[lo:hi])
+        return entries
+
+    def _team_storage(self):
+        if not hasattr(self.storage, 'who_is_off'):
+            raise ValueError("Team queries need a shared database. Use --db.")
+        return self.storage
+
+    def who_is_off(self, date_str: str) -> List[Dict]:
+        """Everyone on leave on a date, with their entries"""
+        datetime.strptime(date_str, '%Y-%m-%d')
+        return self._team_storage().who_is_off(date_str)
+
+    def coverage(self, start_str: str, end_str: str) -> List[Dict]:
+        """For each day from start to end, who is off and how many are in"""
+        start = datetime.strptime(start_str, '%Y-%m-%d').date()
+        end = datetime.strptime(end_str, '%Y-%m-%d').date()
+        storage = self._team_storage()
+        team_size = len(storage.people())
+        off = storage.coverage(start_str, end_str)
+
+        days = []
+        for offset in range((end - start).days + 1):
+            day = (start + timedelta(days=offset)).isoformat()
+            people = off.get(day, [])
+            days.append({'date': day, 'off': people, 'available': max(team_size - len(people), 0)})
+        return days
+
+    @staticmethod
+    def _year_balance(target_year: int, year_config: Dict, used_hours: float) -> Dict:
+        """Balance figures for one leave year from its config and hours used"""
         # Calculate total allowance for the year
-        periods_per_year = 24  # 2 periods per month * 12 months
-        annual_allowance = year_config['hours_per_period'] * periods_per_year + year_config['carryover_hours']
-        
-        # Calculate used leave
-        used_hours = 0
-        if str(target_year) in data:
-            used_hours = sum(entry['hours'] for entry in data[str(target_year)])
+        annual_allowance = year_config['hours_per_period'] * PERIODS_PER_YEAR + year_config['carryover_hours']
         
         current_balance = annual_allowance - used_hours
         
@@ -191,6 +341,96 @@ class LeaveTracker:
             'balance_days': current_balance / year_config['hours_per_day']
         }
 
+    def calculate_balance(self, year: Optional[int] = None) -> Dict:
+        """Calculate leave balance for a specific year
+
+        Used hours come from the storage's running total rather than a sum
+        over the year's entries.
+        """
+        config = self.load_config()
+
+        target_year = year if year is not None else self.get_leave_year(date.today())
+
+        if str(target_year) not in config['years']:
+            raise ValueError(f"No configuration found for {target_year}-{target_year+1}. Run 'setup' command first.")
+
+        year_config = config['years'][str(target_year)]
+        archive = self._archived(target_year)
+        used_hours = archive.total_hours if archive is not None else self.storage.used_hours(target_year)
+        return self._year_balance(target_year, year_config, used_hours)
+
+    def team_balances(self, year: Optional[int] = None) -> List[Dict]:
+        """Balances for everyone configured for a year, from the running totals"""
+        target_year = year if year is not None else self.get_leave_year(date.today())
+        storage = self._team_storage()
+        used = storage.team_used_hours(target_year)
+
+        balances = []
+        for person, config in storage.configs().items():
+            year_config = config.get('years', {}).get(str(target_year))
+            if year_config is not None:
+                balance = self._year_balance(target_year, year_config, used.get(person, 0))
+                balance['person'] = person
+                balances.append(balance)
+        return balances
+
+    def _year_config(self, config: Dict, year: int) -> Dict:
+        if str(year) not in config['years']:
+            raise ValueError(f"No configuration found for {year}-{year+1}. Run 'setup' command first.")
+        return config['years'][str(year)]
+
+    def project_balance(self, on_str: Optional[str] = None) -> Dict:
+        """Accrued hours and balance on a date, and the year-end balance with booked leave"""
+        on = datetime.strptime(on_str, '%Y-%m-%d').date() if on_str else date.today()
+        year = self.get_leave_year(on)
+        year_config = self._year_config(self.load_config(), year)
+        entries = ((entry['date'], entry['hours']) for entry in self.list_leave(year))
+        return project(year, year_config, entries, on)
+
+    def balance_curve(self, year: Optional[int] = None) -> Dict[str, List]:
+        """Accrued, used and balance hours for every day of a leave year"""
+        target_year = year if year is not None else self.get_leave_year(date.today())
+        year_config = self._year_config(self.load_config(), target_year)
+        entries = ((entry['date'], entry['hours']) for entry in self.list_leave(target_year))
+        return balance_curve(target_year, year_config, entries)
+
+    def team_balance_curves(self, year: Optional[int] = None) -> Dict[str, Dict[str, List]]:
+        """Daily balance curves for everyone configured for a year
+
+        The whole team's entries for the year come back in one query.
+        """
+        target_year = year if year is not None else self.get_leave_year(date.today())
+        storage = self._team_storage()
+        entries = storage.team_entries(target_year)
+
+        curves = {}
+        for person, config in storage.configs().items():
+            year_config = config.get('years', {}).get(str(target_year))
+            if year_config is not None:
+                curves[person] = balance_curve(target_year, year_config, entries.get(person, []))
+        return curves
+
+    def verify_totals(self) -> List[Dict]:
+        """Check the running used-hours totals against a full recount
+
+        Returns the years that disagree, with both figures; an empty list
+        means every total is right. Archived years are fixed and skipped.
+        """
+        data = self.load_data()
+        try:
+            years = set(data) | set(self.load_config()['years'])
+        except FileNotFoundError:
+            years = set(data)
+        years -= {str(year) for year in getattr(self.storage, 'archived_years', list)() if str(year) not in data}
+
+        mismatches = []
+        for year in sorted(years, key=int):
+            recounted = sum(entry['hours'] for entry in data.get(year, []))
+            stored = self.storage.used_hours(int(year))
+            if abs(recounted - stored) > 1e-6:
+                mismatches.append({'year': int(year), 'stored': stored, 'recounted': recounted})
+        return mismatches
+
 
 class LeaveTrackerCLI:
     """Command-line interface for the LeaveTracker"""
@@ -198,6 +438,10 @@ class LeaveTrackerCLI:
     def __init__(self, tracker=None):
         """Initialize with optional tracker for testing"""
         self.tracker = tracker or LeaveTracker()
+        self._default_tracker = tracker is None
+        # Table options: size columns from this many rows, repeat headers every page_size rows
+        self.sample_rows = None
+        self.page_size = 0
     
     def setup_command(self, args):
         """Handle setup command"""
@@ -220,79 +464,218 @@ class LeaveTrackerCLI:
         except (ValueError, FileNotFoundError) as e:
             print(str(e))
     
+    def book_command(self, args):
+        """Handle book command"""
+        try:
+            entries = self.tracker.add_leave_range(args.start, args.end, args.hours, args.description)
+            hours = sum(entry['hours'] for entry in entries)
+            print(f"Added {hours:.2f}h leave over {len(entries)} working days "
+                  f"from {entries[0]['date']} to {entries[-1]['date']}")
+        except (ValueError, FileNotFoundError) as e:
+            print(str(e))
+
+    def holiday_command(self, args):
+        """Handle holiday command"""
+        try:
+            if args.action == 'list':
+                holidays = self.tracker.load_config().get('bank_holidays', [])
+                print("\n".join(holidays) if holidays else "No bank holidays set.")
+            elif not args.date:
+                print(f"Give the date to {args.action}.")
+            elif args.action == 'add':
+                self.tracker.add_bank_holiday(args.date)
+                print(f"Added bank holiday {args.date}")
+            elif self.tracker.remove_bank_holiday(args.date):
+                print(f"Removed bank holiday {args.date}")
+            else:
+                print("No bank holiday on that date.")
+        except (ValueError, FileNotFoundError) as e:
+            print(str(e))
+
+    def weekend_command(self, args):
+        """Handle weekend command"""
+        try:
+            if args.days is not None:
+                self.tracker.set_weekend(parse_weekend(args.days))
+            weekend = self.tracker.working_calendar().weekend
+            print(f"Weekend: {', '.join(DAY_NAMES[day] for day in sorted(weekend)) or 'none'}")
+        except (ValueError, FileNotFoundError) as e:
+            print(str(e))
+
+    def team_command(self, args):
+        """Handle team command"""
+        try:
+            if args.name is not None:
+                self.tracker.set_team(args.name)
+            print(f"Team: {self.tracker.load_config().get('team') or 'none'}")
+        except FileNotFoundError as e:
+            print(str(e))
+
     def remove_command(self, args):
         """Handle remove command"""
-        removed = self.tracker.remove_leave(args.date)
+        try:
+            removed = self.tracker.remove_leave(args.date)
+        except ValueError as e:
+            print(str(e))
+            return
         if removed:
             print(f"Removed {removed['hours']:.2f}h leave on {args.date}: {removed['description']}")
         else:
             print("No leave entry found for that date.")
     
+    def import_command(self, args):
+        """Handle import command"""
+        try:
+            calendar = self.tracker.working_calendar()
+            added = self.tracker.add_many(read_leave_file(args.file, calendar.is_working_day))
+            print(f"Imported {len(added)} leave entries from {args.file}")
+        except (ValueError, FileNotFoundError) as e:
+            print(str(e))
+
+    def project_command(self, args):
+        """Handle project command"""
+        try:
+            if args.csv:
+                on = datetime.strptime(args.date, '%Y-%m-%d').date() if args.date else date.today()
+                curve = self.tracker.balance_curve(self.tracker.get_leave_year(on))
+                print("date,accrued,used,balance")
+                for row in zip(curve['dates'], curve['accrued'], curve['used'], curve['balance']):
+                    print("{},{:.2f},{:.2f},{:.2f}".format(*row))
+                return
+
+            projection = self.tracker.project_balance(args.date)
+            day = projection['date']
+            rows = [
+                ["Accrued by then:", f"{projection['accrued_hours']:.2f} hours"],
+                ["Used by then:", f"{projection['used_hours']:.2f} hours"],
+                ["Booked after:", f"{projection['booked_hours']:.2f} hours"]
+            ]
+            footer_rows = [
+                [f"Balance on {day}:", f"{projection['balance']:.2f} hours"],
+                ["Balance at year end:", f"{projection['year_end_balance']:.2f} hours"]
+            ]
+            self._print_box(f"Projected leave on {day}", None, rows, footer_rows)
+        except (ValueError, FileNotFoundError) as e:
+            print(str(e))
+
+    def off_command(self, args):
+        """Handle off command"""
+        try:
+            entries = self.tracker.who_is_off(args.date)
+        except ValueError as e:
+            print(str(e))
+            return
+
+        if not entries:
+            print(f"Nobody is off on {args.date}.")
+            return
+
+        rows = [[entry['person'] or '-', f"{entry['hours']:.2f}h", entry['description']]
+                for entry in entries]
+        self._print_box(f"Off on {args.date}", ["Person", "Hours", "Description"], rows)
+
+    def coverage_command(self, args):
+        """Handle coverage command"""
+        try:
+            days = self.tracker.coverage(args.start, args.end)
+        except ValueError as e:
+            print(str(e))
+            return
+
+        rows = [[day['date'], len(day['off']), day['available'], ', '.join(p or '-' for p in day['off'])]
+                for day in days]
+        self._print_box(f"Coverage {args.start} to {args.end}", ["Date", "Off", "In", "Who"], rows)
+
+    def migrate_command(self, args):
+        """Handle migrate command"""
+        if args.db:
+            target, location = SqliteStorage(args.db, args.person or ''), args.db
+        elif args.journal:
+            target, location = JournalStorage(self.tracker.config_path, args.journal), args.journal
+        else:
+            print("Give the database or journal to migrate into with --db or --journal.")
+            return
+
+        source = LeaveTracker()
+        try:
+            count = migrate_json(source, target)
+            print(f"Migrated {count} leave entries to {location}")
+        except ValueError as e:
+            print(str(e))
+        finally:
+            if args.db:
+                target.close()
+
+    def report_command(self, args):
+        """Handle report command"""
+        columns = None if args.columns == 'none' else args.columns
+        try:
+            pivot = build_report(self.tracker, args.rows, columns, args.start, args.end)
+        except (ValueError, FileNotFoundError) as e:
+            print(str(e))
+            return
+
+        if args.format == 'csv':
+            write_csv(pivot, sys.stdout)
+        elif args.format == 'json':
+            write_json(pivot, sys.stdout)
+        elif not pivot.cells:
+            print("No leave entries in that range.")
+        else:
+            lines = pivot.lines()
+            header = next(lines)
+            rows = [[line[0]] + [f"{hours:.2f}" for hours in line[1:]] for line in lines]
+            title = f"Leave hours by {args.rows}" + (f" and {columns}" if columns else "")
+            self._print_box(title, header, rows[:-1], rows[-1:])
+
+    def archive_command(self, args):
+        """Handle archive command"""
+        try:
+            counts = self.tracker.archive_years(args.before)
+        except ValueError as e:
+            print(str(e))
+            return
+
+        if not counts:
+            print("No closed leave years left to archive.")
+            return
+        rows = [[f"{year}-{year+1}", count] for year, count in counts.items()]
+        self._print_box("Archived leave years", ["Leave Year", "Entries"], rows)
+
+    def history_command(self, args):
+        """Handle history command"""
+        if not hasattr(self.tracker.storage, 'history'):
+            print("History needs a journal. Use --journal.")
+            return
+
+        def history_rows():
+            for event in self.tracker.storage.history():
+                if event['op'] == 'add':
+                    for entry in event['value']:
+                        yield [event['at'], 'add', entry['date'], f"{entry['hours']:.2f}h", entry['description']]
+                else:
+                    yield [event['at'], 'remove', event['value'], '', '']
+
+        # Printed as the journal is read, so a long history starts at once
+        rows = history_rows()
+        first = next(rows, None)
+        if first is None:
+            print("No changes recorded yet.")
+            return
+        self._print_box("Leave history", ["When", "Change", "Date", "Hours", "Description"], chain([first], rows))
+
     def _print_box(self, title, headers=None, rows=None, footer_rows=None):
         """Helper method to print consistent box-style output
         
         Args:
             title: Title of the box
             headers: List of column headers (optional)
-            rows: List of rows, each row is a list of values
+            rows: Rows, each a list of values; a generator is printed as it
+                is read, with columns sized from its first rows
             footer_rows: List of rows for the footer section (optional)
         """
-        # Calculate the width needed for each column
-        col_widths = []
-        
-        # Initialize with header widths
-        if headers:
-            col_widths = [len(str(h)) for h in headers]
-            
-        # Update with row content widths
-        if rows:
-            for row in rows:
-                for i, cell in enumerate(row):
-                    if i >= len(col_widths):
-                        col_widths.append(len(str(cell)))
-                    else:
-                        col_widths[i] = max(col_widths[i], len(str(cell)))
-        
-        # Calculate total width (sum of column widths + separators)
-        total_width = sum(col_widths) + (3 * (len(col_widths) - 1)) + 6  # 3 spaces between cols, 3 spaces padding on each side
-        
-        # Print the box
-        print(f"\n╔{'═' * total_width}╗")
-        print(f"║{title.center(total_width)}║")
-        
-        if headers:
-            print(f"╠{'═' * total_width}╣")
-            header_str = "║   "
-            for i, header in enumerate(headers):
-                header_str += f"{str(header):<{col_widths[i]}}"
-                if i < len(headers) - 1:
-                    header_str += "   "
-            header_str += "   ║"
-            print(header_str)
-            
-        if rows:
-            print(f"╠{'═' * total_width}╣")
-            for row in rows:
-                row_str = "║   "
-                for i, cell in enumerate(row):
-                    row_str += f"{str(cell):<{col_widths[i]}}"
-                    if i < len(row) - 1:
-                        row_str += "   "
-                row_str += "   ║"
-                print(row_str)
-        
-        if footer_rows:
-            print(f"╠{'═' * total_width}╣")
-            for row in footer_rows:
-                row_str = "║   "
-                for i, cell in enumerate(row):
-                    row_str += f"{str(cell):<{col_widths[i]}}"
-                    if i < len(row) - 1:
-                        row_str += "   "
-                row_str += "   ║"
-                print(row_str)
-                
-        print(f"╚{'═' * total_width}╝")
+        lines = box_lines(title, headers, rows, footer_rows, sample=self.sample_rows, page_size=self.page_size)
+        write_chunks(lines, print)
 
     def list_command(self, args):
         """Handle list command"""
@@ -343,12 +726,34 @@ class LeaveTrackerCLI:
             ]
             
             self._print_box(title, None, rows, footer_rows)
+
+            if args.verify:
+                mismatches = self.tracker.verify_totals()
+                for mismatch in mismatches:
+                    year = mismatch['year']
+                    print(f"Total for {year}-{year+1} is {mismatch['stored']:.2f} hours "
+                          f"but the entries add up to {mismatch['recounted']:.2f}")
+                if not mismatches:
+                    print("Totals match the entries.")
         except (ValueError, FileNotFoundError) as e:
             print(str(e))
     
     def run(self):
         """Run the CLI application"""
         parser = argparse.ArgumentParser(description='Annual Leave Tracker')
+        parser.add_argument('--db', default=os.environ.get('LEAVE_TRACKER_DB'),
+                            help='SQLite database to use instead of the JSON files '
+                                 '(default: $LEAVE_TRACKER_DB)')
+        parser.add_argument('--journal', default=os.environ.get('LEAVE_TRACKER_JOURNAL'),
+                            help='Directory for an append-only journal instead of the JSON data file '
+                                 '(default: $LEAVE_TRACKER_JOURNAL)')
+        parser.add_argument('--person', default=os.environ.get('LEAVE_TRACKER_PERSON'),
+                            help='Whose leave to use in a shared --db (default: $LEAVE_TRACKER_PERSON)')
+        parser.add_argument('--page-size', type=int, default=0,
+                            help='Repeat table headers every this many rows (default: never)')
+        parser.add_argument('--sample', type=int,
+                            help='Size table columns from the first this many rows and print the rest '
+                                 'as they come, cutting wider cells')
         subparsers = parser.add_subparsers(dest='command', help='Available commands')
         
         # Setup command
@@ -360,6 +765,22 @@ class LeaveTrackerCLI:
         add_parser.add_argument('hours', type=float, nargs='?', help='Hours of leave (defaults to full day)')
         add_parser.add_argument('description', nargs='?', help='Description of leave (defaults to formatted date)')
         
+        # Book command
+        book_parser = subparsers.add_parser('book', help='Add leave for every working day in a date range')
+        book_parser.add_argument('start', help='First date in YYYY-MM-DD format')
+        book_parser.add_argument('end', help='Last date in YYYY-MM-DD format')
+        book_parser.add_argument('hours', type=float, nargs='?', help='Hours per day (defaults to full day)')
+        book_parser.add_argument('description', nargs='?', help='Description of leave (defaults to formatted date)')
+
+        # Holiday and weekend commands
+        holiday_parser = subparsers.add_parser('holiday', help='Manage bank holidays skipped by book')
+        holiday_parser.add_argument('action', choices=['add', 'remove', 'list'])
+        holiday_parser.add_argument('date', nargs='?', help='Date in YYYY-MM-DD format')
+        weekend_parser = subparsers.add_parser('weekend', help='Show or set the weekend days skipped by book')
+        weekend_parser.add_argument('days', nargs='?', help="Comma-separated days, e.g. 'sat,sun'")
+        team_parser = subparsers.add_parser('team', help='Show or set the team reports group you under')
+        team_parser.add_argument('name', nargs='?', help="Team name ('' to clear)")
+
         # Remove command
         remove_parser = subparsers.add_parser('remove', help='Remove leave entry')
         remove_parser.add_argument('date', help='Date in YYYY-MM-DD format')
@@ -369,22 +790,87 @@ class LeaveTrackerCLI:
         
         # Balance command
         balance_parser = subparsers.add_parser('balance', help='Show current leave balance')
-        
+        balance_parser.add_argument('--verify', action='store_true',
+                                    help='Check the stored totals against the entries')
+
+        # Project command
+        project_parser = subparsers.add_parser('project', help='Show accrued leave and balance on a date')
+        project_parser.add_argument('date', nargs='?', help='Date in YYYY-MM-DD format (defaults to today)')
+        project_parser.add_argument('--csv', action='store_true',
+                                    help="Print the balance for every day of that date's leave year as CSV")
+
+        # Import command
+        import_parser = subparsers.add_parser('import', help='Add leave entries from a CSV or iCal file')
+        import_parser.add_argument('file', help='.csv (date,hours,description) or .ics file')
+
+        # Team commands
+        off_parser = subparsers.add_parser('off', help='Show who is off on a date (needs --db)')
+        off_parser.add_argument('date', help='Date in YYYY-MM-DD format')
+        coverage_parser = subparsers.add_parser('coverage', help='Show how many people are in each day (needs --db)')
+        coverage_parser.add_argument('start', help='First date in YYYY-MM-DD format')
+        coverage_parser.add_argument('end', help='Last date in YYYY-MM-DD format')
+
+        # History command
+        history_parser = subparsers.add_parser('history', help='Show every recorded change (needs --journal)')
+
+        # Report command
+        report_parser = subparsers.add_parser('report', help='Total leave hours by month, year, person or team')
+        report_parser.add_argument('--rows', choices=DIMENSIONS, default='person',
+                                   help='What each row is (default: person)')
+        report_parser.add_argument('--columns', choices=DIMENSIONS + ('none',), default='month',
+                                   help='What each column is (default: month)')
+        report_parser.add_argument('--from', dest='start', help='First date in YYYY-MM-DD format')
+        report_parser.add_argument('--to', dest='end', help='Last date in YYYY-MM-DD format')
+        report_parser.add_argument('--format', choices=['table', 'csv', 'json'], default='table')
+
+        # Archive command
+        archive_parser = subparsers.add_parser('archive', help='Move closed leave years out of the data file')
+        archive_parser.add_argument('--before', type=int,
+                                    help='Archive leave years before this one (default: the current year)')
+
+        # Migrate command
+        migrate_parser = subparsers.add_parser('migrate', help='Copy the JSON files into the --db database or --journal')
+
         args = parser.parse_args()
         
         if not args.command:
             parser.print_help()
             return
         
+        self.sample_rows = args.sample
+        self.page_size = args.page_size
+
+        if args.person and not args.db:
+            print("--person needs a shared database. Use --db.")
+            return
+
+        if args.db and self._default_tracker and args.command != 'migrate':
+            self.tracker = LeaveTracker(storage=SqliteStorage(args.db, args.person or ''))
+        elif args.journal and self._default_tracker and args.command != 'migrate':
+            self.tracker = LeaveTracker(storage=JournalStorage(self.tracker.config_path, args.journal))
+
         command_handlers = {
             'setup': self.setup_command,
             'add': self.add_command,
+            'book': self.book_command,
+            'holiday': self.holiday_command,
+            'weekend': self.weekend_command,
             'remove': self.remove_command,
             'list': self.list_command,
-            'balance': self.balance_command
+            'balance': self.balance_command,
+            'project': self.project_command,
+            'import': self.import_command,
+            'off': self.off_command,
+            'coverage': self.coverage_command,
+            'history': self.history_command,
+            'team': self.team_command,
+            'report': self.report_command,
+            'archive': self.archive_command,
+            'migrate': self.migrate_command
         }
         
-        command_handlers[args.command](args)
+        with self.tracker.session():
+            command_handlers[args.command](args)
 
 
 def main():
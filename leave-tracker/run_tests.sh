@@ -14,7 +14,7 @@ else
 fi
 
 # Run tests with verbose output
-pytest -v test_leave_tracker.py
+pytest -v
 
 # Deactivate virtual environment
 deactivate
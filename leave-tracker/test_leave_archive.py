@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+import json
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from leave_archive import YearArchive
+from leave_storage import SqliteStorage, migrate_json
+from leave_tracker import LeaveTracker
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    """Tracker on temporary JSON files with leave in 2022 to 2024"""
+    tracker = LeaveTracker(tmp_path / 'config.json', tmp_path / 'data.json')
+    year_config = {'hours_per_period': 7.0, 'hours_per_day': 7.5, 'carryover_hours': 0}
+    tracker.save_config({'years': {str(year): dict(year_config) for year in (2022, 2023, 2024)}})
+    tracker.add_many([('2022-12-23', None, 'Christmas'), ('2023-04-07', 3.5, None),
+                      ('2023-12-27', None, None), ('2024-12-24', None, None)])
+    return tracker
+
+
+def test_archive_round_trip(tmp_path):
+    """Test entries come back from an archive as they went in"""
+    entries = [{'date': '2024-12-25', 'hours': 7.5, 'description': 'Christmas Day'},
+               {'date': '2024-12-24', 'hours': 3.75, 'description': 'Christmas Eve, "half"'}]
+    YearArchive.write(tmp_path / '2024.lva', 2024, entries)
+
+    archive = YearArchive.read(tmp_path / '2024.lva')
+    assert archive.year == 2024 and len(archive) == 2
+    assert archive.total_hours == 11.25
+    assert archive.entries() == sorted(entries, key=lambda entry: entry['date'])
+    assert archive.between('2024-12-25', '2025-01-01') == [entries[0]]
+
+    with pytest.raises(FileExistsError):
+        YearArchive.write(tmp_path / '2024.lva', 2024, [])
+
+
+def test_archived_years_leave_the_data_file(tracker):
+    """Test archiving keeps only open years in the data file, with the same answers"""
+    before = {year: tracker.list_leave(year) for year in (2022, 2023, 2024)}
+    balance = tracker.calculate_balance(2023)
+
+    assert tracker.archive_years(2024) == {2022: 2, 2023: 1}
+    assert list(json.loads(tracker.data_path.read_text())) == ['2024']
+
+    fresh = LeaveTracker(tracker.config_path, tracker.data_path)
+    assert {year: fresh.list_leave(year) for year in (2022, 2023, 2024)} == before
+    assert fresh.calculate_balance(2023) == balance
+    assert [e['date'] for e in fresh.list_leave_between('2022-12-01', '2024-12-31')] == \
+        ['2022-12-23', '2023-04-07', '2023-12-27', '2024-12-24']
+    assert fresh.verify_totals() == []
+    assert fresh.archive_years(2024) == {}
+
+
+def test_open_year_does_not_read_archives(tracker):
+    """Test the current year's calls never open an archive file"""
+    tracker.archive_years(2024)
+    fresh = LeaveTracker(tracker.config_path, tracker.data_path)
+    with patch.object(YearArchive, 'read', side_effect=AssertionError):
+        fresh.add_leave('2024-12-27')
+        assert len(fresh.list_leave(2024)) == 2
+        assert fresh.calculate_balance(2024)['used_hours'] == 15.0
+        fresh.remove_leave('2024-12-27')
+
+
+def test_archived_years_are_read_only(tracker):
+    """Test adding or removing leave in an archived year is refused"""
+    tracker.archive_years(2024)
+    with pytest.raises(ValueError, match='archived'):
+        tracker.add_leave('2023-12-28')
+    with pytest.raises(ValueError, match='archived'):
+        tracker.remove_leave('2023-12-27')
+    with pytest.raises(ValueError, match='ended'):
+        tracker.archive_years(date.today().year + 2)
+    assert len(tracker.list_leave(2023)) == 1
+
+
+def test_migrate_includes_archived_years(tracker, tmp_path):
+    """Test migrating to SQLite copies archived years too"""
+    tracker.archive_years(2024)
+    storage = SqliteStorage(tmp_path / 'leave.db')
+    try:
+        assert migrate_json(tracker, storage) == 4
+        assert sorted(storage.load_data()) == ['2022', '2023', '2024']
+    finally:
+        storage.close()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+import pytest
+from datetime import date
+from unittest.mock import patch
+
+from leave_calendar import WorkingCalendar, parse_weekend
+from leave_import import read_ical
+from leave_storage import JsonStorage
+from leave_tracker import LeaveTracker
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    """Tracker with config for two leave years"""
+    storage = JsonStorage(tmp_path / 'config.json', tmp_path / 'data.json')
+    year_config = {'hours_per_period': 7.0, 'hours_per_day': 7.5, 'carryover_hours': 0}
+    storage.save_config({'years': {'2024': year_config, '2025': year_config}})
+    return LeaveTracker(storage=storage)
+
+
+def test_parse_weekend():
+    """Test weekend days are read from names"""
+    assert parse_weekend('Sat, sun') == [5, 6]
+    assert parse_weekend('friday,sat') == [4, 5]
+    assert parse_weekend('') == []
+    with pytest.raises(ValueError):
+        parse_weekend('someday')
+
+
+def test_working_days_skip_weekends_and_holidays():
+    """Test a range expands to working days across a leave year boundary"""
+    calendar = WorkingCalendar(bank_holidays=['2025-08-25'])
+    days = calendar.working_days(date(2025, 8, 22), date(2025, 9, 2))
+
+    assert days == [date(2025, 8, 22), date(2025, 8, 26), date(2025, 8, 27), date(2025, 8, 28),
+                    date(2025, 8, 29), date(2025, 9, 1), date(2025, 9, 2)]
+    assert sorted(calendar._bitmaps) == [2024, 2025]
+    assert not calendar.is_working_day('2025-08-25')
+    assert calendar.is_working_day(date(2025, 8, 26))
+
+
+def test_add_leave_range_in_one_write(tracker):
+    """Test two weeks over Christmas books only the working days, in one write"""
+    tracker.add_bank_holiday('2024-12-25')
+    tracker.add_bank_holiday('2024-12-26')
+    tracker.add_bank_holiday('2025-01-01')
+
+    storage = tracker.storage
+    with patch.object(storage, 'save_data', wraps=storage.save_data) as save_data:
+        entries = tracker.add_leave_range('2024-12-23', '2025-01-03', description='Christmas')
+
+    assert save_data.call_count == 1
+    assert [e['date'] for e in entries] == ['2024-12-23', '2024-12-24', '2024-12-27',
+                                            '2024-12-30', '2024-12-31', '2025-01-02', '2025-01-03']
+    assert tracker.calculate_balance(2024)['used_hours'] == 7 * 7.5
+
+
+def test_add_leave_range_errors(tracker):
+    """Test backwards and empty ranges are refused"""
+    with pytest.raises(ValueError):
+        tracker.add_leave_range('2024-12-27', '2024-12-23')
+    with pytest.raises(ValueError):
+        tracker.add_leave_range('2024-12-28', '2024-12-29')
+
+
+def test_holidays_and_weekend_settings(tracker):
+    """Test bank holidays and the weekend are kept in the config"""
+    tracker.add_bank_holiday('2024-12-25')
+    assert tracker.remove_bank_holiday('2024-12-25')
+    assert not tracker.remove_bank_holiday('2024-12-25')
+
+    tracker.set_weekend([4, 5])
+    calendar = tracker.working_calendar()
+    assert calendar.weekend == {4, 5}
+    assert calendar.is_working_day('2024-12-29')
+
+
+def test_ical_skips_non_working_days(tracker):
+    """Test a week-long all-day event imports as working days only"""
+    lines = [
+        "BEGIN:VEVENT",
+        "DTSTART;VALUE=DATE:20241111",
+        "DTEND;VALUE=DATE:20241118",
+        "SUMMARY:Holiday",
+        "END:VEVENT",
+    ]
+    rows = list(read_ical(lines, tracker.working_calendar().is_working_day))
+    assert [row[0] for row in rows] == ['2024-11-11', '2024-11-12', '2024-11-13', '2024-11-14', '2024-11-15']
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+import pytest
+
+from leave_import import read_csv, read_ical, read_leave_file
+
+
+def test_read_csv_with_header():
+    """Test columns are matched by header name"""
+    lines = [
+        "description,date,hours",
+        "Christmas Day,2024-12-25,7.5",
+        ",2024-12-26,",
+        "",
+    ]
+    assert list(read_csv(lines)) == [
+        ('2024-12-25', '7.5', 'Christmas Day'),
+        ('2024-12-26', None, None),
+    ]
+
+
+def test_read_csv_without_header():
+    """Test headerless files are date, hours, description"""
+    assert list(read_csv(["2024-12-25,3.5,Half day", "2024-12-27"])) == [
+        ('2024-12-25', '3.5', 'Half day'),
+        ('2024-12-27', None, None),
+    ]
+
+
+def test_read_csv_header_after_blank_lines():
+    """Test a header is found when the file starts with blank lines"""
+    assert list(read_csv(["", " , ", "date,hours", "2024-12-25,7.5"])) == [
+        ('2024-12-25', '7.5', None),
+    ]
+
+
+def test_read_ical():
+    """Test all-day events expand per day and timed events give hours"""
+    lines = [
+        "BEGIN:VCALENDAR",
+        "BEGIN:VEVENT",
+        "DTSTART;VALUE=DATE:20241224",
+        "DTEND;VALUE=DATE:20241227",
+        "SUMMARY:Christmas\\, at home",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "DTSTART:20250103T090000Z",
+        "DTEND:20250103T123000Z",
+        "SUMMARY:Dentist and a long",
+        "  description",
+        "END:VEVENT",
+        "END:VCALENDAR",
+    ]
+    assert list(read_ical(lines)) == [
+        ('2024-12-24', None, 'Christmas, at home'),
+        ('2024-12-25', None, 'Christmas, at home'),
+        ('2024-12-26', None, 'Christmas, at home'),
+        ('2025-01-03', 3.5, 'Dentist and a long description'),
+    ]
+
+
+def test_read_leave_file_rejects_unknown_type(tmp_path):
+    """Test only .csv and .ics files are read"""
+    path = tmp_path / 'leave.txt'
+    path.write_text("2024-12-25\n")
+    with pytest.raises(ValueError):
+        list(read_leave_file(path))
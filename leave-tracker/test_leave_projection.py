@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+import pytest
+from datetime import date
+
+from leave_projection import accrual_dates, accrued_hours, balance_curve, project, year_days
+from leave_storage import SqliteStorage
+from leave_tracker import LeaveTracker
+
+
+@pytest.fixture
+def year_config():
+    """Sample configuration for one leave year"""
+    return {'hours_per_period': 7.0, 'hours_per_day': 7.5, 'carryover_hours': 15.0}
+
+
+def test_accrual_dates():
+    """Test leave is credited on the 15th and month end, Sept to Aug"""
+    dates = accrual_dates(2023)
+    assert len(dates) == 24
+    assert dates[:2] == [date(2023, 9, 15), date(2023, 9, 30)]
+    assert date(2024, 2, 29) in dates
+    assert dates[-1] == date(2024, 8, 31)
+
+
+def test_accrued_hours(year_config):
+    """Test accrual builds from carryover to the full allowance"""
+    assert accrued_hours(2024, year_config, date(2024, 9, 1)) == 15.0
+    assert accrued_hours(2024, year_config, date(2024, 9, 15)) == 22.0
+    assert accrued_hours(2024, year_config, date(2024, 12, 25)) == 15.0 + 7 * 7.0
+    assert accrued_hours(2024, year_config, date(2025, 8, 31)) == 15.0 + 24 * 7.0
+
+
+def test_balance_curve_matches_projection(year_config):
+    """Test every day of the curve agrees with the single-date projection"""
+    entries = [('2024-12-25', 7.5), ('2025-04-18', 7.5), ('2025-04-21', 3.5), ('2023-12-25', 7.5)]
+    curve = balance_curve(2024, year_config, entries)
+
+    assert len(curve['dates']) == len(year_days(2024)) == 365
+    assert curve['dates'][0] == '2024-09-01' and curve['dates'][-1] == '2025-08-31'
+    for i, day in enumerate(year_days(2024)):
+        projection = project(2024, year_config, entries, day)
+        assert curve['balance'][i] == pytest.approx(projection['balance'])
+    assert curve['used'][-1] == 18.5
+
+
+def test_project_balance_with_booked_leave(tmp_path, year_config):
+    """Test future leave counts towards the year-end balance only"""
+    storage = SqliteStorage(tmp_path / 'leave.db')
+    tracker = LeaveTracker(storage=storage)
+    tracker.save_config({'years': {'2024': year_config}})
+    tracker.add_many([('2024-10-01',), ('2025-07-01',)])
+
+    projection = tracker.project_balance('2024-12-31')
+    assert projection['accrued_hours'] == 15.0 + 8 * 7.0
+    assert projection['used_hours'] == 7.5
+    assert projection['booked_hours'] == 7.5
+    assert projection['balance'] == 15.0 + 8 * 7.0 - 7.5
+    assert projection['year_end_balance'] == tracker.calculate_balance(2024)['current_balance']
+
+    with pytest.raises(ValueError):
+        tracker.project_balance('2030-01-01')
+    storage.close()
+
+
+def test_team_balance_curves(tmp_path, year_config):
+    """Test curves for everyone configured for the year"""
+    storage = SqliteStorage(tmp_path / 'leave.db')
+    for person, dates in [('alice', ['2024-12-25']), ('bob', [])]:
+        tracker = LeaveTracker(storage=storage.for_person(person))
+        tracker.save_config({'years': {'2024': year_config}})
+        tracker.add_many([(d,) for d in dates])
+
+    curves = LeaveTracker(storage=storage).team_balance_curves(2024)
+    assert sorted(curves) == ['alice', 'bob']
+    assert curves['alice']['balance'][-1] == 15.0 + 24 * 7.0 - 7.5
+    assert curves['bob']['balance'][-1] == 15.0 + 24 * 7.0
+    storage.close()
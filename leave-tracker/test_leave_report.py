@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+import csv
+import io
+import json
+from argparse import Namespace
+
+import pytest
+
+from leave_report import Pivot, build_report, records, write_csv, write_json
+from leave_storage import SqliteStorage
+from leave_tracker import LeaveTracker, LeaveTrackerCLI
+
+YEAR_CONFIG = {'hours_per_period': 7.0, 'hours_per_day': 7.5, 'carryover_hours': 0}
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    """Single-user tracker with leave in two leave years, one archived"""
+    tracker = LeaveTracker(tmp_path / 'config.json', tmp_path / 'data.json')
+    tracker.save_config({'years': {'2023': dict(YEAR_CONFIG), '2024': dict(YEAR_CONFIG)}})
+    tracker.add_many([('2023-12-27', None, None), ('2024-08-30', 3.5, None),
+                      ('2024-12-24', None, None), ('2024-12-27', 4, None), ('2025-01-02', None, None)])
+    tracker.archive_years(2024)
+    return tracker
+
+
+@pytest.fixture
+def team_storage(tmp_path):
+    """Shared database with three people in two teams"""
+    storage = SqliteStorage(tmp_path / 'leave.db')
+    for person, team, days in [('alice', 'ops', ['2024-12-23', '2024-12-24']),
+                               ('bob', 'ops', ['2024-12-24', '2025-01-06']),
+                               ('carol', 'dev', ['2025-01-06'])]:
+        tracker = LeaveTracker(storage=storage.for_person(person))
+        tracker.save_config({'years': {'2024': dict(YEAR_CONFIG)}})
+        tracker.set_team(team)
+        tracker.add_many([(day,) for day in days])
+    yield storage
+    storage.close()
+
+
+def test_person_by_month_across_archive(tracker):
+    """Test a single user's report reads open and archived years"""
+    lines = list(build_report(tracker, 'person', 'month').lines())
+    assert lines[0] == ['Person', '2023-12', '2024-08', '2024-12', '2025-01', 'Total']
+    assert lines[1] == ['-', 7.5, 3.5, 11.5, 7.5, 30.0]
+    assert lines[-1] == ['Total', 7.5, 3.5, 11.5, 7.5, 30.0]
+
+
+def test_date_range_skips_years(tracker):
+    """Test the range limits the entries, and years outside it are not read"""
+    pivot = build_report(tracker, 'month', None, '2024-09-01', '2024-12-31')
+    assert list(pivot.lines()) == [['Month', 'Hours'], ['2024-12', 11.5], ['Total', 11.5]]
+    assert tracker.storage._archives == {}
+    with pytest.raises(ValueError):
+        build_report(tracker, start='24/12/2024')
+
+
+def test_team_pivot_streams_from_sqlite(team_storage):
+    """Test team rows come from a cursor and sum by team and leave year"""
+    tracker = LeaveTracker(storage=team_storage)
+    rows = records(tracker, '2024-12-24', '2025-01-31')
+    assert not isinstance(rows, list)
+    assert next(rows) == ('alice', '2024-12-24', 7.5)
+
+    lines = list(build_report(tracker, 'team', 'person').lines())
+    assert lines == [['Team', 'alice', 'bob', 'carol', 'Total'],
+                     ['dev', 0.0, 0.0, 7.5, 7.5],
+                     ['ops', 15.0, 15.0, 0.0, 30.0],
+                     ['Total', 15.0, 15.0, 7.5, 37.5]]
+    assert list(build_report(tracker, 'year', 'team').lines())[1] == ['2024-2025', 7.5, 30.0, 37.5]
+
+
+def test_csv_and_json_output(team_storage):
+    """Test the pivot is written as CSV and JSON"""
+    pivot = build_report(LeaveTracker(storage=team_storage), 'team', None)
+    out = io.StringIO()
+    write_csv(pivot, out)
+    assert list(csv.reader(io.StringIO(out.getvalue()))) == [
+        ['Team', 'Hours'], ['dev', '7.50'], ['ops', '30.00'], ['Total', '37.50']]
+
+    out = io.StringIO()
+    write_json(pivot, out)
+    assert json.loads(out.getvalue())[-1] == {'Team': 'Total', 'Hours': 37.5}
+
+
+def test_pivot_rejects_same_rows_and_columns():
+    """Test a pivot needs two different dimensions"""
+    with pytest.raises(ValueError):
+        Pivot('month', 'month')
+    with pytest.raises(ValueError):
+        Pivot('week')
+
+
+def test_cli_report_command(tracker, capsys):
+    """Test the report command prints a table or CSV"""
+    cli = LeaveTrackerCLI(tracker)
+    cli.report_command(Namespace(rows='year', columns='none', start=None, end=None, format='csv'))
+    assert capsys.readouterr().out.splitlines() == ['Year,Hours', '2023-2024,11.00', '2024-2025,19.00',
+                                                    'Total,30.00']
+
+    cli.report_command(Namespace(rows='person', columns='month', start='2030-01-01', end=None, format='table'))
+    assert capsys.readouterr().out.strip() == "No leave entries in that range."
+
+    cli.report_command(Namespace(rows='year', columns='none', start=None, end=None, format='table'))
+    out = capsys.readouterr().out
+    assert 'Leave hours by year' in out
+    assert '2024-2025   19.00' in out and 'Total       30.00' in out
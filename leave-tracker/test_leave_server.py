@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+import asyncio
+import json
+
+import pytest
+
+from leave_server import LeaveServer
+from leave_storage import ConflictError, JsonStorage
+from leave_tracker import LeaveTracker
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    """Tracker on temporary files with the 2024 leave year set up"""
+    storage = JsonStorage(tmp_path / 'config.json', tmp_path / 'data.json')
+    storage.save_config({'years': {'2024': {'hours_per_period': 7.0, 'hours_per_day': 7.5,
+                                            'carryover_hours': 0}}})
+    return LeaveTracker(storage=storage)
+
+
+async def call(port, method, path, body=None):
+    """Send one request on a new connection, returning status and JSON"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    payload = json.dumps(body).encode() if body is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(payload)}\r\n"
+                 f"Connection: close\r\n\r\n".encode() + payload)
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(content)
+
+
+def run(tracker, scenario):
+    """Run a scenario against a server for the tracker on a free port"""
+    async def main():
+        server = LeaveServer(tracker)
+        listener = await server.start(port=0)
+        try:
+            return await scenario(listener.sockets[0].getsockname()[1])
+        finally:
+            listener.close()
+            await server.stop()
+    return asyncio.run(main())
+
+
+def test_add_list_and_remove(tracker):
+    """Test leave added over HTTP is listed, counted and removable"""
+    async def scenario(port):
+        status, added = await call(port, 'POST', '/leave', {'date': '2024-12-25', 'description': 'Christmas'})
+        assert status == 200 and added['hours'] == 7.5
+
+        status, entries = await call(port, 'GET', '/leave?year=2024')
+        assert status == 200 and [entry['date'] for entry in entries] == ['2024-12-25']
+        status, balance = await call(port, 'GET', '/balance?year=2024')
+        assert balance['used_hours'] == 7.5
+
+        status, removed = await call(port, 'DELETE', '/leave?date=2024-12-25')
+        assert status == 200 and removed['description'] == 'Christmas'
+        status, entries = await call(port, 'GET', '/leave?year=2024')
+        assert entries == []
+
+    run(tracker, scenario)
+    assert tracker.storage.inner.load_data()['2024'] == []
+
+
+def test_errors(tracker):
+    """Test bad requests get a JSON error with a matching status"""
+    async def scenario(port):
+        assert (await call(port, 'POST', '/leave', {'hours': 7.5}))[0] == 400
+        assert (await call(port, 'POST', '/leave', {'date': 'not a date'}))[0] == 400
+        assert (await call(port, 'POST', '/leave', {'date': '2030-01-01'}))[0] == 400
+        assert (await call(port, 'DELETE', '/leave?date=2024-12-25'))[0] == 404
+        assert (await call(port, 'PUT', '/leave'))[0] == 405
+        status, body = await call(port, 'GET', '/nowhere')
+        assert status == 404 and 'error' in body
+
+    run(tracker, scenario)
+
+
+def test_concurrent_writes_share_a_save(tracker):
+    """Test a burst of writes is applied in full and saved in one batch"""
+    saves = []
+    apply_changes = tracker.storage.apply_changes
+    tracker.storage.apply_changes = lambda *args: saves.append(1) or apply_changes(*args)
+
+    async def scenario(port):
+        days = [f"2024-10-{day:02d}" for day in range(1, 21)]
+        results = await asyncio.gather(*(call(port, 'POST', '/leave', {'date': day, 'hours': 1}) for day in days))
+        assert all(status == 200 for status, _ in results)
+        status, balance = await call(port, 'GET', '/balance?year=2024')
+        assert balance['used_hours'] == 20
+
+    run(tracker, scenario)
+    assert len(tracker.storage.inner.load_data()['2024']) == 20
+    assert len(saves) < 20
+
+
+def test_outside_changes_are_served(tracker):
+    """Test a cached response is replaced once the files change"""
+    outside = LeaveTracker(storage=JsonStorage(tracker.storage.config_path, tracker.storage.data_path))
+
+    async def scenario(port):
+        assert (await call(port, 'GET', '/leave?year=2024'))[1] == []
+        outside.add_leave('2024-12-25')
+        status, entries = await call(port, 'GET', '/leave?year=2024')
+        assert [entry['date'] for entry in entries] == ['2024-12-25']
+
+    run(tracker, scenario)
+
+
+def test_failed_save_is_a_server_error(tracker):
+    """Test a write whose save fails gets a 500 and the server carries on"""
+    def full_disk(*args):
+        raise OSError(28, 'No space left on device')
+    tracker.storage.apply_changes = full_disk
+
+    async def scenario(port):
+        status, body = await call(port, 'POST', '/leave', {'date': '2024-12-25'})
+        assert status == 500 and 'error' in body
+        assert (await call(port, 'GET', '/health'))[0] == 200
+
+    run(tracker, scenario)
+
+
+def test_conflict_is_409(tracker):
+    """Test a save that loses a race with another writer gets a 409"""
+    def conflict(*args):
+        raise ConflictError("Leave data was changed by another process. Try again.")
+    tracker.storage.apply_changes = conflict
+
+    async def scenario(port):
+        assert (await call(port, 'POST', '/leave', {'date': '2024-12-25'}))[0] == 409
+
+    run(tracker, scenario)
+
+
+def test_bad_payload_does_not_stop_the_writer(tracker):
+    """Test a payload of the wrong types gets a 400 and later writes still work"""
+    async def scenario(port):
+        assert (await call(port, 'POST', '/leave', {'date': 20241225}))[0] == 400
+        assert (await call(port, 'POST', '/leave', {'date': '2024-12-25', 'hours': [1]}))[0] == 400
+        assert (await call(port, 'POST', '/leave', {'date': '2024-12-25', 'description': 5}))[0] == 400
+        status, added = await call(port, 'POST', '/leave', {'date': '2024-12-25', 'hours': 3})
+        assert status == 200 and added['hours'] == 3
+
+    run(tracker, scenario)
+
+
+def test_unexpected_error_fails_only_its_own_write(tracker):
+    """Test an exception from one queued call leaves the writer running"""
+    add_leave = tracker.add_leave
+
+    def add_leave_once(*args):
+        tracker.add_leave = add_leave
+        raise TypeError("unexpected")
+    tracker.add_leave = add_leave_once
+
+    async def scenario(port):
+        assert (await call(port, 'POST', '/leave', {'date': '2024-12-24'}))[0] == 500
+        assert (await call(port, 'POST', '/leave', {'date': '2024-12-25'}))[0] == 200
+
+    run(tracker, scenario)
+
+
+def test_missing_setup_is_503(tmp_path):
+    """Test a tracker that has not been set up is reported as unavailable"""
+    tracker = LeaveTracker(storage=JsonStorage(tmp_path / 'config.json', tmp_path / 'data.json'))
+
+    async def scenario(port):
+        status, body = await call(port, 'GET', '/balance')
+        assert status == 503 and 'setup' in body['error']
+
+    run(tracker, scenario)
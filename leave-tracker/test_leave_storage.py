@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+import pytest
+import sqlite3
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+
+from leave_tracker import LeaveTracker
+from leave_storage import ConflictError, JournalStorage, JsonStorage, SqliteStorage, migrate_json
+
+
+@pytest.fixture
+def sqlite_storage(tmp_path):
+    """SQLite storage in a temporary directory"""
+    storage = SqliteStorage(tmp_path / 'leave.db')
+    yield storage
+    storage.close()
+
+
+@pytest.fixture
+def sample_config():
+    """Sample configuration data"""
+    return {
+        'years': {
+            '2024': {
+                'hours_per_period': 7.0,
+                'hours_per_day': 7.5,
+                'carryover_hours': 15.0
+            }
+        }
+    }
+
+
+def test_sqlite_uses_wal(sqlite_storage):
+    """Test the database runs in WAL mode"""
+    mode = sqlite_storage.connection.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == 'wal'
+
+
+def test_sqlite_reopen_keeps_only_current_indexes(tmp_path):
+    """Test reopening a database does not bring back the original indexes"""
+    for _ in range(3):
+        SqliteStorage(tmp_path / 'leave.db').close()
+    storage = SqliteStorage(tmp_path / 'leave.db')
+    indexes = [row[0] for row in storage.connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'entries' ORDER BY name")]
+    storage.close()
+    assert indexes == ['entries_date_person', 'entries_person_year_date']
+
+
+def test_sqlite_config_round_trip(sqlite_storage, sample_config):
+    """Test config is saved and loaded"""
+    with pytest.raises(FileNotFoundError):
+        sqlite_storage.load_config()
+
+    sqlite_storage.save_config(sample_config)
+    assert sqlite_storage.load_config() == sample_config
+
+
+def test_sqlite_add_and_remove_entries(sqlite_storage):
+    """Test single-entry writes and date ordering"""
+    sqlite_storage.add_entry(2024, {'date': '2024-12-26', 'hours': 7.5, 'description': 'Boxing Day'})
+    sqlite_storage.add_entry(2024, {'date': '2024-12-25', 'hours': 7.5, 'description': 'Christmas Day'})
+    sqlite_storage.add_entry(2023, {'date': '2024-08-01', 'hours': 3.5, 'description': 'Summer'})
+
+    data = sqlite_storage.load_data()
+    assert [e['date'] for e in data['2024']] == ['2024-12-25', '2024-12-26']
+    assert data['2023'] == [{'date': '2024-08-01', 'hours': 3.5, 'description': 'Summer'}]
+
+    removed = sqlite_storage.remove_entry(2024, '2024-12-25')
+    assert removed == {'date': '2024-12-25', 'hours': 7.5, 'description': 'Christmas Day'}
+    assert sqlite_storage.remove_entry(2024, '2024-12-25') is None
+    assert len(sqlite_storage.load_data()['2024']) == 1
+
+
+def test_sqlite_failed_transaction_rolls_back(sqlite_storage):
+    """Test a failed write leaves the data as it was"""
+    sqlite_storage.add_entry(2024, {'date': '2024-12-25', 'hours': 7.5, 'description': 'Christmas Day'})
+
+    with pytest.raises(KeyError):
+        sqlite_storage.save_data({'2024': [{'date': '2024-12-26'}]})
+
+    assert len(sqlite_storage.load_data()['2024']) == 1
+
+
+def test_tracker_on_sqlite(sqlite_storage, sample_config):
+    """Test the tracker works the same on SQLite"""
+    tracker = LeaveTracker(storage=sqlite_storage)
+    tracker.save_config(sample_config)
+
+    tracker.add_leave('2024-12-25', 7.5, 'Christmas Day')
+    tracker.add_leave('2024-12-24')
+
+    assert [e['date'] for e in tracker.list_leave(2024)] == ['2024-12-24', '2024-12-25']
+    assert tracker.calculate_balance(2024)['used_hours'] == 15.0
+    assert tracker.remove_leave('2024-12-24')['description'] == '24th Dec 2024'
+
+
+def test_migrate_json(tmp_path, sqlite_storage):
+    """Test JSON files, including a legacy config, are copied into SQLite"""
+    json_storage = JsonStorage(tmp_path / 'config.json', tmp_path / 'data.json')
+    json_storage.save_config({'hours_per_period': 7.0, 'hours_per_day': 7.5, 'carryover_hours': 0})
+    json_storage.save_data({'2024': [{'date': '2024-12-25', 'hours': 7.5, 'description': 'Christmas Day'}]})
+    source = LeaveTracker(storage=json_storage)
+
+    with patch('leave_tracker.date') as mock_date:
+        mock_date.today.return_value = date(2024, 10, 1)
+        count = migrate_json(source, sqlite_storage)
+
+    assert count == 1
+    assert sqlite_storage.load_config()['years']['2024']['hours_per_day'] == 7.5
+    assert sqlite_storage.load_data() == json_storage.load_data()
+
+    # A second migration would duplicate entries, so it is refused
+    with pytest.raises(ValueError):
+        migrate_json(source, sqlite_storage)
+
+
+@pytest.fixture
+def json_tracker(tmp_path, sample_config):
+    """Tracker on JSON files in a temporary directory"""
+    storage = JsonStorage(tmp_path / 'config.json', tmp_path / 'data.json')
+    storage.save_config(sample_config)
+    return LeaveTracker(storage=storage)
+
+
+def test_session_loads_and_saves_once(json_tracker):
+    """Test a batch of calls reads each file once and writes once"""
+    storage = json_tracker.storage
+    with patch.object(storage, 'load_data', wraps=storage.load_data) as load_data, \
+            patch.object(storage, 'load_config', wraps=storage.load_config) as load_config, \
+            patch.object(storage, 'save_data', wraps=storage.save_data) as save_data:
+        with json_tracker.session():
+            for day in range(1, 21):
+                json_tracker.add_leave(f'2024-11-{day:02d}')
+            json_tracker.remove_leave('2024-11-05')
+            balance = json_tracker.calculate_balance(2024)
+            assert not storage.data_path.exists()
+
+    assert load_data.call_count == 1
+    assert load_config.call_count == 1
+    assert save_data.call_count == 1
+    assert balance['used_hours'] == 19 * 7.5
+    assert len(storage.load_data()['2024']) == 19
+
+
+def test_session_discards_changes_on_error(json_tracker):
+    """Test nothing is written if the block raises"""
+    with pytest.raises(ValueError):
+        with json_tracker.session():
+            json_tracker.add_leave('2024-11-01')
+            json_tracker.add_leave('2030-11-01')
+
+    assert json_tracker.list_leave(2024) == []
+    assert isinstance(json_tracker.storage, JsonStorage)
+
+
+def test_session_picks_up_changes_on_disk(json_tracker):
+    """Test the cache is dropped when the file changes underneath it"""
+    other = JsonStorage(json_tracker.storage.config_path, json_tracker.storage.data_path)
+
+    with json_tracker.session():
+        assert json_tracker.list_leave(2024) == []
+        other.save_data({'2024': [{'date': '2024-12-25', 'hours': 7.5, 'description': 'Christmas Day'}]})
+        assert len(json_tracker.list_leave(2024)) == 1
+
+
+def test_session_on_sqlite(sqlite_storage, sample_config):
+    """Test a session flushes to SQLite"""
+    tracker = LeaveTracker(storage=sqlite_storage)
+    tracker.save_config(sample_config)
+
+    with tracker.session():
+        tracker.add_leave('2024-12-25')
+        tracker.add_leave('2024-12-24')
+
+    assert [e['date'] for e in sqlite_storage.load_data()['2024']] == ['2024-12-24', '2024-12-25']
+
+
+def test_add_many_writes_once(json_tracker):
+    """Test bulk entries are validated, sorted and saved in one write"""
+    storage = json_tracker.storage
+    with patch.object(storage, 'save_data', wraps=storage.save_data) as save_data:
+        added = json_tracker.add_many([
+            ('2024-12-26', '3.5', 'Boxing Day'),
+            ('2024-12-25',),
+            ('2024-09-02', None, 'Back to school'),
+        ])
+
+    assert save_data.call_count == 1
+    assert len(added) == 3
+    assert added[1] == {'date': '2024-12-25', 'hours': 7.5, 'description': '25th Dec 2024'}
+    assert [e['date'] for e in json_tracker.list_leave(2024)] == ['2024-09-02', '2024-12-25', '2024-12-26']
+
+
+def test_add_many_rejects_all_on_error(json_tracker):
+    """Test one bad row stops the whole import"""
+    with pytest.raises(ValueError) as e:
+        json_tracker.add_many([
+            ('2024-12-25',),
+            ('2031-01-01',),
+            ('not a date',),
+            ('2024-12-27', 'lots'),
+        ])
+
+    message = str(e.value)
+    assert 'Row 2' in message and 'Row 3' in message and 'Row 4' in message
+    assert 'Row 1' not in message
+    assert json_tracker.list_leave(2024) == []
+
+
+def test_add_many_on_sqlite(sqlite_storage, sample_config):
+    """Test bulk entries go into SQLite in date order"""
+    tracker = LeaveTracker(storage=sqlite_storage)
+    tracker.save_config(sample_config)
+    tracker.add_leave('2024-12-25')
+    tracker.add_many([('2024-12-27',), ('2024-12-24',)])
+
+    assert [e['date'] for e in tracker.list_leave(2024)] == ['2024-12-24', '2024-12-25', '2024-12-27']
+
+
+def test_sqlite_upgrades_single_user_database(tmp_path):
+    """Test a database from before team mode keeps its data"""
+    path = tmp_path / 'old.db'
+    db = sqlite3.connect(str(path))
+    db.executescript(SqliteStorage.SCHEMA)
+    db.execute("INSERT INTO config (id, value) VALUES (1, '{\"years\": {}}')")
+    db.execute("INSERT INTO entries (year, date, hours, description) VALUES (2024, '2024-12-25', 7.5, 'Christmas Day')")
+    db.commit()
+    db.close()
+
+    storage = SqliteStorage(path)
+    assert storage.connection.execute("PRAGMA user_version").fetchone()[0] == len(SqliteStorage.MIGRATIONS)
+    assert storage.load_config() == {'years': {}}
+    assert storage.load_data() == {'2024': [{'date': '2024-12-25', 'hours': 7.5, 'description': 'Christmas Day'}]}
+    storage.close()
+
+
+def test_sqlite_partitions_by_person(sqlite_storage, sample_config):
+    """Test each person only sees their own config and entries"""
+    alice = LeaveTracker(storage=sqlite_storage.for_person('alice'))
+    bob = LeaveTracker(storage=sqlite_storage.for_person('bob'))
+    alice.save_config(sample_config)
+
+    alice.add_leave('2024-12-25')
+    with pytest.raises(FileNotFoundError):
+        bob.add_leave('2024-12-25')
+
+    bob.save_config(sample_config)
+    bob.add_many([('2024-12-24',), ('2024-12-25',)])
+    bob.remove_leave('2024-12-24')
+
+    assert len(alice.list_leave(2024)) == 1
+    assert len(bob.list_leave(2024)) == 1
+    assert alice.remove_leave('2024-12-24') is None
+    assert sqlite_storage.people() == ['alice', 'bob']
+
+
+def test_team_queries(sqlite_storage, sample_config):
+    """Test who is off and daily coverage across the team"""
+    for person, dates in [('alice', ['2024-12-24', '2024-12-25']), ('bob', ['2024-12-25']), ('carol', [])]:
+        tracker = LeaveTracker(storage=sqlite_storage.for_person(person))
+        tracker.save_config(sample_config)
+        tracker.add_many([(d,) for d in dates])
+
+    tracker = LeaveTracker(storage=sqlite_storage)
+    assert [e['person'] for e in tracker.who_is_off('2024-12-25')] == ['alice', 'bob']
+    assert tracker.who_is_off('2024-12-26') == []
+    assert tracker.coverage('2024-12-24', '2024-12-26') == [
+        {'date': '2024-12-24', 'off': ['alice'], 'available': 2},
+        {'date': '2024-12-25', 'off': ['alice', 'bob'], 'available': 1},
+        {'date': '2024-12-26', 'off': [], 'available': 3},
+    ]
+
+    # Coverage is answered from the (date, person) index alone
+    plan = sqlite_storage.connection.execute(
+        "EXPLAIN QUERY PLAN SELECT DISTINCT date, person FROM entries WHERE date BETWEEN ? AND ?",
+        ('2024-12-24', '2024-12-26')).fetchall()
+    assert any('COVERING INDEX entries_date_person' in row[-1] for row in plan)
+
+
+def test_team_queries_need_sqlite(json_tracker):
+    """Test team queries explain they need a database"""
+    with pytest.raises(ValueError):
+        json_tracker.who_is_off('2024-12-25')
+
+
+def test_sqlite_totals_follow_every_write(sqlite_storage, sample_config):
+    """Test used-hours totals stay right through add, remove, import and replace"""
+    tracker = LeaveTracker(storage=sqlite_storage)
+    tracker.save_config(sample_config)
+
+    tracker.add_leave('2024-12-25')
+    tracker.add_many([('2024-12-26', 3.5), ('2024-12-27',)])
+    tracker.remove_leave('2024-12-25')
+    assert sqlite_storage.used_hours(2024) == 11.0
+
+    sqlite_storage.save_data({'2024': [{'date': '2024-12-24', 'hours': 2.0, 'description': 'Half day'}]})
+    assert sqlite_storage.used_hours(2024) == 2.0
+    assert sqlite_storage.used_hours(2023) == 0
+    assert tracker.verify_totals() == []
+
+    # The balance comes from the total without reading any entries
+    with patch.object(sqlite_storage, 'load_data', side_effect=AssertionError):
+        assert tracker.calculate_balance(2024)['used_hours'] == 2.0
+
+
+def test_verify_totals_reports_drift(sqlite_storage, sample_config):
+    """Test verify mode catches a total that disagrees with the entries"""
+    tracker = LeaveTracker(storage=sqlite_storage)
+    tracker.save_config(sample_config)
+    tracker.add_leave('2024-12-25')
+    sqlite_storage.connection.execute("UPDATE totals SET hours = 1")
+
+    assert tracker.verify_totals() == [{'year': 2024, 'stored': 1.0, 'recounted': 7.5}]
+
+
+def test_session_keeps_running_totals(json_tracker):
+    """Test a session's totals track changes without recounting"""
+    with json_tracker.session():
+        json_tracker.add_leave('2024-12-25')
+        assert json_tracker.calculate_balance(2024)['used_hours'] == 7.5
+
+        with patch('leave_storage.year_totals', side_effect=AssertionError):
+            json_tracker.add_many([('2024-12-26', 3.5)])
+            json_tracker.remove_leave('2024-12-25')
+            assert json_tracker.calculate_balance(2024)['used_hours'] == 3.5
+        assert json_tracker.verify_totals() == []
+
+
+def test_team_balances(sqlite_storage, sample_config):
+    """Test everyone's balance comes from the totals table"""
+    for person, hours in [('alice', 7.5), ('bob', 3.5)]:
+        tracker = LeaveTracker(storage=sqlite_storage.for_person(person))
+        tracker.save_config(sample_config)
+        tracker.add_leave('2024-12-25', hours)
+
+    balances = LeaveTracker(storage=sqlite_storage).team_balances(2024)
+    assert [(b['person'], b['used_hours'], b['current_balance']) for b in balances] == [
+        ('alice', 7.5, 175.5),
+        ('bob', 3.5, 179.5),
+    ]
+
+
+def test_save_data_is_atomic(tmp_path):
+    """Test a failed write leaves the old file whole and no temp files"""
+    storage = JsonStorage(tmp_path / 'config.json', tmp_path / 'data.json')
+    storage.save_data({'2024': [{'date': '2024-12-25', 'hours': 7.5, 'description': 'Christmas Day'}]})
+
+    with patch('leave_storage.json.dump', side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            storage.save_data({})
+
+    assert len(storage.load_data()['2024']) == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['data.json', 'data.json.lock']
+
+
+def test_save_data_detects_conflicts(tmp_path):
+    """Test saving over a file someone else changed is refused"""
+    mine = JsonStorage(tmp_path / 'config.json', tmp_path / 'data.json')
+    theirs = JsonStorage(tmp_path / 'config.json', tmp_path / 'data.json')
+
+    data = mine.load_data()
+    theirs.add_entry(2024, {'date': '2024-12-25', 'hours': 7.5, 'description': 'Christmas Day'})
+    with pytest.raises(ConflictError):
+        mine.save_data(data)
+
+    # Single-entry changes reload under the lock, so they still work
+    mine.add_entry(2024, {'date': '2024-12-26', 'hours': 7.5, 'description': 'Boxing Day'})
+    assert len(theirs.load_data()['2024']) == 2
+
+
+def test_session_replays_changes_after_conflict(json_tracker):
+    """Test a session's adds and removes land on top of another writer's"""
+    other = JsonStorage(json_tracker.storage.config_path, json_tracker.storage.data_path)
+    other.add_entry(2024, {'date': '2024-12-24', 'hours': 7.5, 'description': 'Christmas Eve'})
+
+    with json_tracker.session():
+        json_tracker.add_leave('2024-12-25')
+        json_tracker.remove_leave('2024-12-24')
+        other.add_entry(2024, {'date': '2024-12-31', 'hours': 7.5, 'description': 'New Year'})
+
+    assert [e['date'] for e in other.load_data()['2024']] == ['2024-12-25', '2024-12-31']
+
+
+STRESS_WORKER = """
+import sys
+from pathlib import Path
+from leave_tracker import LeaveTracker
+
+home, worker, mode, adds = Path(sys.argv[1]), int(sys.argv[2]), sys.argv[3], int(sys.argv[4])
+tracker = LeaveTracker(home / 'config.json', home / 'data.json')
+days = [f"2024-{10 + worker % 3}-{day + 1:02d}" for day in range(adds)]
+
+if mode == 'batch':
+    for start in range(0, adds, 5):
+        with tracker.session():
+            for day in days[start:start + 5]:
+                tracker.add_leave(day, 1.0, f"worker {worker}")
+else:
+    for day in days:
+        if mode == 'session':
+            with tracker.session():
+                tracker.add_leave(day, 1.0, f"worker {worker}")
+        else:
+            tracker.add_leave(day, 1.0, f"worker {worker}")
+"""
+
+
+def test_concurrent_adds_lose_nothing(tmp_path, sample_config):
+    """Test many processes adding at once all get their entries saved"""
+    JsonStorage(tmp_path / 'config.json', tmp_path / 'data.json').save_config(sample_config)
+    workers, adds = 9, 20
+
+    processes = [
+        subprocess.Popen([sys.executable, '-c', STRESS_WORKER, str(tmp_path), str(worker),
+                          ['direct', 'session', 'batch'][worker % 3], str(adds)],
+                         cwd=Path(__file__).parent)
+        for worker in range(workers)
+    ]
+    assert all(process.wait(timeout=120) == 0 for process in processes)
+
+    entries = JsonStorage(tmp_path / 'config.json', tmp_path / 'data.json').load_data()['2024']
+    assert len(entries) == workers * adds
+    for worker in range(workers):
+        assert sum(1 for e in entries if e['description'] == f"worker {worker}") == adds
+
+
+@pytest.fixture
+def journal(tmp_path, sample_config):
+    """Journal storage with config in a temporary directory"""
+    storage = JournalStorage(tmp_path / 'config.json', tmp_path / 'journal')
+    storage.save_config(sample_config)
+    return storage
+
+
+def test_journal_appends_and_replays(journal):
+    """Test adds and removes are appended as events and replayed on load"""
+    tracker = LeaveTracker(storage=journal)
+
+    # Adding appends without reading the existing history
+    with patch.object(journal, 'load_data', side_effect=AssertionError):
+        tracker.add_leave('2024-12-26')
+        tracker.add_many([('2024-12-25',), ('2024-12-27',)])
+    tracker.remove_leave('2024-12-27')
+
+    assert [e['date'] for e in tracker.list_leave(2024)] == ['2024-12-25', '2024-12-26']
+    assert [(event['op'], event['year']) for event in journal.history()] == [
+        ('add', 2024), ('add', 2024), ('remove', 2024)]
+    assert all(line.endswith('}') for line in
+               (journal.journal_dir / 'segment-000001.jsonl').read_text().splitlines())
+
+
+def test_journal_compaction_keeps_history(journal):
+    """Test compaction snapshots state and rotates to a new segment"""
+    journal.compact_bytes = 300
+    tracker = LeaveTracker(storage=journal)
+    for day in range(1, 11):
+        tracker.add_leave(f'2024-11-{day:02d}')
+    tracker.remove_leave('2024-11-01')
+
+    segments = sorted(p.name for p in journal.journal_dir.glob('segment-*.jsonl'))
+    assert len(segments) > 1
+    assert (journal.journal_dir / 'snapshot.json').exists()
+    assert len(tracker.list_leave(2024)) == 9
+    assert len(list(journal.history())) == 11
+
+    # A fresh instance rebuilds the same state from the snapshot and tail
+    fresh = JournalStorage(journal.config_path, journal.journal_dir)
+    assert fresh.load_data() == journal.load_data()
+
+
+def test_journal_ignores_partial_last_line(journal):
+    """Test a crash mid-append does not break loading"""
+    journal.add_entry(2024, {'date': '2024-12-25', 'hours': 7.5, 'description': 'Christmas Day'})
+    with open(journal.journal_dir / 'segment-000001.jsonl', 'a') as f:
+        f.write('{"at": "2024-12-01T00:00:00", "op": "add", "ye')
+
+    assert len(journal.load_data()['2024']) == 1
+
+    # The next change is appended after the last complete line
+    journal.add_entry(2024, {'date': '2024-12-26', 'hours': 7.5, 'description': 'Boxing Day'})
+    assert [e['date'] for e in journal.load_data()['2024']] == ['2024-12-25', '2024-12-26']
+    assert len(list(journal.history())) == 2
+
+
+def test_journal_session_appends_once(journal):
+    """Test a session's changes are appended together at the end"""
+    tracker = LeaveTracker(storage=journal)
+    with patch.object(journal, 'apply_changes', wraps=journal.apply_changes) as apply_changes:
+        with tracker.session():
+            tracker.add_leave('2024-12-24')
+            tracker.add_leave('2024-12-25')
+            tracker.remove_leave('2024-12-24')
+
+    assert apply_changes.call_count == 1
+    assert [e['date'] for e in journal.load_data()['2024']] == ['2024-12-25']
+
+
+def test_migrate_json_to_journal(tmp_path, journal):
+    """Test JSON data is copied into a new journal"""
+    json_storage = JsonStorage(journal.config_path, tmp_path / 'data.json')
+    json_storage.save_data({'2024': [{'date': '2024-12-25', 'hours': 7.5, 'description': 'Christmas Day'}]})
+
+    assert migrate_json(json_storage, journal) == 1
+    assert journal.load_data() == json_storage.load_data()
+    with pytest.raises(ValueError):
+        migrate_json(json_storage, journal)
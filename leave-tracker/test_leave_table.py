@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+from leave_table import box_lines, write_chunks
+
+
+class Cell:
+    """A value that counts how often it is formatted"""
+
+    def __init__(self, text):
+        self.text = text
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return self.text
+
+
+def test_list_rows_are_sized_exactly():
+    """Test a list of rows gives the usual box, sized to every cell"""
+    lines = list(box_lines("Leave", ["Date", "Hours"], [["2024-12-25", "7.50h"]], [["Total", "7.50h"]]))
+    rule = "═" * 24
+    assert lines == ["\n╔" + rule + "╗",
+                     "║" + "Leave".center(24) + "║",
+                     "╠" + rule + "╣",
+                     "║   Date         Hours   ║",
+                     "╠" + rule + "╣",
+                     "║   2024-12-25   7.50h   ║",
+                     "╠" + rule + "╣",
+                     "║   Total        7.50h   ║",
+                     "╚" + rule + "╝"]
+
+
+def test_cells_are_formatted_once():
+    """Test each cell is turned into a string only once"""
+    cells = [[Cell('a'), Cell('bb')], [Cell('ccc'), Cell('d')]]
+    list(box_lines("T", ["X", "Y"], cells))
+    list(box_lines("T", ["X", "Y"], iter([[Cell('a')] for _ in range(5)]), sample=2))
+    assert all(cell.formatted == 1 for row in cells for cell in row)
+
+
+def test_stream_is_sized_from_a_sample():
+    """Test a generator is sized from its first rows and wider cells are cut"""
+    rows = iter([["ab", "1"], ["abcdef", "2"]])
+    lines = list(box_lines("T", ["Name", "N"], rows, sample=1))
+    assert lines[-2] == "║   abc…   2   ║"
+    assert len({len(line) for line in lines[1:]}) == 1
+
+
+def test_fixed_widths_read_rows_lazily():
+    """Test fixed widths print the first rows before the rest are read"""
+    read = []
+
+    def rows():
+        for i in range(1000):
+            read.append(i)
+            yield [i, 'x' * 20]
+
+    written = []
+    lines = box_lines("T", ["N", "Text"], rows(), widths=[4, 5])
+    write_chunks(lines, lambda chunk: written.append((chunk, len(read))), chunk_lines=100)
+
+    assert len(written) == 11
+    assert written[0][1] < 100
+    assert "║   0      xxxx…   ║" in written[0][0]
+
+
+def test_page_size_repeats_headers():
+    """Test the headers come back every page of rows"""
+    lines = list(box_lines("T", ["N"], [[i] for i in range(7)], page_size=3))
+    assert lines.count("║   N   ║") == 3
+
+
+def test_box_fits_a_long_title():
+    """Test the box is widened so a long title stays inside the borders"""
+    lines = list(box_lines("Leave hours by person and month", ["Month", "Hours"], [["2024-12", "7.50"]]))
+    assert len({len(line) for line in lines[1:]}) == 1
+    assert lines[1] == "║   Leave hours by person and month   ║"
@@ -263,6 +263,40 @@ def test_calculate_balance_missing_config(tracker):
         tracker.calculate_balance(2024)
 
 
+def test_add_leave_keeps_entries_sorted(tracker, sample_config):
+    """Test entries are stored in date order as they are added"""
+    tracker.save_config(sample_config)
+
+    for leave_date in ['2025-03-01', '2024-10-01', '2025-01-15']:
+        tracker.add_leave(leave_date)
+
+    dates = [entry['date'] for entry in tracker.load_data()['2024']]
+    assert dates == ['2024-10-01', '2025-01-15', '2025-03-01']
+
+
+def test_load_data_sorts_legacy_files(tracker, sample_data):
+    """Test unsorted data from older versions is put in date order"""
+    sample_data['2024'].reverse()
+    tracker.save_data(sample_data)
+
+    assert [e['date'] for e in tracker.list_leave(2024)] == ['2024-12-25', '2024-12-26']
+    assert tracker.remove_leave('2024-12-25')['description'] == 'Christmas Day'
+
+
+def test_list_leave_between_spans_leave_years(tracker):
+    """Test a date window can cross the September leave year boundary"""
+    tracker.save_data({
+        '2023': [{'date': '2024-08-30', 'hours': 7.5, 'description': 'A'}],
+        '2024': [
+            {'date': '2024-09-02', 'hours': 7.5, 'description': 'B'},
+            {'date': '2024-12-25', 'hours': 7.5, 'description': 'C'},
+        ],
+    })
+
+    entries = tracker.list_leave_between('2024-08-01', '2024-09-30')
+    assert [e['description'] for e in entries] == ['A', 'B']
+
+
 # Test CLI class with mocked tracker
 @pytest.fixture
 def mock_tracker():
@@ -377,3 +411,47 @@ def test_cli_balance_command(cli, mock_tracker):
     calls = [call[0][0] for call in mock_print.call_args_list if isinstance(call[0][0], str)]
     days_used_output = any('Days used' in call for call in calls)
     assert days_used_output, "Output should include 'Days used' information"
+
+
+def test_cli_import_command(cli, mock_tracker, tmp_path):
+    """Test CLI import_command"""
+    # Setup mock
+    mock_tracker.add_many.side_effect = lambda rows: list(rows)
+    path = tmp_path / 'leave.csv'
+    path.write_text("date,hours,description\n2024-12-25,7.5,Christmas Day\n2024-12-26,,\n")
+
+    # Create args object
+    args = MagicMock()
+    args.file = str(path)
+
+    # Call command
+    with patch('builtins.print') as mock_print:
+        cli.import_command(args)
+
+    # Verify tracker was called correctly
+    mock_tracker.add_many.assert_called_once()
+    mock_print.assert_called_once_with(f"Imported 2 leave entries from {path}")
+
+
+def test_cli_book_command(cli, mock_tracker):
+    """Test CLI book_command"""
+    # Setup mock
+    mock_tracker.add_leave_range.return_value = [
+        {'date': '2024-12-23', 'hours': 7.5, 'description': 'Christmas'},
+        {'date': '2024-12-24', 'hours': 7.5, 'description': 'Christmas'}
+    ]
+
+    # Create args object
+    args = MagicMock()
+    args.start = '2024-12-23'
+    args.end = '2024-12-24'
+    args.hours = None
+    args.description = 'Christmas'
+
+    # Call command
+    with patch('builtins.print') as mock_print:
+        cli.book_command(args)
+
+    # Verify tracker was called correctly
+    mock_tracker.add_leave_range.assert_called_once_with('2024-12-23', '2024-12-24', None, 'Christmas')
+    mock_print.assert_called_once_with("Added 15.00h leave over 2 working days from 2024-12-23 to 2024-12-24")
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for terminal-viz parsing and rendering.
+
+Generates synthetic CSV and SQL table files, times each stage end to end
+and writes the results as JSON so runs can be compared across releases.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import viz
+
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+def generate_csv(path, rows, seed=0):
+    """Write a date,count CSV file with `rows` rows."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    with open(path, 'w') as file:
+        file.write("date,count\n")
+        for i in range(rows):
+            moment = start + timedelta(minutes=i)
+            file.write(f"{moment:%Y-%m-%d %H:%M:%S},{rng.randint(0, 2000)}\n")
+
+
+def generate_sql_table(path, rows, seed=0):
+    """Write psql-style table output with `rows` rows."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    with open(path, 'w') as file:
+        file.write("          h          | count \n")
+        file.write("---------------------+-------\n")
+        for i in range(rows):
+            moment = start + timedelta(minutes=i)
+            file.write(f" {moment:%Y-%m-%d %H:%M:%S} | {rng.randint(0, 2000):>5}\n")
+        file.write(f"({rows} rows)\n")
+
+
+def run_parse_data_file(path):
+    return viz.parse_data_file(path)
+
+
+def run_parse_csv_format(path):
+    with open(path) as file:
+        return viz.parse_csv_format(file)
+
+
+def run_parse_sql_table_format(path):
+    with open(path) as file:
+        return viz.parse_sql_table_format(file)
+
+
+def run_create_line_graph(path):
+    data, labels = viz.parse_data_file(path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        viz.create_line_graph(data, labels, "Benchmark")
+    return data, labels
+
+
+# name: (function, file format it reads)
+BENCHMARKS = {
+    'parse_data_file[csv]': (run_parse_data_file, 'csv'),
+    'parse_data_file[sql]': (run_parse_data_file, 'sql'),
+    'parse_csv_format': (run_parse_csv_format, 'csv'),
+    'parse_sql_table_format': (run_parse_sql_table_format, 'sql'),
+    'create_line_graph': (run_create_line_graph, 'csv'),
+}
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KB
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def measure(name, path, rows, repeat):
+    """Time one benchmark and report the best of `repeat` runs.
+
+    Called in a fresh worker process so peak RSS is not polluted by earlier
+    benchmarks.
+    """
+    function, _ = BENCHMARKS[name]
+    timings = []
+
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function(path)
+            timings.append(time.perf_counter() - start)
+    except Exception as e:
+        return {'name': name, 'rows': rows, 'error': f"{type(e).__name__}: {e}"}
+
+    best = min(timings)
+    return {
+        'name': name,
+        'rows': rows,
+        'seconds': best,
+        'rows_per_sec': rows / best if best else None,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def run_benchmarks(sizes, repeat=3, seed=0, names=None):
+    """Run every benchmark at every size and return the result records."""
+    names = names or list(BENCHMARKS)
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in sizes:
+            files = {
+                'csv': Path(tmp_dir) / f"data-{rows}.csv",
+                'sql': Path(tmp_dir) / f"data-{rows}.txt",
+            }
+            generate_csv(files['csv'], rows, seed)
+            generate_sql_table(files['sql'], rows, seed)
+
+            for name in names:
+                _, file_format = BENCHMARKS[name]
+                # A new process per benchmark keeps peak RSS figures separate
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    result = pool.submit(measure, name, str(files[file_format]), rows, repeat).result()
+                results.append(result)
+                print(format_result(result))
+
+    return results
+
+
+def format_result(result, baseline=None):
+    """One line summary of a result, with the change against a baseline."""
+    if 'error' in result:
+        return f"{result['name']:<24} {result['rows']:>9} rows  {result['error']}"
+
+    line = (f"{result['name']:<24} {result['rows']:>9} rows  "
+            f"{result['seconds'] * 1000:>9.1f} ms  "
+            f"{result['rows_per_sec']:>12,.0f} rows/s  "
+            f"{result['peak_rss_kb'] / 1024:>7.1f} MB")
+    if baseline and baseline.get('seconds'):
+        change = result['seconds'] / baseline['seconds'] - 1
+        line += f"  {change:+.0%} vs baseline"
+    return line
+
+
+def compare(results, baseline_path):
+    """Print each result against the matching run in a saved results file."""
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    previous = {(r['name'], r['rows']): r for r in baseline['results']}
+
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        print(format_result(result, previous.get((result['name'], result['rows']))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark terminal-viz parsing and rendering.')
+    parser.add_argument('--sizes', type=viz.parse_columns, default=DEFAULT_SIZES,
+                        help='Comma-separated row counts (default: 1000,10000,100000)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per benchmark; the best is kept (default: 3)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic data')
+    parser.add_argument('--only', action='append', choices=BENCHMARKS,
+                        help='Run just this benchmark (can be repeated)')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Compare with a previous JSON results file')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.repeat, args.seed, args.only)
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+    if args.output:
+        report = {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'results': results,
+        }
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,19 @@
 Tests for the visualization tool using pytest.
 """
 
+import io
+import os
+import pickle
+import sqlite3
+import subprocess
+import sys
 import tempfile
 from pathlib import Path
 import pytest
-from viz import parse_data_file
+from viz import (parse_data_file, read_appended, diff_frame, render_frame,
+                 aggregate_rows, load_series, series_names, align_series, parse_lines,
+                 cursor_rows, query_sqlite, sniff_format, fast_rows, scan_csv_mmap,
+                 cache_path, read_cache, follow_file)
 
 
 def test_parse_csv_with_header():
@@ -117,3 +126,478 @@ def test_sql_parsing_with_fixture(sample_sql_data):
         assert all('08:00' in labels[0] or '09:00' in labels[1] or '10:00' in labels[2] for _ in range(1))
     finally:
         Path(tmp_path).unlink(missing_ok=True)
+
+
+def test_read_appended_only_returns_new_lines():
+    """Test follow mode reads appended bytes and holds back partial lines."""
+    with tempfile.NamedTemporaryFile(mode='wb', suffix='.csv', delete=False) as tmp:
+        tmp.write(b"date,count\n2024-01-01,100\n2024-01")
+        tmp_path = tmp.name
+
+    try:
+        with open(tmp_path, 'rb') as file:
+            lines, pending = read_appended(file)
+            assert lines == ['date,count', '2024-01-01,100']
+            assert pending == b'2024-01'
+
+            with open(tmp_path, 'ab') as writer:
+                writer.write(b"-02,200\n")
+
+            lines, pending = read_appended(file, pending)
+            assert lines == ['2024-01-02,200']
+            assert pending == b''
+
+            assert read_appended(file, pending) == ([], b'')
+    finally:
+        Path(tmp_path).unlink(missing_ok=True)
+
+
+def test_follow_file_uses_sniffed_format(tmp_path, monkeypatch):
+    """Test follow mode buckets non-ISO timestamps and reads the given column."""
+    data_file = tmp_path / 'live.csv'
+    data_file.write_text("time,errors,requests\n"
+                         "01/07/2025 10:05,1,100\n01/07/2025 10:40,2,300\n01/07/2025 11:10,4,500\n")
+
+    def stop(_):
+        raise KeyboardInterrupt
+    monkeypatch.setattr('viz.time.sleep', stop)
+    out = io.StringIO()
+    with pytest.raises(KeyboardInterrupt):
+        follow_file(data_file, out=out, bucket='hour', column=2)
+
+    output = out.getvalue()
+    assert '07-01 10:00' in output and '07-01 11:00' in output
+    assert '400' in output and '500' in output
+    assert '10:05' not in output
+
+    with pytest.raises(ValueError):
+        follow_file(data_file, fps=0)
+
+
+def test_diff_frame_only_redraws_changed_lines():
+    """Test incremental redraw touches only changed rows."""
+    previous = render_frame([100.0, 200.0], ['a', 'b'], 'Title')
+    frame = render_frame([100.0, 200.0, 50.0], ['a', 'b', 'c'], 'Title')
+
+    output = diff_frame(previous, frame)
+    assert '\x1b[1;1H' not in output
+    assert '\x1b[5;1H' in output
+    assert diff_frame(frame, frame) == ''
+
+    # Shrinking frames clear the rows left behind
+    assert '\x1b[5;1H\x1b[K' in diff_frame(frame, previous)
+
+
+def test_sql_rows_in_same_hour_are_merged():
+    """Test duplicate hours in SQL output become a single bar."""
+    test_data = """          h          | count
+---------------------+-------
+ 2025-07-01 01:30:00 |    10
+ 2025-07-01 00:00:00 |   517
+ 2025-07-01 01:00:00 |  1511
+"""
+
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as tmp:
+        tmp.write(test_data)
+        tmp_path = tmp.name
+
+    try:
+        data, labels = parse_data_file(tmp_path)
+        assert data == [517.0, 1521.0]
+        assert labels == ['07-01 00:00', '07-01 01:00']
+    finally:
+        Path(tmp_path).unlink(missing_ok=True)
+
+
+@pytest.mark.parametrize("bucket,agg,expected", [
+    ('minute', 'sum', ([1.0, 2.0, 3.0, 100.0], ['07-01 00:00', '07-01 00:01', '07-01 01:00', '07-02 00:10'])),
+    ('hour', 'sum', ([3.0, 3.0, 100.0], ['07-01 00:00', '07-01 01:00', '07-02 00:00'])),
+    ('hour', 'mean', ([1.5, 3.0, 100.0], ['07-01 00:00', '07-01 01:00', '07-02 00:00'])),
+    ('day', 'sum', ([6.0, 100.0], ['2025-07-01', '2025-07-02'])),
+    ('day', 'p95', ([3.0, 100.0], ['2025-07-01', '2025-07-02'])),
+])
+def test_aggregate_rows(bucket, agg, expected):
+    """Test bucket sizes and aggregations on unsorted input."""
+    rows = [
+        ('2025-07-02 00:10:00', 100.0),
+        ('2025-07-01 00:00:00', 1.0),
+        ('2025-07-01 01:00:00', 3.0),
+        ('2025-07-01 00:01:30', 2.0),
+    ]
+    assert aggregate_rows(rows, bucket, agg) == expected
+
+
+def test_aggregate_rows_keeps_non_timestamp_labels():
+    """Test labels that are not timestamps are grouped as-is, in order."""
+    rows = [('web-1', 1.0), ('web-2', 2.0), ('web-1', 3.0)]
+    assert aggregate_rows(rows, 'hour', 'sum') == ([4.0, 2.0], ['web-1', 'web-2'])
+
+
+def test_csv_bucketing_by_day():
+    """Test CSV data is only bucketed when asked."""
+    test_data = "time,count\n2024-01-01 09:00,1\n2024-01-01 17:00,2\n2024-01-02 09:00,5\n"
+
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as tmp:
+        tmp.write(test_data)
+        tmp_path = tmp.name
+
+    try:
+        data, labels = parse_data_file(tmp_path)
+        assert data == [1.0, 2.0, 5.0]
+
+        data, labels = parse_data_file(tmp_path, bucket='day')
+        assert data == [3.0, 5.0]
+        assert labels == ['2024-01-01', '2024-01-02']
+    finally:
+        Path(tmp_path).unlink(missing_ok=True)
+
+
+def test_series_names_are_unique(tmp_path):
+    """Test files sharing a name are told apart by their directory."""
+    for host in ('web-1', 'web-2'):
+        (tmp_path / host).mkdir()
+        (tmp_path / host / 'metrics.csv').write_text("a,1\n")
+    first, second = str(tmp_path / 'web-1' / 'metrics.csv'), str(tmp_path / 'web-2' / 'metrics.csv')
+
+    assert series_names([first, str(tmp_path / 'web-1')]) == ['metrics.csv', 'web-1']
+    assert series_names([first, second]) == ['web-1/metrics.csv', 'web-2/metrics.csv']
+    assert series_names([first, first]) == ['metrics.csv', 'metrics.csv#2']
+
+
+def test_load_series_from_several_files_and_columns():
+    """Test parsing several files in parallel, one series per column."""
+    paths = []
+    for host, offset in [('web-1', 0), ('web-2', 100)]:
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', prefix=host, delete=False) as tmp:
+            tmp.write(f"date,requests,errors\n2024-01-01,{offset + 10},1\n2024-01-02,{offset + 20},2\n")
+            paths.append(tmp.name)
+
+    try:
+        series = load_series(paths, columns=[1, 2], workers=2)
+        assert [name for name, _, _ in series] == [
+            f"{Path(paths[0]).name}:1", f"{Path(paths[0]).name}:2",
+            f"{Path(paths[1]).name}:1", f"{Path(paths[1]).name}:2",
+        ]
+        assert [data for _, data, _ in series] == [
+            [10.0, 20.0], [1.0, 2.0], [110.0, 120.0], [1.0, 2.0]
+        ]
+    finally:
+        for path in paths:
+            Path(path).unlink(missing_ok=True)
+
+
+def test_align_series_fills_missing_labels():
+    """Test series are aligned on the union of their labels."""
+    series = [
+        ('a', [1.0, 2.0], ['2024-01-01', '2024-01-03']),
+        ('b', [5.0], ['2024-01-02']),
+    ]
+    labels, aligned = align_series(series)
+    assert labels == ['2024-01-01', '2024-01-02', '2024-01-03']
+    assert aligned == [[1.0, None, 2.0], [None, 5.0, None]]
+
+
+def test_align_series_keeps_time_order():
+    """Test labels are ordered by time, not as strings."""
+    # Hour buckets have no year: each series' order is kept across New Year
+    series = [
+        ('a', [1.0, 2.0, 3.0], ['12-31 22:00', '12-31 23:00', '01-01 00:00']),
+        ('b', [4.0, 5.0], ['12-31 23:00', '01-01 01:00']),
+    ]
+    labels, _ = align_series(series)
+    assert labels == ['12-31 22:00', '12-31 23:00', '01-01 00:00', '01-01 01:00']
+
+    # Day-first dates are sorted by the dates they stand for
+    series = [('a', [1.0], ['02/01/2025']), ('b', [2.0, 3.0], ['31/12/2024', '07/01/2025'])]
+    labels, _ = align_series(series)
+    assert labels == ['31/12/2024', '02/01/2025', '07/01/2025']
+
+
+def test_parse_lines_streams_from_iterator():
+    """Test parsing lines as they arrive, as from stdin."""
+    lines = (line for line in ["date,count\n", "2024-01-01,100\n", "2024-01-02,200\n"])
+    data, labels = parse_lines(lines)
+    assert data == [100.0, 200.0]
+    assert labels == ['2024-01-01', '2024-01-02']
+
+
+def test_cursor_rows_fetches_in_batches():
+    """Test rows are pulled from a DB-API cursor with fetchmany."""
+    connection = sqlite3.connect(':memory:')
+    connection.execute("CREATE TABLE hits (h TEXT, count INTEGER)")
+    connection.executemany("INSERT INTO hits VALUES (?, ?)",
+                           [(f"2025-07-01 0{i}:00:00", i) for i in range(5)] + [('bad', None)])
+
+    cursor = connection.execute("SELECT h, count FROM hits ORDER BY h")
+    fetches = []
+    original = cursor.fetchmany
+
+    class Recorder:
+        def fetchmany(self, size):
+            batch = original(size)
+            fetches.append(len(batch))
+            return batch
+
+    rows = list(cursor_rows(Recorder(), batch_size=2))
+    assert rows == [(f"2025-07-01 0{i}:00:00", float(i)) for i in range(5)]
+    assert fetches == [2, 2, 2, 0]
+
+
+def test_query_sqlite():
+    """Test querying a SQLite file straight into the pipeline."""
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
+        tmp_path = tmp.name
+
+    try:
+        connection = sqlite3.connect(tmp_path)
+        connection.execute("CREATE TABLE hits (h TEXT, count INTEGER)")
+        connection.executemany("INSERT INTO hits VALUES (?, ?)", [
+            ('2025-07-01 00:10:00', 1), ('2025-07-01 00:50:00', 2), ('2025-07-01 01:00:00', 5),
+        ])
+        connection.commit()
+        connection.close()
+
+        data, labels = query_sqlite(tmp_path, "SELECT h, count FROM hits", bucket='hour')
+        assert data == [3.0, 5.0]
+        assert labels == ['07-01 00:00', '07-01 01:00']
+    finally:
+        Path(tmp_path).unlink(missing_ok=True)
+
+
+def test_query_sqlite_unusual_path():
+    """Test a database path with URI characters in it."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / 'a#b%20c?.db'
+        connection = sqlite3.connect(db_path)
+        connection.execute("CREATE TABLE hits (h TEXT, count INTEGER)")
+        connection.execute("INSERT INTO hits VALUES ('2025-07-01 00:10:00', 4)")
+        connection.commit()
+        connection.close()
+
+        data, labels = query_sqlite(db_path, "SELECT h, count FROM hits")
+        assert data == [4.0]
+        assert labels == ['2025-07-01 00:10:00']
+
+
+def test_sniff_format_csv():
+    """Test sniffing delimiter, header, column types and timestamps."""
+    fmt = sniff_format(["date,count,host\n", "2024-01-01,100,web-1\n", "2024-01-02,200,web-2\n"])
+    assert fmt['kind'] == 'delimited'
+    assert fmt['delimiter'] == ','
+    assert fmt['has_header'] is True
+    assert fmt['column_types'] == ['timestamp', 'number', 'text']
+    assert fmt['timestamp_format'] == 'iso'
+    assert fmt['clean'] is True
+
+
+def test_sniff_format_tabs_and_uk_dates():
+    """Test sniffing tab-separated data with day-first dates."""
+    fmt = sniff_format(["25/12/2024\t5\n", "26/12/2024\toops\n"])
+    assert fmt['delimiter'] == '\t'
+    assert fmt['has_header'] is False
+    assert fmt['timestamp_format'] == '%d/%m/%Y'
+    assert fmt['clean'] is False
+
+
+def test_sniff_format_sql_table():
+    """Test pipe-separated output is treated as a SQL table."""
+    fmt = sniff_format(["  h  | count \n", "-----+-------\n", " 2025-07-01 00:00:00 | 517\n"])
+    assert fmt['kind'] == 'sql'
+
+
+def test_fast_rows_skips_bad_rows():
+    """Test the fast parser resumes after a row that does not parse."""
+    lines = iter(["a,1\n", "b,x\n", "\n", "c,3\n"])
+    assert list(fast_rows(lines)) == [('a', 1.0), ('c', 3.0)]
+
+    # A list restarts if iterated afresh; rows must not repeat
+    assert list(fast_rows(["a,1\n", "b,x\n", "c,3\n"])) == [('a', 1.0), ('c', 3.0)]
+
+
+def test_single_column_file():
+    """Test a single-column file does not raise."""
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as tmp:
+        tmp.write("100\n200\n")
+        tmp_path = tmp.name
+
+    try:
+        assert parse_data_file(tmp_path) == ([], [])
+    finally:
+        Path(tmp_path).unlink(missing_ok=True)
+
+
+def test_parse_semicolon_file_with_uk_dates_by_day():
+    """Test sniffed timestamp formats are used for bucketing."""
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as tmp:
+        tmp.write("day;count\n01/02/2024;1\n01/02/2024;2\n02/02/2024;4\n")
+        tmp_path = tmp.name
+
+    try:
+        data, labels = parse_data_file(tmp_path, bucket='day')
+        assert data == [3.0, 4.0]
+        assert labels == ['2024-02-01', '2024-02-02']
+    finally:
+        Path(tmp_path).unlink(missing_ok=True)
+
+
+def test_benchmark_data_generators():
+    """Test the benchmark's synthetic files parse to the requested size."""
+    from bench_viz import generate_csv, generate_sql_table
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = Path(tmp_dir) / 'data.csv'
+        sql_path = Path(tmp_dir) / 'data.txt'
+        generate_csv(csv_path, 120)
+        generate_sql_table(sql_path, 120)
+
+        data, _ = parse_data_file(csv_path)
+        assert len(data) == 120
+
+        # Two hours of minute rows, merged into hourly buckets
+        data, labels = parse_data_file(sql_path)
+        assert labels == ['01-01 00:00', '01-01 01:00']
+
+
+def test_scan_csv_mmap():
+    """Test the mmap scanner finds fields without per-row strings."""
+    np = pytest.importorskip('numpy')
+    test_data = "date,count,errors\n2024-01-01,100,1\n\n2024-01-02,200.5,2\nshort\n2024-01-03,300,3"
+
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as tmp:
+        tmp.write(test_data)
+        tmp_path = tmp.name
+
+    try:
+        values, labels = scan_csv_mmap(tmp_path, skip_header=True)
+        assert isinstance(values, np.ndarray)
+        assert values.tolist() == [100.0, 200.5, 300.0]
+        assert list(labels) == ['2024-01-01', '2024-01-02', '2024-01-03']
+        assert labels[1] == '2024-01-02'
+
+        values, _ = scan_csv_mmap(tmp_path, column=2, skip_header=True)
+        assert values.tolist() == [1.0, 2.0, 3.0]
+
+        # Blocks smaller than a line still split on line boundaries
+        values, labels = scan_csv_mmap(tmp_path, skip_header=True, block_bytes=8)
+        assert values.tolist() == [100.0, 200.5, 300.0]
+        assert list(labels) == ['2024-01-01', '2024-01-02', '2024-01-03']
+
+        # Values that do not parse hand back to the line parser
+        assert scan_csv_mmap(tmp_path) is None
+    finally:
+        Path(tmp_path).unlink(missing_ok=True)
+
+
+def test_large_files_use_mmap(monkeypatch):
+    """Test files over the threshold are parsed through the mmap scanner."""
+    pytest.importorskip('numpy')
+    monkeypatch.setattr('viz.MMAP_THRESHOLD', 0)
+
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as tmp:
+        tmp.write("date,count\n2024-01-01 10:00,1\n2024-01-01 11:00,2\n2024-01-02 10:00,5\n")
+        tmp_path = tmp.name
+
+    try:
+        data, labels = parse_data_file(tmp_path)
+        assert data.tolist() == [1.0, 2.0, 5.0]
+
+        data, labels = parse_data_file(tmp_path, bucket='day')
+        assert data == [3.0, 5.0]
+        assert labels == ['2024-01-01', '2024-01-02']
+    finally:
+        Path(tmp_path).unlink(missing_ok=True)
+
+
+def test_parsed_data_cache(monkeypatch, tmp_path):
+    """Test parsed columns are cached and the cache follows file changes."""
+    monkeypatch.setattr('viz.CACHE_MIN_BYTES', 0)
+    data_file = tmp_path / 'data.csv'
+    cache_dir = tmp_path / 'cache'
+    data_file.write_text("date,count\n2024-01-01,100\n2024-01-02,200\n")
+
+    data, labels = parse_data_file(data_file, cache_dir=cache_dir)
+    assert data == [100.0, 200.0]
+
+    path = cache_path(cache_dir, data_file)
+    assert path.exists()
+    cached_data, cached_labels = read_cache(path)
+    assert list(cached_data) == [100.0, 200.0]
+    assert cached_labels == ['2024-01-01', '2024-01-02']
+
+    # Cache hits come back as packed doubles
+    data, labels = parse_data_file(data_file, cache_dir=cache_dir)
+    assert list(data) == [100.0, 200.0]
+    assert labels == ['2024-01-01', '2024-01-02']
+
+    # Changing the file replaces the entry rather than adding one
+    data_file.write_text("date,count\n2024-01-01,5\n")
+    os.utime(data_file, ns=(1, 1))
+    data, labels = parse_data_file(data_file, cache_dir=cache_dir)
+    assert data == [5.0]
+    assert list(cache_dir.iterdir()) == [path]
+
+    # Other parse options are a miss and take over the entry
+    data, labels = parse_data_file(data_file, cache_dir=cache_dir, bucket='day')
+    assert labels == ['2024-01-01']
+    assert list(parse_data_file(data_file, cache_dir=cache_dir, bucket='day')[0]) == [5.0]
+    assert list(cache_dir.iterdir()) == [path]
+
+
+def test_unwritable_cache_is_skipped(monkeypatch, tmp_path):
+    """Test a cache directory that cannot be created does not stop the parse."""
+    monkeypatch.setattr('viz.CACHE_MIN_BYTES', 0)
+    data_file = tmp_path / 'data.csv'
+    data_file.write_text("date,count\n2024-01-01,100\n")
+    blocker = tmp_path / 'not-a-dir'
+    blocker.write_text('')
+
+    data, labels = parse_data_file(data_file, cache_dir=blocker / 'cache')
+    assert data == [100.0]
+
+
+def test_read_cache_rejects_bad_files(tmp_path):
+    """Test missing or corrupt cache files are ignored."""
+    assert read_cache(tmp_path / 'missing.cache') is None
+
+    corrupt = tmp_path / 'corrupt.cache'
+    corrupt.write_bytes(b'not a cache')
+    assert read_cache(corrupt) is None
+
+
+def test_mapped_labels_pickle_as_list(tmp_path):
+    """Test mmap-backed labels can be sent back from pool workers."""
+    pytest.importorskip('numpy')
+    data_file = tmp_path / 'data.csv'
+    data_file.write_text("2024-01-01,100\n2024-01-02,200\n")
+
+    _, labels = scan_csv_mmap(data_file)
+    assert pickle.loads(pickle.dumps(labels)) == ['2024-01-01', '2024-01-02']
+
+
+# Import-time budget for `import viz`, in microseconds. Generous enough for
+# slow CI machines, tight enough to catch a heavy import at module level.
+IMPORT_BUDGET_US = 150_000
+
+# Modules that must only be loaded by the modes that need them
+LAZY_MODULES = ['numpy', 'pandas', 'multiprocessing', 'sqlite3', 'hashlib', 'viz_stats', 'viz_export']
+
+
+def test_startup_import_budget():
+    """Test importing viz stays fast and leaves heavy engines unloaded."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import viz'],
+        capture_output=True, text=True, cwd=Path(__file__).parent
+    )
+    assert result.returncode == 0, result.stderr
+
+    # Lines look like: "import time:  self [us] | cumulative | name"
+    timings = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                timings[name.strip()] = int(cumulative)
+
+    loaded = [module for module in LAZY_MODULES if module in timings]
+    assert loaded == [], f"Imported at startup: {loaded}"
+    assert timings['viz'] < IMPORT_BUDGET_US, f"import viz took {timings['viz']}us"
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for chart file export using pytest.
+"""
+
+import xml.etree.ElementTree as ET
+import pytest
+from viz_export import render_svg, render_html, export_series, safe_filename
+
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+
+def test_render_svg_draws_every_point():
+    """Test the SVG is well formed with one line point per value."""
+    svg = render_svg([100.0, 200.0, 150.0], ['a', 'b', 'c'], 'Requests & errors', marked=[1])
+    root = ET.fromstring(svg)
+
+    points = root.find(f'{SVG}polyline').get('points').split()
+    assert len(points) == 3
+    assert len(root.findall(f'{SVG}circle')) == 1
+    assert 'Requests &amp; errors' in svg
+
+
+def test_render_svg_single_and_flat_series():
+    """Test series with one point or no spread still render."""
+    ET.fromstring(render_svg([5.0], ['only'], 'One'))
+    ET.fromstring(render_svg([3.0, 3.0], ['a', 'b'], 'Flat'))
+
+
+def test_render_html_embeds_svg():
+    """Test the HTML page wraps the chart."""
+    html = render_html('<svg></svg>', 'Title')
+    assert '<svg></svg>' in html
+    assert '<title>Title</title>' in html
+
+
+def test_safe_filename():
+    """Test series names become usable file names."""
+    assert safe_filename('web-1.csv:2') == 'web-1.csv_2'
+    assert safe_filename('::') == 'series'
+
+
+def test_export_series_in_batch(tmp_path):
+    """Test several series are written in each format by a worker pool."""
+    series = [
+        ('web-1.csv', [1.0, 2.0], ['2024-01-01', '2024-01-02']),
+        ('web-2.csv', [3.0, 4.0], ['2024-01-01', '2024-01-02']),
+    ]
+    paths = export_series(series, tmp_path / 'charts', ['svg', 'html'], workers=2)
+
+    assert [path.name for path in paths] == [
+        'web-1.csv.svg', 'web-1.csv.html', 'web-2.csv.svg', 'web-2.csv.html'
+    ]
+    assert all(path.exists() for path in paths)
+
+
+def test_export_series_refuses_clashing_files(tmp_path):
+    """Test two series that would share an output file are refused."""
+    series = [('web-1/metrics.csv', [1.0], ['x']), ('web-1_metrics.csv', [2.0], ['x'])]
+    with pytest.raises(ValueError, match='web-1_metrics.csv'):
+        export_series(series, tmp_path, ['svg'])
+    assert not any(tmp_path.iterdir())
+
+
+def test_export_series_rejects_unknown_format(tmp_path):
+    """Test unknown formats fail before anything is written."""
+    with pytest.raises(ValueError):
+        export_series([('a', [1.0], ['x'])], tmp_path, ['gif'])
+
+
+def test_png_needs_cairosvg(tmp_path):
+    """Test PNG export works with cairosvg, or explains how to get it."""
+    try:
+        import cairosvg  # noqa: F401
+    except ImportError:
+        with pytest.raises(RuntimeError, match='cairosvg'):
+            export_series([('a', [1.0], ['x'])], tmp_path, ['png'])
+    else:
+        paths = export_series([('a', [1.0], ['x'])], tmp_path, ['png'])
+        assert paths[0].read_bytes().startswith(b'\x89PNG')
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-pass stats engine using pytest.
+"""
+
+import random
+import statistics
+import pytest
+from viz_stats import RunningStats, TDigest, summarise, format_summary
+
+
+def test_running_stats_matches_statistics_module():
+    """Test Welford's algorithm against a two-pass calculation."""
+    rng = random.Random(1)
+    values = [rng.gauss(100, 15) for _ in range(1000)]
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+
+    assert stats.count == 1000
+    assert stats.mean == pytest.approx(statistics.mean(values))
+    assert stats.stddev == pytest.approx(statistics.stdev(values))
+    assert stats.min == min(values)
+    assert stats.max == max(values)
+
+
+def test_running_stats_single_value():
+    """Test variance is zero until there are two values."""
+    stats = RunningStats()
+    stats.add(5.0)
+    assert stats.mean == 5.0
+    assert stats.stddev == 0.0
+
+
+def test_tdigest_quantiles():
+    """Test t-digest quantiles on shuffled uniform data."""
+    values = list(range(10001))
+    random.Random(2).shuffle(values)
+    digest = TDigest()
+    for value in values:
+        digest.add(value)
+
+    assert len(digest.centroids) < 200
+    assert digest.quantile(0.5) == pytest.approx(5000, abs=100)
+    assert digest.quantile(0.95) == pytest.approx(9500, abs=50)
+    assert digest.quantile(0.99) == pytest.approx(9900, abs=20)
+    assert digest.quantile(0) == 0
+    assert digest.quantile(1) == 10000
+
+
+def test_tdigest_empty_and_small():
+    """Test quantiles with no values and with a single value."""
+    digest = TDigest()
+    assert digest.quantile(0.5) is None
+    digest.add(7.0)
+    assert digest.quantile(0.5) == 7.0
+
+
+def test_summarise_flags_spike():
+    """Test a spike in steady hourly counts is flagged as an anomaly."""
+    data = [100, 102, 98, 101, 99, 100, 103, 97, 500, 100, 101]
+    summary = summarise(data)
+
+    assert summary['anomalies'] == [8]
+    assert summary['count'] == len(data)
+    assert summary['max'] == 500
+    assert summary['p50'] == pytest.approx(100, abs=2)
+
+
+def test_format_summary():
+    """Test the summary panel names anomalous labels."""
+    labels = ['a', 'b', 'c', 'd', 'e', 'f', 'g']
+    summary = summarise([1, 1, 2, 1, 2, 1, 50])
+
+    lines = format_summary(summary, labels)
+    assert lines[0] == "Summary"
+    assert any('p95' in line for line in lines)
+    assert lines[-1] == "  1 anomalies (marked !): g"
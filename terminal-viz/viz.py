@@ -1,113 +1,798 @@
 #!/usr/bin/env python3
 """
 Terminal data visualization tool for creating line graphs from CSV/text files.
+
+Startup time matters because the tool is run interactively, so modules
+only needed by some modes (NumPy, multiprocessing, sqlite3, hashlib and
+the stats engine) are imported inside the functions that use them.
 """
 
+import os
 import sys
-import csv
+import math
+import time
+import argparse
 import subprocess
 import tempfile
+from array import array
+from collections import deque
+from datetime import datetime
+from itertools import chain
 from pathlib import Path
 
 
-def parse_data_file(filepath):
-    """Parse data file and extract numeric values for plotting."""
-    data = []
-    labels = []
+# Bucket sizes: fields to zero when truncating, and the label format
+BUCKETS = {
+    'minute': ({'second': 0, 'microsecond': 0}, '%m-%d %H:%M'),
+    'hour': ({'minute': 0, 'second': 0, 'microsecond': 0}, '%m-%d %H:00'),
+    'day': ({'hour': 0, 'minute': 0, 'second': 0, 'microsecond': 0}, '%Y-%m-%d'),
+}
+
+AGGREGATIONS = ('sum', 'mean', 'p95')
+
+SERIES_COLORS = ['blue', 'red', 'green', 'magenta', 'yellow', 'cyan']
+
+# How much of the input the format sniffer looks at
+SNIFF_BYTES = 4096
+
+# Candidate delimiters, in order of preference when they tie
+DELIMITERS = [',', '\t', ';', '|']
+
+# Clean delimited files at least this big are scanned with mmap and NumPy
+MMAP_THRESHOLD = 64 * 1024 * 1024
+SCAN_BLOCK_BYTES = 4 * 1024 * 1024
+
+# Parsed files at least this big are cached between runs
+CACHE_MIN_BYTES = 1024 * 1024
+CACHE_MAGIC = b'VIZCACHE2\n'
+
+# Non-ISO timestamp layouts the sniffer recognises, tried in order
+TIMESTAMP_FORMATS = [
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y',
+    '%m/%d/%Y',
+    '%Y/%m/%d %H:%M:%S',
+    '%Y/%m/%d',
+    '%d %b %Y',
+]
+
+
+def parse_data_file(filepath, bucket=None, agg='sum', column=1, cache_dir=None):
+    """Parse data file and extract numeric values for plotting.
+
+    SQL table output is always bucketed (by hour unless `bucket` is given).
+    CSV data is only bucketed when `bucket` is given. A filepath of `-`
+    reads from stdin. With a `cache_dir`, results for large files are
+    cached there (see `cache_path`).
+    """
+    if filepath == '-':
+        return parse_lines(sys.stdin, bucket, agg, column)
+
+    stat = Path(filepath).stat()
+    if cache_dir is None or stat.st_size < CACHE_MIN_BYTES:
+        return _parse_file(filepath, bucket, agg, column)
+
+    # Taken before parsing, so a file that changes meanwhile is parsed again next time
+    path = cache_path(cache_dir, filepath)
+    stamp = cache_stamp(stat, bucket, agg, column)
+    cached = read_cache(path, stamp)
+    if cached is not None:
+        return cached
     
+    data, labels = _parse_file(filepath, bucket, agg, column)
+    write_cache(path, data, labels, stamp)
+    return data, labels
+
+
+def default_cache_dir():
+    """Where parsed data is cached unless --cache-dir is given."""
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'terminal-viz'
+
+
+def cache_path(cache_dir, filepath):
+    """Cache file for a data file, one per resolved path.
+
+    Each new parse of the file overwrites it, so a growing log keeps a
+    single entry rather than one per version.
+    """
+    import hashlib
+
+    key = str(Path(filepath).resolve())
+    return Path(cache_dir) / f"{hashlib.sha1(key.encode()).hexdigest()}.cache"
+
+
+def cache_stamp(stat, bucket, agg, column):
+    """What a cache entry must match to be used: file mtime and size, and parse options."""
+    return f"{stat.st_mtime_ns} {stat.st_size} {bucket} {agg} {column}"
+
+
+def write_cache(path, data, labels, stamp=''):
+    """Store data and labels as two columns: packed doubles, then labels.
+
+    Layout: magic line, stamp line, row count line, float64 values,
+    newline-joined UTF-8 labels. Written to a temp file and renamed into
+    place. A cache that cannot be written is skipped, since the data is
+    already parsed.
+    """
+    if hasattr(data, 'astype'):  # NumPy array
+        values = data.astype('d').tobytes()
+    else:
+        values = array('d', data).tobytes()
+
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'wb') as file:
+            file.write(CACHE_MAGIC)
+            file.write(f"{stamp}\n{len(data)}\n".encode())
+            file.write(values)
+            file.write('\n'.join(labels).encode('utf-8'))
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+
+
+def read_cache(path, stamp=None):
+    """Load cached data and labels, or None if missing, unreadable or stale.
+
+    With a `stamp`, the entry is only used if it was written with the same one.
+    """
+    try:
+        with open(path, 'rb') as file:
+            content = file.read()
+    except OSError:
+        return None
+
+    if not content.startswith(CACHE_MAGIC):
+        return None
+
+    try:
+        stamp_end = content.index(b'\n', len(CACHE_MAGIC))
+        if stamp is not None and content[len(CACHE_MAGIC):stamp_end].decode('utf-8') != stamp:
+            return None
+        header_end = content.index(b'\n', stamp_end + 1)
+        count = int(content[stamp_end + 1:header_end])
+        values_end = header_end + 1 + count * 8
+        data = array('d')
+        data.frombytes(content[header_end + 1:values_end])
+        labels = content[values_end:].decode('utf-8').split('\n') if count else []
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+    if len(labels) != count:
+        return None
+    return data, labels
+
+
+def _parse_file(filepath, bucket, agg, column):
+    """Parse a data file, scanning large clean files with mmap."""
     with open(filepath, 'r') as file:
-        lines = file.readlines()
+        if os.fstat(file.fileno()).st_size < MMAP_THRESHOLD:
+            return parse_lines(file, bucket, agg, column)
+
+        # Large clean files skip per-line strings entirely
+        sample = read_sample(file)
+        fmt = sniff_format(sample, column)
+        if fmt['kind'] == 'delimited' and fmt['clean']:
+            scanned = scan_csv_mmap(filepath, column, fmt['delimiter'], fmt['has_header'])
+            if scanned is not None:
+                data, labels = scanned
+                if bucket:
+                    return aggregate_rows(zip(labels, data), bucket, agg, fmt['timestamp_format'])
+                return data, labels
+
+        return parse_lines(chain(sample, file), bucket, agg, column)
+
+
+def parse_lines(lines, bucket=None, agg='sum', column=1):
+    """Detect the format of some lines and parse one value column.
+
+    `lines` can be any iterable, such as an open file or stdin, and is
+    consumed as it is parsed.
+    """
+    lines = iter(lines)
+    sample = read_sample(lines)
     
     # Handle empty file
-    if not lines:
-        return data, labels
+    if not sample:
+        return [], []
+
+    fmt = sniff_format(sample, column)
+    lines = chain(sample, lines)
     
-    # Detect format: CSV vs SQL table output
-    if '|' in lines[0]:
-        return parse_sql_table_format(lines)
+    if fmt['kind'] == 'sql':
+        return parse_sql_table_format(lines, bucket or 'hour', agg, column)
     else:
-        return parse_csv_format(lines)
+        return parse_csv_format(lines, bucket, agg, column, fmt)
 
 
-def parse_sql_table_format(lines):
-    """Parse SQL table output format with pipe separators."""
-    data = []
-    labels = []
+def read_sample(lines, size=SNIFF_BYTES):
+    """Take lines from an iterator until about `size` characters are read."""
+    sample = []
+    total = 0
+    for line in lines:
+        sample.append(line)
+        total += len(line)
+        if total >= size:
+            break
+    return sample
+
+
+def is_number(text):
+    """Check whether some text parses as a float."""
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def detect_timestamp_format(values):
+    """Return 'iso', a strptime format, or None if the values are not times."""
+    if all(parse_timestamp(value) for value in values):
+        return 'iso'
+
+    for timestamp_format in TIMESTAMP_FORMATS:
+        try:
+            for value in values:
+                datetime.strptime(value, timestamp_format)
+            return timestamp_format
+        except ValueError:
+            continue
+
+    return None
+
+
+def sniff_format(sample, column=1):
+    """Work out the layout of a sample of lines.
+
+    Returns a dict with:
+      kind: 'sql' for pipe-separated table output, otherwise 'delimited'
+      delimiter: the field separator
+      has_header: whether the first row is column names
+      column_types: 'number', 'timestamp' or 'text' for each column
+      timestamp_format: format of the label column (see detect_timestamp_format)
+      clean: whether every sampled data row has a numeric value `column`
+    """
+    rows = [line.rstrip('\r\n') for line in sample if line.strip()]
+
+    # Pick the delimiter that splits the most lines into the same shape
+    def score(delimiter):
+        counts = [row.count(delimiter) for row in rows]
+        modal = max(set(counts), key=counts.count, default=0)
+        return counts.count(modal) if modal else 0
+
+    delimiter = max(DELIMITERS, key=lambda d: (score(d), -DELIMITERS.index(d)))
+    if not score(delimiter):
+        delimiter = ','
+
+    fields = [[field.strip() for field in row.split(delimiter)] for row in rows]
+
+    has_header = bool(fields) and not (len(fields[0]) > column and is_number(fields[0][column]))
+    data_rows = fields[1:] if has_header else fields
+    width = max((len(row) for row in data_rows), default=0)
+
+    column_types = []
+    for index in range(width):
+        values = [row[index] for row in data_rows if len(row) > index]
+        if values and all(is_number(value) for value in values):
+            column_types.append('number')
+        elif values and detect_timestamp_format(values):
+            column_types.append('timestamp')
+        else:
+            column_types.append('text')
     
-    # Skip header and separator lines
-    data_lines = []
+    labels = [row[0] for row in data_rows if row and row[0]]
+    timestamp_format = detect_timestamp_format(labels) if labels else None
+
+    clean = width > column and bool(data_rows) and all(
+        len(row) == width and is_number(row[column]) for row in data_rows
+    )
+
+    return {
+        'kind': 'sql' if delimiter == '|' else 'delimited',
+        'delimiter': delimiter,
+        'has_header': has_header,
+        'column_types': column_types,
+        'timestamp_format': timestamp_format,
+        'clean': clean,
+    }
+
+
+def parse_sql_table_format(lines, bucket='hour', agg='sum', column=1):
+    """Parse SQL table output format with pipe separators.
+
+    Rows that share a time bucket are merged into one point.
+    """
+    return aggregate_rows(sql_table_rows(lines, column), bucket, agg)
+
+
+def sql_table_rows(lines, column=1):
+    """Yield (label, value) rows from SQL table output lines."""
+    seen_data = False
     for line in lines:
         line = line.strip()
         if not line or '---' in line or line.count('|') < 1:
             continue
         # Skip header row (contains column names)
-        if 'count' in line.lower() and len(data_lines) == 0:
+        if 'count' in line.lower() and not seen_data:
             continue
-        data_lines.append(line)
-    
-    for line in data_lines:
+        seen_data = True
+
         parts = [part.strip() for part in line.split('|')]
-        if len(parts) >= 2:
+        if len(parts) > column:
             try:
                 # Extract date/timestamp and count
-                timestamp = parts[0]
-                count_value = float(parts[1])
-                
-                # Simplify timestamp for display (just hour)
-                if ' ' in timestamp:
-                    date_part, time_part = timestamp.split(' ', 1)
-                    hour = time_part.split(':')[0]
-                    simple_label = f"{date_part[-5:]} {hour}:00"  # MM-DD HH:00
-                else:
-                    simple_label = timestamp
-                
-                labels.append(simple_label)
-                data.append(count_value)
-            except (ValueError, IndexError):
+                yield parts[0], float(parts[column])
+            except ValueError:
                 continue
+
+
+def parse_csv_format(lines, bucket=None, agg='sum', column=1, fmt=None):
+    """Parse standard CSV format.
     
-    return data, labels
+    Other delimiters are handled too. The layout is sniffed from the first
+    lines unless `fmt` (from `sniff_format`) is given. Input that looks
+    clean is parsed with `fast_rows`.
+    """
+    lines = iter(lines)
+
+    if fmt is None:
+        sample = read_sample(lines)
+        if not sample:
+            return [], []
+        fmt = sniff_format(sample, column)
+        lines = chain(sample, lines)
+
+    # Skip the header row
+    if fmt['has_header']:
+        next(lines, None)
+
+    row_parser = fast_rows if fmt['clean'] else csv_rows
+    rows = row_parser(lines, column, fmt['delimiter'])
+    return collect_rows(rows, bucket, agg, fmt['timestamp_format'])
+
+
+class MappedLabels:
+    """Label column of a memory-mapped file, decoded only when read."""
+
+    def __init__(self, buffer, starts, ends):
+        self.buffer = buffer
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self.buffer[self.starts[index]:self.ends[index]].decode('utf-8', 'replace').strip()
+
+    def __iter__(self):
+        for start, end in zip(self.starts, self.ends):
+            yield self.buffer[start:end].decode('utf-8', 'replace').strip()
+
+    def __reduce__(self):
+        # The mmap cannot be pickled, so send plain labels between processes
+        return (list, (list(self),))
+
+
+def scan_csv_mmap(filepath, column=1, delimiter=',', skip_header=False,
+                  block_bytes=SCAN_BLOCK_BYTES):
+    """Scan a delimited file through mmap into a NumPy float array.
+
+    Line and field boundaries are found with NumPy over the mapped bytes, and
+    values are parsed by NumPy too, so no string is made per row. Labels
+    come back as a MappedLabels column that decodes on access. The file is
+    scanned in blocks of whole lines, so scratch memory stays bounded.
+
+    Returns None if NumPy is not installed or a value does not parse, so the
+    caller can fall back to the line-by-line parser.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+    import mmap
+
+    with open(filepath, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return np.empty(0), []
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    raw = np.frombuffer(buffer, dtype=np.uint8)
+    position = 0
+    if skip_header:
+        position = buffer.find(b'\n') + 1 or len(raw)
+
+    values, starts, label_ends = [], [], []
+    while position < len(raw):
+        # Cut the block after its last complete line
+        limit = min(position + block_bytes, len(raw))
+        if limit < len(raw):
+            cut = buffer.rfind(b'\n', position, limit)
+            limit = cut + 1 if cut >= 0 else buffer.find(b'\n', limit) + 1 or len(raw)
+
+        try:
+            block = _scan_block(raw[position:limit], column, ord(delimiter))
+        except ValueError:
+            return None
+        values.append(block[0])
+        starts.append(block[1] + position)
+        label_ends.append(block[2] + position)
+        position = limit
+
+    if not values:
+        return np.empty(0), []
+
+    return np.concatenate(values), MappedLabels(buffer, np.concatenate(starts), np.concatenate(label_ends))
+
+
+def _scan_block(block, column, delimiter):
+    """Find rows in a block of whole lines and parse their value column.
+
+    Returns the values and the start and end offsets of each label.
+    """
+    import numpy as np
+
+    # Line boundaries
+    ends = np.flatnonzero(block == ord('\n'))
+    if block[-1] != ord('\n'):
+        ends = np.append(ends, len(block))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+
+    # Field boundaries: the n-th delimiter after each line start, with a
+    # sentinel past the end for lines that have too few fields
+    delimiters = np.append(np.flatnonzero(block == delimiter), len(block) + 1)
+    first = np.searchsorted(delimiters, starts)
+    last = len(delimiters) - 1
+    label_ends = delimiters[np.minimum(first, last)]
+    value_starts = delimiters[np.minimum(first + column - 1, last)] + 1
+    value_ends = np.minimum(delimiters[np.minimum(first + column, last)], ends)
+
+    # Drop blank lines and lines without the value column
+    keep = value_starts <= ends
+    starts, label_ends = starts[keep], label_ends[keep]
+    value_starts, value_ends = value_starts[keep], value_ends[keep]
+
+    # Gather the value fields into a fixed-width bytes array, which NumPy
+    # converts to float in C
+    width = int((value_ends - value_starts).max(initial=1)) or 1
+    positions = value_starts[:, None] + np.arange(width)
+    fields = block[np.minimum(positions, len(block) - 1)]
+    fields[positions >= value_ends[:, None]] = 0
+    values = fields.view(f'S{width}').ravel().astype(np.float64)
+
+    return values, starts, label_ends
+
+
+def csv_rows(lines, column=1, delimiter=','):
+    """Yield (label, value) rows from CSV lines, skipping non-numeric rows."""
+    for line in lines:
+        row = line.strip().split(delimiter)
+        if len(row) > column:
+            try:
+                yield row[0], float(row[column])
+            except ValueError:
+                continue
+
 
+def fast_rows(lines, column=1, delimiter=','):
+    """Yield (label, value) rows from delimited lines that are known to be clean.
+
+    The try block wraps the whole loop, not each row. A bad row is still
+    skipped: the loop starts again from the next line.
+    """
+    # A single iterator, so restarting the loop carries on rather than starting over
+    lines = iter(lines)
+    while True:
+        try:
+            for line in lines:
+                fields = line.split(delimiter)
+                yield fields[0], float(fields[column])
+            return
+        except (ValueError, IndexError):
+            continue
+
+
+def cursor_rows(cursor, column=1, batch_size=1000):
+    """Yield (label, value) rows from a DB-API cursor.
+
+    Rows are pulled in batches with `fetchmany`. The first column is the
+    label; rows with a missing or non-numeric value are skipped.
+    """
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            return
+        for row in batch:
+            try:
+                yield str(row[0]), float(row[column])
+            except (TypeError, ValueError):
+                continue
+
+
+def query_sqlite(db_path, query, bucket=None, agg='sum', column=1, batch_size=1000):
+    """Run a query against a SQLite database and parse the result rows."""
+    import sqlite3
+
+    # as_uri() escapes ?, # and %, which would otherwise end or mangle the path
+    connection = sqlite3.connect(Path(db_path).resolve().as_uri() + '?mode=ro', uri=True)
+    try:
+        cursor = connection.execute(query)
+        return collect_rows(cursor_rows(cursor, column, batch_size), bucket, agg)
+    finally:
+        connection.close()
+
+
+def collect_rows(rows, bucket=None, agg='sum', timestamp_format=None):
+    """Turn (label, value) rows into data and labels, bucketing if asked."""
+    if bucket:
+        return aggregate_rows(rows, bucket, agg, timestamp_format)
 
-def parse_csv_format(lines):
-    """Parse standard CSV format."""
     data = []
     labels = []
+    for label, value in rows:
+        labels.append(label)
+        data.append(value)
     
-    # Check if first line is header
-    first_line = lines[0].strip()
-    start_idx = 0
+    return data, labels
+
+
+def parse_timestamp(text):
+    """Parse an ISO date or timestamp, returning None if it is not one."""
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return None
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * fraction))
+    return ordered[rank - 1]
+
+
+def aggregate_rows(rows, bucket='hour', agg='sum', timestamp_format=None):
+    """Merge (label, value) rows into time buckets in a single pass.
     
-    if not first_line.split(',')[1].replace('.', '').replace('-', '').isdigit():
-        start_idx = 1
+    Rows are hashed on their bucket start, so input does not need to be
+    sorted. Labels that are not timestamps form their own bucket. The
+    result is in time order, or first-seen order if any label was not a
+    timestamp. Labels are read as ISO timestamps unless a strptime
+    `timestamp_format` is given.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket size: {bucket}")
+    if agg not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation: {agg}")
     
-    for line in lines[start_idx:]:
-        row = line.strip().split(',')
-        if len(row) >= 2:
+    truncate, label_format = BUCKETS[bucket]
+    buckets = {}
+    all_timestamps = True
+
+    if timestamp_format in (None, 'iso'):
+        parse = parse_timestamp
+    else:
+        def parse(text):
             try:
-                label = row[0]
-                value = float(row[1])
-                labels.append(label)
-                data.append(value)
+                return datetime.strptime(text, timestamp_format)
             except ValueError:
-                continue
+                return None
+
+    for label, value in rows:
+        moment = parse(label)
+        if moment is None:
+            key = label
+            all_timestamps = False
+        else:
+            key = moment.replace(**truncate)
+
+        # Accumulator: [sum, count, values kept only for percentiles]
+        acc = buckets.get(key)
+        if acc is None:
+            acc = buckets[key] = [0.0, 0, []]
+        acc[0] += value
+        acc[1] += 1
+        if agg == 'p95':
+            acc[2].append(value)
+
+    keys = sorted(buckets) if all_timestamps else list(buckets)
+    data = []
+    labels = []
+
+    for key in keys:
+        total, count, values = buckets[key]
+        if agg == 'sum':
+            data.append(total)
+        elif agg == 'mean':
+            data.append(total / count)
+        else:
+            data.append(percentile(values, 0.95))
+        labels.append(key.strftime(label_format) if isinstance(key, datetime) else key)
     
     return data, labels
 
 
-def create_line_graph(data, labels, title="Data Visualization"):
-    """Create line graph using termgraph."""
-    if not data:
+def _parse_file_columns(filepath, columns, bucket, agg, cache_dir=None):
+    """Parse several value columns from one file, reading it once."""
+    if len(columns) == 1:
+        return [parse_data_file(filepath, bucket, agg, columns[0], cache_dir)]
+
+    if filepath == '-':
+        lines = sys.stdin.readlines()
+    else:
+        with open(filepath, 'r') as file:
+            lines = file.readlines()
+
+    return [parse_lines(lines, bucket, agg, column) for column in columns]
+
+
+def series_names(filepaths):
+    """Short, unique names for data files.
+
+    Each file is named by its file name, unless two files share one; then
+    every file is named by its path from the directory they have in
+    common (e.g. 'web-1/metrics.csv'). A file given twice gets '#2'.
+    """
+    names = ['stdin' if filepath == '-' else Path(filepath).name for filepath in filepaths]
+    if len(set(names)) < len(names):
+        paths = [Path(filepath).resolve() for filepath in filepaths if filepath != '-']
+        common = os.path.commonpath([str(path.parent) for path in paths])
+        names = ['stdin' if filepath == '-' else os.path.relpath(Path(filepath).resolve(), common)
+                 for filepath in filepaths]
+
+    seen = {}
+    unique = []
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        unique.append(name if seen[name] == 1 else f"{name}#{seen[name]}")
+    return unique
+
+
+def load_series(filepaths, columns=(1,), bucket=None, agg='sum', workers=None,
+                cache_dir=None):
+    """Parse every file in a process pool.
+
+    Returns a list of (name, data, labels), one per file and column. Names
+    come from series_names, with the column number added when several
+    columns are plotted.
+    """
+    jobs = [(filepath, columns, bucket, agg, cache_dir) for filepath in filepaths]
+
+    if len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_parse_file_columns, *zip(*jobs)))
+    else:
+        results = [_parse_file_columns(*job) for job in jobs]
+
+    series = []
+    for file_name, parsed in zip(series_names(filepaths), results):
+        for column, (data, labels) in zip(columns, parsed):
+            name = file_name
+            if len(columns) > 1:
+                name = f"{name}:{column}"
+            series.append((name, data, labels))
+
+    return series
+
+
+def merge_labels(series):
+    """Labels of several series on one axis, in time order when possible.
+
+    If every label is a timestamp (ISO or a TIMESTAMP_FORMATS layout) they
+    are sorted by time. Otherwise, such as for bucket labels without a
+    year, each series' own order is kept: labels new to the axis go in
+    just before the next label of their series already on it, or at the end.
+    """
+    unique = list(dict.fromkeys(label for _, _, series_labels in series for label in series_labels))
+    timestamp_format = detect_timestamp_format(unique) if unique else None
+    if timestamp_format == 'iso':
+        return sorted(unique, key=datetime.fromisoformat)
+    if timestamp_format:
+        return sorted(unique, key=lambda label: datetime.strptime(label, timestamp_format))
+
+    merged = []
+    for _, _, series_labels in series:
+        known = set(merged)
+        before = {}
+        pending = []
+        for label in dict.fromkeys(series_labels):
+            if label in known:
+                before[label] = pending
+                pending = []
+            else:
+                pending.append(label)
+        if before:
+            merged = [new for label in merged for new in before.get(label, []) + [label]]
+        merged.extend(pending)
+    return merged
+
+
+def align_series(series):
+    """Put several series on a shared label axis (see merge_labels).
+
+    Returns the labels and one list of values per series, with None where
+    a series has no value for a label.
+    """
+    labels = merge_labels(series)
+    aligned = []
+
+    for _, data, series_labels in series:
+        values = dict(zip(series_labels, data))
+        aligned.append([values.get(label) for label in labels])
+
+    return labels, aligned
+
+
+def create_line_graph(data, labels, title="Data Visualization", marked=()):
+    """Create line graph using termgraph.
+
+    Points whose index is in `marked` get a ! before their label.
+    """
+    if len(data) == 0:
         print("No valid data found in file")
         return
     
+    if marked:
+        marked = set(marked)
+        labels = [f"!{label}" if i in marked else label for i, label in enumerate(labels)]
+
+    _run_termgraph(labels, [data], title, ['blue'])
+
+
+def create_graph_with_stats(data, labels, title="Data Visualization", threshold=3.0):
+    """Chart a series with anomalies marked, then print a summary panel."""
+    from viz_stats import summarise, format_summary
+
+    summary = summarise(data, threshold)
+    create_line_graph(data, labels, title, summary['anomalies'])
+    print('\n'.join(format_summary(summary, labels)))
+
+
+def create_multi_graph(series, title="Data Visualization", facet=False):
+    """Plot several (name, data, labels) series on a shared label axis.
+
+    Series are overlaid in one chart, or drawn one chart each when `facet`
+    is set.
+    """
+    labels, aligned = align_series(series)
+    if not labels:
+        print("No valid data found in files")
+        return
+
+    names = [name for name, _, _ in series]
+    colors = [SERIES_COLORS[i % len(SERIES_COLORS)] for i in range(len(series))]
+
+    if facet:
+        for name, values, color in zip(names, aligned, colors):
+            _run_termgraph(labels, [values], f"{title}: {name}", [color])
+    else:
+        _run_termgraph(labels, aligned, title, colors, names)
+
+
+def _run_termgraph(labels, columns, title, colors, categories=None):
+    """Write label/value rows to a temp file and chart them with termgraph."""
     # Create temporary file for termgraph
     with tempfile.NamedTemporaryFile(mode='w', suffix='.dat', delete=False) as tmp:
         # Write data in termgraph format
-        for i, (label, value) in enumerate(zip(labels, data)):
+        if categories:
+            tmp.write(f"@ {','.join(categories)}\n")
+        for i, label in enumerate(labels):
             # Truncate long labels
-            short_label = label[:10] if len(label) > 10 else label
-            tmp.write(f"{short_label},{value}\n")
+            short_label = label[:11] if len(label) > 11 else label
+            # Series missing a label are drawn as zero
+            values = ','.join(str(column[i] or 0) for column in columns)
+            tmp.write(f"{short_label},{values}\n")
         
         tmp_path = tmp.name
     
@@ -119,7 +804,7 @@ def create_line_graph(data, labels, title="Data Visualization"):
             '--format', '{:.0f}',
             '--title', title,
             '--width', '50',
-            '--color', 'blue'
+            '--color', *colors
         ]
         
         result = subprocess.run(cmd, capture_output=True, text=True)
@@ -134,28 +819,249 @@ def create_line_graph(data, labels, title="Data Visualization"):
         Path(tmp_path).unlink(missing_ok=True)
 
 
+def render_frame(data, labels, title="Data Visualization", width=50):
+    """Render a horizontal bar chart as a list of text lines."""
+    lines = [f"# {title}", ""]
+    peak = max((abs(value) for value in data), default=0) or 1
+
+    for label, value in zip(labels, data):
+        bar = '▇' * int(round(abs(value) / peak * width))
+        lines.append(f"{label[:11]:<11}: {bar} {value:.0f}")
+
+    return lines
+
+
+def diff_frame(previous, frame):
+    """Return ANSI output that turns the previous frame into the new one.
+
+    Only lines that changed are rewritten, so a steady chart costs nothing
+    to redraw and a new point only touches the rows it moves.
+    """
+    output = []
+    for row, line in enumerate(frame):
+        if row >= len(previous) or previous[row] != line:
+            output.append(f"\x1b[{row + 1};1H{line}\x1b[K")
+    for row in range(len(frame), len(previous)):
+        output.append(f"\x1b[{row + 1};1H\x1b[K")
+    return ''.join(output)
+
+
+def read_appended(file, pending=b''):
+    """Read bytes appended since the last call.
+
+    Returns the complete lines read and the trailing partial line, which
+    should be passed back in on the next call.
+    """
+    chunk = file.read()
+    if not chunk:
+        return [], pending
+
+    *complete, pending = (pending + chunk).split(b'\n')
+    return [line.decode('utf-8', 'replace') for line in complete], pending
+
+
+def follow_file(filepath, points=50, fps=2.0, width=50, out=sys.stdout,
+                bucket=None, agg='sum', column=1):
+    """Tail a growing data file and redraw the chart as rows are appended.
+
+    Only newly appended bytes are parsed. The last `points` rows are kept in
+    a ring buffer and the chart is redrawn at most `fps` times per second.
+    Buffered rows are bucketed the same way as `parse_data_file`.
+    """
+    if fps <= 0:
+        raise ValueError("fps must be positive")
+    buffer = deque(maxlen=points)
+    timestamp_format = None
+    title = f"Following {Path(filepath).name}"
+    row_parser = None
+    pending = b''
+    previous = []
+
+    out.write("\x1b[2J")
+    with open(filepath, 'rb') as file:
+        while True:
+            # Start again if the file was truncated or rotated in place
+            if Path(filepath).stat().st_size < file.tell():
+                file.seek(0)
+                pending = b''
+                row_parser = None
+                buffer.clear()
+
+            lines, pending = read_appended(file, pending)
+            lines = [line for line in lines if line.strip()]
+
+            if lines:
+                if row_parser is None:
+                    fmt = sniff_format(lines, column)
+                    timestamp_format = fmt['timestamp_format']
+                    if fmt['kind'] == 'sql':
+                        def row_parser(lines):
+                            return sql_table_rows(lines, column)
+                        bucket = bucket or 'hour'
+                    else:
+                        def row_parser(lines, delimiter=fmt['delimiter']):
+                            return csv_rows(lines, column, delimiter)
+                buffer.extend(row_parser(lines))
+
+                if bucket:
+                    data, labels = aggregate_rows(buffer, bucket, agg, timestamp_format)
+                else:
+                    labels = [label for label, _ in buffer]
+                    data = [value for _, value in buffer]
+                frame = render_frame(data, labels, title, width)
+                out.write(diff_frame(previous, frame))
+                out.flush()
+                previous = frame
+
+            time.sleep(1 / fps)
+
+
+def export_charts(series, out_dir, formats=('svg',), workers=None, stats=False, threshold=3.0):
+    """Write (name, data, labels) series to chart files and return their paths.
+
+    With `stats`, anomalous points are highlighted as on the terminal chart.
+    """
+    from viz_export import export_series
+
+    marked = {}
+    if stats:
+        from viz_stats import summarise
+        marked = {name: summarise(data, threshold)['anomalies'] for name, data, _ in series}
+
+    return export_series(series, out_dir, formats, workers, marked)
+
+
+def parse_formats(text):
+    """Parse a comma-separated list of export formats."""
+    return [file_format.strip().lower() for file_format in text.split(',')]
+
+
+def parse_columns(text):
+    """Parse a comma-separated list of column numbers."""
+    return [int(column) for column in text.split(',')]
+
+
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python viz.py <data_file>")
-        print("Expected format: date,count")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description='Create line graphs from CSV/text files in the terminal.',
+        epilog='Expected format: date,count'
+    )
+    parser.add_argument('data_files', nargs='*', metavar='data_file',
+                        help='CSV or SQL table output files, or - for stdin')
+    parser.add_argument('--columns', type=parse_columns, default=[1],
+                        help='Value columns to plot, e.g. 1,2,3 (default: 1)')
+    parser.add_argument('--facet', action='store_true',
+                        help='Draw one chart per series instead of overlaying them')
+    parser.add_argument('--workers', type=int,
+                        help='Processes used to parse several files (default: CPU count)')
+    parser.add_argument('--follow', action='store_true',
+                        help='Keep watching the file and redraw as rows are appended')
+    parser.add_argument('--points', type=int, default=50,
+                        help='Number of recent points to show in follow mode (default: 50)')
+    parser.add_argument('--fps', type=float, default=2.0,
+                        help='Redraw rate in follow mode (default: 2)')
+    parser.add_argument('--db', help='SQLite database to query instead of reading files')
+    parser.add_argument('--query', help='SQL query to run with --db (label column first)')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Rows fetched per batch from --db (default: 1000)')
+    parser.add_argument('--bucket', choices=BUCKETS,
+                        help='Merge rows into time buckets (SQL tables default to hour)')
+    parser.add_argument('--agg', choices=AGGREGATIONS, default='sum',
+                        help='How to merge rows in a bucket (default: sum)')
+    parser.add_argument('--cache-dir', type=Path, default=default_cache_dir(),
+                        help='Where to cache parsed large files (default: ~/.cache/terminal-viz)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always parse files from scratch')
+    parser.add_argument('--stats', action='store_true',
+                        help='Print summary stats and mark anomalous points with !')
+    parser.add_argument('--threshold', type=float, default=3.0,
+                        help='Standard deviations from the mean that count as an anomaly (default: 3)')
+    parser.add_argument('--export', metavar='DIR',
+                        help='Write one chart file per series to DIR instead of printing')
+    parser.add_argument('--format', type=parse_formats, default=['svg'],
+                        help='Export formats: svg, html, png (default: svg)')
+    args = parser.parse_args()
+    cache_dir = None if args.no_cache else args.cache_dir
     
-    filepath = sys.argv[1]
+    def export(series):
+        try:
+            paths = export_charts(series, args.export, args.format, args.workers,
+                                  args.stats, args.threshold)
+        except (RuntimeError, ValueError) as e:
+            print(e)
+            sys.exit(1)
+        for path in paths:
+            print(f"Wrote {path}")
     
-    if not Path(filepath).exists():
-        print(f"File not found: {filepath}")
-        sys.exit(1)
+    def plot(data, labels, title):
+        if args.stats:
+            create_graph_with_stats(data, labels, title, args.threshold)
+        else:
+            create_line_graph(data, labels, title)
+
+    if args.db:
+        if not args.query:
+            parser.error("--db needs a --query")
+        if not Path(args.db).exists():
+            print(f"File not found: {args.db}")
+            sys.exit(1)
+        data, labels = query_sqlite(args.db, args.query, args.bucket, args.agg,
+                                    args.columns[0], args.batch_size)
+        print(f"Found {len(data)} data points")
+        if args.export:
+            export([(f"query-{Path(args.db).stem}", data, labels)])
+        else:
+            plot(data, labels, f"Query on {Path(args.db).name}")
+        return
+
+    if not args.data_files:
+        parser.error("give at least one data file, - for stdin, or --db")
+
+    if '-' in args.data_files and len(args.data_files) > 1:
+        parser.error("stdin (-) cannot be combined with other files")
+
+    for filepath in args.data_files:
+        if filepath != '-' and not Path(filepath).exists():
+            print(f"File not found: {filepath}")
+            sys.exit(1)
+
+    if args.follow:
+        if len(args.data_files) > 1 or args.data_files[0] == '-':
+            parser.error("--follow takes a single data file")
+        if len(args.columns) > 1:
+            parser.error("--follow takes a single column")
+        if args.fps <= 0:
+            parser.error("--fps must be positive")
+        try:
+            follow_file(args.data_files[0], args.points, args.fps,
+                        bucket=args.bucket, agg=args.agg, column=args.columns[0])
+        except KeyboardInterrupt:
+            print()
+        return
+
+    if args.export or len(args.data_files) > 1 or len(args.columns) > 1:
+        series = load_series(args.data_files, args.columns, args.bucket,
+                             args.agg, args.workers, cache_dir)
+        for name, data, _ in series:
+            print(f"Found {len(data)} data points in {name}")
+        if args.export:
+            export(series)
+        else:
+            create_multi_graph(series, "Data comparison", args.facet)
+        return
     
+    filepath = args.data_files[0]
+    name = 'stdin' if filepath == '-' else Path(filepath).name
     print(f"Visualizing data from: {filepath}")
     
-    data, labels = parse_data_file(filepath)
+    data, labels = parse_data_file(filepath, args.bucket, args.agg, args.columns[0], cache_dir)
     
-    if not data:
+    if len(data) == 0:
         print("No valid numeric data found")
         sys.exit(1)
     
     print(f"Found {len(data)} data points")
-    create_line_graph(data, labels, f"Data from {Path(filepath).name}")
+    plot(data, labels, f"Data from {name}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+File output for terminal-viz charts: SVG, HTML and (optionally) PNG.
+
+SVG is written directly. PNG needs the optional cairosvg package. Series
+come from the same parse and aggregation stages as the terminal chart, so
+each file is read once no matter how many formats are written.
+"""
+
+import os
+import re
+from collections import Counter
+from html import escape
+from pathlib import Path
+
+
+FORMATS = ('svg', 'html', 'png')
+
+WIDTH = 800
+HEIGHT = 400
+MARGIN = {'left': 70, 'right': 20, 'top': 40, 'bottom': 50}
+MAX_X_LABELS = 10
+Y_TICKS = 5
+
+
+def _format_value(value):
+    return f"{value:,.0f}" if abs(value) >= 100 else f"{value:.4g}"
+
+
+def render_svg(data, labels, title="Data Visualization", marked=(), width=WIDTH, height=HEIGHT):
+    """Render a series as an SVG line chart and return the markup.
+
+    Points whose index is in `marked` are drawn as red dots.
+    """
+    plot_width = width - MARGIN['left'] - MARGIN['right']
+    plot_height = height - MARGIN['top'] - MARGIN['bottom']
+    count = len(data)
+
+    low = min(min(data, default=0), 0)
+    high = max(data, default=0)
+    if high == low:
+        high = low + 1
+
+    def x(index):
+        if count == 1:
+            return MARGIN['left'] + plot_width / 2
+        return MARGIN['left'] + index / (count - 1) * plot_width
+
+    def y(value):
+        return MARGIN['top'] + (high - value) / (high - low) * plot_height
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="sans-serif" font-size="11">',
+        f'<rect width="{width}" height="{height}" fill="white"/>',
+        f'<text x="{width / 2:.1f}" y="22" text-anchor="middle" font-size="15">{escape(title)}</text>',
+    ]
+
+    # Y axis ticks and grid lines
+    for tick in range(Y_TICKS + 1):
+        value = low + (high - low) * tick / Y_TICKS
+        tick_y = y(value)
+        parts.append(f'<line x1="{MARGIN["left"]}" y1="{tick_y:.1f}" '
+                     f'x2="{width - MARGIN["right"]}" y2="{tick_y:.1f}" stroke="#e5e5e5"/>')
+        parts.append(f'<text x="{MARGIN["left"] - 6}" y="{tick_y + 4:.1f}" '
+                     f'text-anchor="end">{_format_value(value)}</text>')
+
+    # X axis labels, evenly spaced so they do not overlap
+    step = max(1, -(-count // MAX_X_LABELS))
+    for index in range(0, count, step):
+        parts.append(f'<text x="{x(index):.1f}" y="{height - MARGIN["bottom"] + 18}" '
+                     f'text-anchor="middle">{escape(str(labels[index]))}</text>')
+
+    parts.append(f'<line x1="{MARGIN["left"]}" y1="{y(low):.1f}" '
+                 f'x2="{width - MARGIN["right"]}" y2="{y(low):.1f}" stroke="#888"/>')
+
+    points = ' '.join(f"{x(i):.1f},{y(value):.1f}" for i, value in enumerate(data))
+    parts.append(f'<polyline points="{points}" fill="none" stroke="#1f77b4" stroke-width="1.5"/>')
+
+    for index in sorted(set(marked)):
+        parts.append(f'<circle cx="{x(index):.1f}" cy="{y(data[index]):.1f}" r="3.5" fill="#d62728">'
+                     f'<title>{escape(str(labels[index]))}: {_format_value(data[index])}</title></circle>')
+
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+
+def render_html(svg, title="Data Visualization"):
+    """Wrap an SVG chart in a standalone HTML page."""
+    return (f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{escape(title)}</title>\n</head>\n<body>\n{svg}\n</body>\n</html>\n")
+
+
+def check_png_support():
+    """Raise RuntimeError if PNG export is not available."""
+    try:
+        import cairosvg  # noqa: F401
+    except ImportError:
+        raise RuntimeError("PNG export needs cairosvg: pip install cairosvg")
+
+
+def safe_filename(name):
+    """Turn a series name like 'web-1.csv:2' into a file name."""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', name).strip('_') or 'series'
+
+
+def export_chart(name, data, labels, out_dir, formats=('svg',), title=None, marked=()):
+    """Write one series in each format and return the paths written."""
+    title = title or name
+    svg = render_svg(data, labels, title, marked)
+    base = Path(out_dir) / safe_filename(name)
+    written = []
+
+    for file_format in formats:
+        path = base.with_name(f"{base.name}.{file_format}")
+        if file_format == 'svg':
+            path.write_text(svg)
+        elif file_format == 'html':
+            path.write_text(render_html(svg, title))
+        elif file_format == 'png':
+            import cairosvg
+            cairosvg.svg2png(bytestring=svg.encode(), write_to=str(path))
+        else:
+            raise ValueError(f"Unknown export format: {file_format}")
+        written.append(path)
+
+    return written
+
+
+def export_series(series, out_dir, formats=('svg',), workers=None, marked=None):
+    """Write every (name, data, labels) series to files, in parallel.
+
+    `marked` optionally maps series names to indexes to highlight. Returns
+    the paths written, in series order.
+    """
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown export format: {', '.join(sorted(unknown))}")
+    if 'png' in formats:
+        check_png_support()
+
+    files = Counter(safe_filename(name) for name, _, _ in series)
+    clashes = sorted(name for name, count in files.items() if count > 1)
+    if clashes:
+        raise ValueError(f"Several series would be written to {', '.join(clashes)}; give them unique names")
+
+    os.makedirs(out_dir, exist_ok=True)
+    marked = marked or {}
+    jobs = [(name, data, labels, out_dir, tuple(formats), None, marked.get(name, ()))
+            for name, data, labels in series]
+
+    if len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(export_chart, *zip(*jobs)))
+    else:
+        results = [export_chart(*job) for job in jobs]
+
+    return [path for paths in results for path in paths]
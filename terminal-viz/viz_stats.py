@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Single-pass summary statistics and anomaly flags for terminal-viz.
+
+Mean and spread use Welford's algorithm and quantiles use a merging
+t-digest, so a series is summarised as it streams past with no second pass.
+"""
+
+import math
+
+
+class RunningStats:
+    """Count, min, max, mean and variance kept with Welford's algorithm."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.min = None
+        self.max = None
+        self._m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def variance(self):
+        """Sample variance (0 until there are two values)."""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.variance)
+
+
+class TDigest:
+    """Merging t-digest for approximate quantiles in bounded memory.
+
+    Values are buffered and merged into at most about `compression`
+    centroids. Centroids stay small near the tails, so extreme quantiles
+    such as p99 stay accurate.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.centroids = []  # [mean, weight], sorted by mean
+        self.count = 0
+        self.min = None
+        self.max = None
+        self._buffer = []
+
+    def add(self, value):
+        self._buffer.append(value)
+        self.count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self._buffer) >= self.compression * 5:
+            self._merge()
+
+    def _scale(self, q):
+        """The k1 scale function: how many centroids sit below quantile q."""
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _merge(self):
+        if not self._buffer:
+            return
+
+        points = sorted(self.centroids + [[value, 1] for value in self._buffer])
+        self._buffer = []
+
+        merged = [list(points[0])]
+        merged_weight = 0
+        k_left = self._scale(0)
+        for mean, weight in points[1:]:
+            last = merged[-1]
+            q_right = (merged_weight + last[1] + weight) / self.count
+            if self._scale(q_right) - k_left <= 1:
+                last[1] += weight
+                last[0] += (mean - last[0]) * weight / last[1]
+            else:
+                merged_weight += last[1]
+                k_left = self._scale(merged_weight / self.count)
+                merged.append([mean, weight])
+
+        self.centroids = merged
+
+    def quantile(self, q):
+        """Estimate the value at quantile q (0 to 1), or None if empty."""
+        self._merge()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1 or q <= 0:
+            return self.min if q <= 0 else self.centroids[0][0]
+        if q >= 1:
+            return self.max
+
+        # Each centroid's mean sits at the middle of its weight; interpolate
+        # between neighbouring centres, and towards min/max at the ends
+        target = q * self.count
+        previous_position, previous_mean = 0, self.min
+        position = 0
+        for mean, weight in self.centroids:
+            centre = position + weight / 2
+            if target < centre:
+                span = centre - previous_position
+                fraction = (target - previous_position) / span if span else 0
+                return previous_mean + fraction * (mean - previous_mean)
+            previous_position, previous_mean = centre, mean
+            position += weight
+
+        span = self.count - previous_position
+        fraction = (target - previous_position) / span if span else 0
+        return previous_mean + fraction * (self.max - previous_mean)
+
+
+def summarise(data, threshold=3.0, warmup=5, quantiles=(0.5, 0.9, 0.95, 0.99)):
+    """Summarise a series in one pass and flag anomalous points.
+
+    Each point is compared with the stats of the points before it, so a
+    point is anomalous when it is more than `threshold` standard deviations
+    from the mean so far. Nothing is flagged until `warmup` points are seen.
+
+    Returns a dict of summary values plus 'anomalies', a list of indexes.
+    """
+    stats = RunningStats()
+    digest = TDigest()
+    anomalies = []
+
+    for index, value in enumerate(data):
+        if stats.count >= warmup and stats.stddev > 0:
+            if abs(value - stats.mean) / stats.stddev > threshold:
+                anomalies.append(index)
+        stats.add(value)
+        digest.add(value)
+
+    summary = {
+        'count': stats.count,
+        'min': stats.min,
+        'max': stats.max,
+        'mean': stats.mean,
+        'stddev': stats.stddev,
+    }
+    for q in quantiles:
+        summary[f"p{q * 100:g}"] = digest.quantile(q)
+    summary['anomalies'] = anomalies
+    return summary
+
+
+def format_summary(summary, labels):
+    """Lines of text for the summary panel printed below a chart."""
+    if not summary['count']:
+        return ["No data to summarise"]
+
+    quantiles = [key for key in summary if key.startswith('p') and key[1:].replace('.', '').isdigit()]
+    lines = [
+        "Summary",
+        f"  count {summary['count']}   min {summary['min']:.2f}   max {summary['max']:.2f}",
+        f"  mean {summary['mean']:.2f}   stddev {summary['stddev']:.2f}",
+        "  " + "   ".join(f"{key} {summary[key]:.2f}" for key in quantiles),
+    ]
+
+    anomalies = summary['anomalies']
+    if anomalies:
+        flagged = ", ".join(str(labels[index]) for index in anomalies[:10])
+        more = f" and {len(anomalies) - 10} more" if len(anomalies) > 10 else ""
+        lines.append(f"  {len(anomalies)} anomalies (marked !): {flagged}{more}")
+    else:
+        lines.append("  No anomalies")
+    return lines